@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, List
+
+from mvp_model.train_mvp import HAS_XGB, build_model
+from mvp_model.utils.cli import add_cache_args, add_feature_set_arg, add_rating_engine_arg
+from mvp_model.utils.metrics import probability_metrics
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+    import pandas as pd
+
+# Datos compartidos por los workers (se envían una vez por proceso, no por fold)
+_SHARED: Dict[str, object] = {}
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Walk-forward backtest: retrain at every event boundary and score the next event")
+    p.add_argument("--csv-path", default="masters_csvs/matches.csv", help="Path to matches.csv")
+    p.add_argument("--out-dir", default="mvp_model/artifacts", help="Directory for backtest_folds.csv, backtest_preds.csv and backtest_summary.json")
+    p.add_argument("--event-col", default="tournament_name", help="Column that defines the events (fold boundaries)")
+    p.add_argument("--min-train", type=int, default=50, help="Minimum number of training matches for a fold")
+    p.add_argument("--elo-k", type=float, default=32.0, help="Elo K-factor")
+    p.add_argument("--elo-base", type=float, default=1500.0, help="Elo base rating")
+    p.add_argument("--use-xgb", action="store_true", help="Force use XGBoost if available")
+    p.add_argument("--no-warm-start", action="store_true", help="Fit every fold from scratch (LogisticRegression only)")
+    p.add_argument("--jobs", type=int, default=1, help="Worker processes; folds are split in contiguous chunks (0 = all cores)")
+    add_feature_set_arg(p)
+    add_rating_engine_arg(p)
+    add_cache_args(p)
+    return p.parse_args()
+
+
+def plan_folds(df: pd.DataFrame, event_col: str, min_train: int) -> List[dict]:
+    """
+    Un fold por evento, en orden de fecha de inicio. Se entrena con los
+    partidos anteriores al inicio del evento (prefijo del df, que está ordenado
+    por fecha) y se evalúa con todos los partidos del evento.
+    """
+    import numpy as np
+
+    starts = df.groupby(event_col, sort=False)["parsed_date"].min().sort_values(kind="stable")
+    dates = df["parsed_date"].to_numpy()
+    y = df["team1_win"].to_numpy()
+    folds = []
+    for event, start in starts.items():
+        n_train = int(np.searchsorted(dates, start.to_datetime64(), side="left"))
+        if n_train < min_train or len(np.unique(y[:n_train])) < 2:
+            continue
+        folds.append({
+            "fold": len(folds),
+            "event": event,
+            "start": start.date().isoformat(),
+            "n_train": n_train,
+            "test_idx": np.flatnonzero((df[event_col] == event).to_numpy()),
+        })
+    return folds
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray, feature_names: List[str]) -> None:
+    _SHARED["X"] = X
+    _SHARED["y"] = y
+    _SHARED["feature_names"] = feature_names
+
+
+def _run_chunk(folds: List[dict], use_xgb: bool, warm_start: bool) -> List[dict]:
+    # Con warm start el mismo estimador pasa de un fold al siguiente: cada fit
+    # arranca de los coeficientes del fold anterior en lugar de desde cero
+    import numpy as np
+    import pandas as pd
+
+    X = pd.DataFrame(_SHARED["X"], columns=_SHARED["feature_names"])
+    y = _SHARED["y"]
+    params = {"warm_start": True} if warm_start and not use_xgb else None
+    model = build_model(use_xgb=use_xgb, params=params)
+    out = []
+    for fold in folds:
+        if not warm_start:
+            model = build_model(use_xgb=use_xgb)
+        n_train, test_idx = fold["n_train"], fold["test_idx"]
+        t0 = time.perf_counter()
+        model.fit(X.iloc[:n_train], y[:n_train])
+        fit_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        proba = model.predict_proba(X.iloc[test_idx])[:, 1]
+        predict_s = time.perf_counter() - t0
+        n_iter = getattr(model.named_steps["model"], "n_iter_", None)
+        out.append({
+            "fold": fold["fold"],
+            "proba": proba,
+            "fit_seconds": fit_s,
+            "predict_seconds": predict_s,
+            "n_iter": int(np.max(n_iter)) if n_iter is not None else None,
+            "worker": os.getpid(),
+        })
+    return out
+
+
+def _chunks(folds: List[dict], n: int) -> List[List[dict]]:
+    # Bloques contiguos: el warm start solo aprovecha folds consecutivos
+    import numpy as np
+
+    bounds = np.linspace(0, len(folds), n + 1).round().astype(int)
+    return [folds[a:b] for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def main():
+    args = parse_args()
+
+    # Lazy imports: `--help` no carga numpy/pandas/sklearn
+    import numpy as np
+    import pandas as pd
+
+    from mvp_model.utils.features import load_features
+
+    t_total = time.perf_counter()
+
+    t0 = time.perf_counter()
+    df, X, info = load_features(
+        args.csv_path, args.elo_k, args.elo_base, args.feature_set,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        engine=args.rating_engine,
+    )
+    if args.event_col not in df.columns:
+        raise SystemExit(f"El CSV no tiene la columna de eventos: {args.event_col}")
+    # Elo se calcula una vez en orden cronológico (online, solo con resultados
+    # previos a cada partido), así que ningún fold repite el histórico. Los
+    # partidos sin fecha van al final del recorrido y no entran en ningún fold.
+    dated = df["parsed_date"].notna().to_numpy()
+    df, X = df[dated].reset_index(drop=True), X[dated].reset_index(drop=True)
+    y = df["team1_win"].astype(int).to_numpy()
+    load_s = time.perf_counter() - t0
+
+    folds = plan_folds(df, args.event_col, args.min_train)
+    if not folds:
+        raise SystemExit("Ningún evento tiene suficientes partidos previos para entrenar (--min-train).")
+    use_xgb = args.use_xgb and HAS_XGB
+    warm_start = not args.no_warm_start
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    chunks = _chunks(folds, min(jobs, len(folds)))
+
+    t0 = time.perf_counter()
+    values = X.to_numpy(dtype=np.float64)
+    if len(chunks) == 1:
+        _init_worker(values, y, info["feature_names"])
+        results = _run_chunk(chunks[0], use_xgb, warm_start)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=len(chunks), initializer=_init_worker, initargs=(values, y, info["feature_names"])
+        ) as ex:
+            futures = [ex.submit(_run_chunk, chunk, use_xgb, warm_start) for chunk in chunks]
+            results = [r for fut in futures for r in fut.result()]
+    folds_s = time.perf_counter() - t0
+
+    # Métricas por fold y agregadas (predicciones fuera de muestra concatenadas)
+    rows, preds = [], []
+    for fold, res in zip(folds, results):
+        idx = fold["test_idx"]
+        rows.append({
+            "fold": fold["fold"],
+            "event": fold["event"],
+            "start": fold["start"],
+            "n_train": fold["n_train"],
+            **probability_metrics(y[idx], res["proba"]),
+            "accuracy": float(np.mean((res["proba"] >= 0.5) == y[idx])),
+            "fit_seconds": res["fit_seconds"],
+            "predict_seconds": res["predict_seconds"],
+            "n_iter": res["n_iter"],
+            "worker": res["worker"],
+        })
+        part = df.iloc[idx][["parsed_date", "match_id", "team1", "team2", "team1_win"]].copy()
+        part.insert(0, "fold", fold["fold"])
+        part["p_team1_win"] = res["proba"]
+        preds.append(part)
+    folds_df = pd.DataFrame(rows)
+    preds_df = pd.concat(preds, ignore_index=True)
+    pooled = probability_metrics(preds_df["team1_win"].to_numpy(), preds_df["p_team1_win"].to_numpy())
+    pooled["accuracy"] = float(np.mean((preds_df["p_team1_win"] >= 0.5) == preds_df["team1_win"]))
+
+    summary = {
+        "n_folds": len(folds),
+        "n_matches": int(len(df)),
+        "event_col": args.event_col,
+        "model_type": "XGBoost" if use_xgb else "LogisticRegression",
+        "warm_start": warm_start and not use_xgb,
+        "elo_k": args.elo_k,
+        "elo_base": args.elo_base,
+        "rating_engine": args.rating_engine,
+        "pooled": pooled,
+        "mean_per_fold": {m: float(folds_df[m].mean()) for m in ("log_loss", "brier", "roc_auc", "accuracy")},
+        "timing": {
+            "load_features_seconds": load_s,
+            "folds_wall_seconds": folds_s,
+            "fit_seconds_total": float(folds_df["fit_seconds"].sum()),
+            "fit_seconds_per_fold": float(folds_df["fit_seconds"].mean()),
+            "predict_seconds_total": float(folds_df["predict_seconds"].sum()),
+            "workers": len(chunks),
+            "total_seconds": time.perf_counter() - t_total,
+        },
+    }
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    folds_df.to_csv(os.path.join(args.out_dir, "backtest_folds.csv"), index=False)
+    preds_df.to_csv(os.path.join(args.out_dir, "backtest_preds.csv"), index=False)
+    with open(os.path.join(args.out_dir, "backtest_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(folds_df.drop(columns=["worker"]).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print("Agregado (predicciones fuera de muestra):", json.dumps(pooled, indent=2))
+    t = summary["timing"]
+    print(
+        f"Tiempos: carga+features {t['load_features_seconds']:.3f}s | folds {t['folds_wall_seconds']:.3f}s "
+        f"({t['fit_seconds_per_fold'] * 1000:.1f} ms de fit por fold, {t['workers']} proceso(s)) | total {t['total_seconds']:.3f}s"
+    )
+    print(f"Resultados guardados en: {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
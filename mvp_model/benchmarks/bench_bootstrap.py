@@ -0,0 +1,55 @@
+import argparse
+import time
+
+import numpy as np
+
+from mvp_model.utils.bootstrap import bootstrap_report
+from mvp_model.utils.metrics import probability_metrics
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark del bootstrap vectorizado frente a un bucle por remuestra con sklearn")
+    p.add_argument("--n-test", type=int, nargs="+", default=[100, 1000], help="Partidos del bloque de test sintético")
+    p.add_argument("--n-boot", type=int, default=2000, help="Remuestras")
+    p.add_argument("--loop-max", type=int, default=500, help="Remuestras del bucle de referencia (se extrapola)")
+    p.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4], help="Procesos a probar")
+    p.add_argument("--seed", type=int, default=0)
+    return p.parse_args()
+
+
+def synthetic_test(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n) < 0.5).astype(int)
+    a = np.clip(0.5 + 0.2 * (y - 0.5) + rng.normal(0, 0.2, n), 0.01, 0.99)
+    b = np.clip(a + rng.normal(0, 0.05, n), 0.01, 0.99)
+    return y, a, b
+
+
+def main():
+    args = parse_args()
+    print(f"{'n_test':>7} {'bucle sklearn (s)':>18} " + " ".join(f"{f'jobs={j} (s)':>11}" for j in args.jobs)
+          + "  igual entre jobs  AUC = sklearn")
+    for n in args.n_test:
+        y, a, b = synthetic_test(n, args.seed)
+        rng = np.random.default_rng(args.seed)
+        loops = min(args.loop_max, args.n_boot)
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            i = rng.integers(0, n, n)
+            probability_metrics(y[i], a[i])
+            probability_metrics(y[i], b[i])
+        t_loop = (time.perf_counter() - t0) * args.n_boot / loops
+
+        times, reports = [], []
+        for j in args.jobs:
+            t0 = time.perf_counter()
+            reports.append(bootstrap_report(y, {"a": a, "b": b}, baseline="b", n_boot=args.n_boot, seed=args.seed, jobs=j))
+            times.append(time.perf_counter() - t0)
+        same = all(r == reports[0] for r in reports)
+        auc_ok = abs(reports[0]["models"]["a"]["roc_auc"]["estimate"] - probability_metrics(y, a)["roc_auc"]) < 1e-12
+        print(f"{n:>7} {t_loop:>18.3f} " + " ".join(f"{t:>11.3f}" for t in times)
+              + f"  {'sí' if same else 'NO':>16}  {'sí' if auc_ok else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from mvp_model.utils.chunks import StageMemory, chunk_rows_for, iter_master
+from mvp_model.utils.form import FORM_STATS, PERFORMANCE_FILE, PLAYER_STATS_FILE, load_player_matches
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark de la lectura por bloques: pico de memoria por etapa")
+    p.add_argument("--masters-dir", default="masters_csvs", help="Carpeta de los CSV maestros")
+    p.add_argument("--memory-mb", type=float, nargs="+", default=[1.0, 4.0, 16.0], help="Techos de memoria a probar")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    ps_csv = os.path.join(args.masters_dir, PLAYER_STATS_FILE)
+    perf_csv = os.path.join(args.masters_dir, PERFORMANCE_FILE)
+    mem = StageMemory()
+
+    with mem.stage("read_csv completo"):
+        rows = len(pd.read_csv(ps_csv, low_memory=False))
+    with mem.stage("forma en memoria"):
+        ref = load_player_matches(ps_csv, perf_csv)
+    exact = {}
+    for mb in args.memory_mb:
+        with mem.stage(f"bloques tipados {mb:g} MB"):
+            n = sum(len(c) for c in iter_master(ps_csv, memory_mb=mb))
+        assert n == rows
+        with mem.stage(f"forma por bloques {mb:g} MB"):
+            out = load_player_matches(ps_csv, perf_csv, memory_mb=mb)
+        diff = np.abs(out[FORM_STATS].to_numpy(dtype=np.float64) - ref[FORM_STATS].to_numpy(dtype=np.float64))
+        exact[mb] = len(out) == len(ref) and bool(np.nanmax(diff, initial=0.0) < 1e-9)
+
+    print(f"{PLAYER_STATS_FILE}: {rows} filas")
+    print(mem.report())
+    for mb, ok in exact.items():
+        print(f"techo {mb:g} MB: {chunk_rows_for(ps_csv, memory_mb=mb)} filas/bloque, "
+              f"forma igual a la carga completa: {'sí' if ok else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import importlib.util
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from mvp_model.utils.economy import BUY_COLUMNS, ECONOMY_COLUMNS, ECONOMY_FILE, parse_economy
+from mvp_model.utils.masters import read_master, resolve_ids
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark del parser de economía: regex vectorizada vs bucle por celda")
+    p.add_argument("--masters-dir", default="masters_csvs", help="Carpeta de los CSV maestros")
+    p.add_argument("--repeat", type=int, nargs="+", default=[1, 10, 100], help="Veces que se replica economy_data.csv")
+    return p.parse_args()
+
+
+def loop_parse(raw: pd.DataFrame) -> dict:
+    """Referencia: `re.match` + `int()` celda a celda."""
+    pattern = re.compile(r"^\s*(\d+)\s*\(\s*(\d+)\s*\)\s*$")
+    out = {}
+    for col, prefix in BUY_COLUMNS.items():
+        played, won = [], []
+        for cell in raw[col].tolist():
+            m = pattern.match(str(cell))
+            played.append(int(m.group(1)) if m else np.nan)
+            won.append(int(m.group(2)) if m else np.nan)
+        out[f"{prefix}_played"] = np.array(played, dtype=np.float64)
+        out[f"{prefix}_won"] = np.array(won, dtype=np.float64)
+    return out
+
+
+def main():
+    args = parse_args()
+    raw = read_master(os.path.join(args.masters_dir, ECONOMY_FILE), columns=ECONOMY_COLUMNS)
+    has_arrow = importlib.util.find_spec("pyarrow") is not None
+    parse_economy(raw, use_arrow=has_arrow)  # calentar imports y regex
+
+    def timed(fn):
+        t0 = time.perf_counter()
+        out = fn()
+        return time.perf_counter() - t0, out
+
+    print(f"{'filas':>9} {'celdas':>9} {'bucle (s)':>10} {'str (s)':>8} {'arrow (s)':>10} {'celdas/s':>12} {'speedup':>8}  exacto")
+    for rep in args.repeat:
+        big = pd.concat([raw] * rep, ignore_index=True)
+        t_loop, ref = timed(lambda: loop_parse(big))
+        t_str, parsed_str = timed(lambda: parse_economy(big, use_arrow=False))
+        t_arrow, parsed = timed(lambda: parse_economy(big, use_arrow=True)) if has_arrow else (float("nan"), parsed_str)
+        best = min(t for t in (t_str, t_arrow) if t == t)
+        exact = all(
+            np.array_equal(p[c].to_numpy(dtype=np.float64, na_value=np.nan), ref[c], equal_nan=True)
+            for p in (parsed_str, parsed) for c in ref
+        )
+        cells = len(big) * len(BUY_COLUMNS)
+        print(f"{len(big):>9} {cells:>9} {t_loop:>10.3f} {t_str:>8.3f} {t_arrow:>10.3f} {cells / best:>12,.0f} "
+              f"{t_loop / best:>7.1f}x  {'sí' if exact else 'NO'}")
+
+    # IDs de equipo: sidecar .ids.csv frente a resolverlos con el registro (en frío)
+    csv_path = os.path.join(args.masters_dir, ECONOMY_FILE)
+    t_side, ids = timed(lambda: read_master(csv_path, columns=["Team", "Team_id"]))
+    t_reg, _ = timed(lambda: resolve_ids(raw[["Team"]].copy(), {"Team": "team"}, args.masters_dir))
+    print(f"IDs de equipo: {ids['Team_id'].nunique()} equipos; sidecar {t_side * 1e3:.1f} ms, "
+          f"registro en memoria {t_reg * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
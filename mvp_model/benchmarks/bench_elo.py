@@ -0,0 +1,104 @@
+import argparse
+import time
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from mvp_model.utils.elo import HAS_NUMBA, build_elo_features, elo_pass, encode_teams, expected_score
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark del motor Elo vectorizado vs el recorrido con iterrows")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Número de partidos sintéticos")
+    p.add_argument("--n-teams", type=int, default=200, help="Número de equipos sintéticos")
+    p.add_argument("--legacy-max", type=int, default=100_000,
+                   help="Partidos sobre los que se corre la versión iterrows (es lenta); en tamaños mayores "
+                   "se mide sobre los primeros --legacy-max y se extrapola (es lineal)")
+    p.add_argument("--seed", type=int, default=0)
+    return p.parse_args()
+
+
+def legacy_build_elo_features(
+    df: pd.DataFrame, team1_col: str, team2_col: str, label_col: str, elo_k: float = 32.0, elo_base: float = 1500.0
+) -> pd.DataFrame:
+    """Implementación original (referencia de exactitud y de tiempos)."""
+    ratings: Dict[str, float] = {}
+    elo1_before = np.zeros(len(df), dtype=float)
+    elo2_before = np.zeros(len(df), dtype=float)
+    for i, row in df.iterrows():
+        t1 = str(row[team1_col])
+        t2 = str(row[team2_col])
+        r1 = ratings.get(t1, elo_base)
+        r2 = ratings.get(t2, elo_base)
+        elo1_before[i] = r1
+        elo2_before[i] = r2
+        if label_col in df.columns:
+            y = float(row[label_col])
+            e1 = expected_score(r1, r2)
+            e2 = 1.0 - e1
+            ratings[t1] = r1 + elo_k * (y - e1)
+            ratings[t2] = r2 + elo_k * ((1.0 - y) - e2)
+    out = pd.DataFrame({"elo1_before": elo1_before, "elo2_before": elo2_before})
+    out["elo_diff"] = out["elo1_before"] - out["elo2_before"]
+    return out
+
+
+def synthetic_matches(n: int, n_teams: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    names = np.array([f"Team {i:04d}" for i in range(n_teams)], dtype=object)
+    t1 = rng.integers(0, n_teams, size=n)
+    # Evitar que un equipo juegue contra sí mismo
+    t2 = (t1 + rng.integers(1, n_teams, size=n)) % n_teams
+    return pd.DataFrame({
+        "team1": names[t1],
+        "team2": names[t2],
+        "team1_win": rng.integers(0, 2, size=n),
+    })
+
+
+def _timeit(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    args = parse_args()
+    if HAS_NUMBA:
+        # Calentar el JIT para no medir la compilación
+        elo_pass(np.zeros(1, np.int64), np.zeros(1, np.int64), np.zeros(1), np.full(1, 1500.0))
+
+    print(f"numba disponible: {HAS_NUMBA}")
+    print(f"{'n':>10} {'iterrows (s)':>14} {'listas (s)':>12} {'numba (s)':>11} {'speedup':>9}  {'exacto':>6}  iterrows")
+    for n in args.sizes:
+        df = synthetic_matches(n, args.n_teams, args.seed)
+        codes1, codes2, teams = encode_teams(df, "team1", "team2")
+        y = df["team1_win"].to_numpy(dtype=np.float64)
+        init = np.full(len(teams), 1500.0)
+
+        t_py = _timeit(lambda: elo_pass(codes1, codes2, y, init, use_jit=False))
+        t_jit = _timeit(lambda: elo_pass(codes1, codes2, y, init, use_jit=True)) if HAS_NUMBA else float("nan")
+        new = build_elo_features(df, "team1", "team2", "team1_win")
+
+        # Por encima de --legacy-max el tiempo iterrows se extrapola (es lineal)
+        # desde los primeros m partidos, y la exactitud del tamaño completo no
+        # se comprueba: "n/a"
+        m = min(n, args.legacy_max)
+        t0 = time.perf_counter()
+        ref = legacy_build_elo_features(df.iloc[:m], "team1", "team2", "team1_win")
+        t_legacy = (time.perf_counter() - t0) * n / m
+        if m < n:
+            exact, mark, source = "n/a", "~", "extrapolado"
+        else:
+            exact = "sí" if ref.equals(new.reset_index(drop=True)) else "NO"
+            mark, source = " ", "medido"
+        best = t_jit if HAS_NUMBA else t_py
+        print(f"{n:>10} {mark}{t_legacy:>13.3f} {t_py:>12.3f} {t_jit:>11.4f} {mark}{t_legacy / best:>7.0f}x  "
+              f"{exact:>6}  {source}")
+    if any(n > args.legacy_max for n in args.sizes):
+        print(f"~ iterrows extrapolado desde los primeros {args.legacy_max} partidos; exactitud no comprobada (n/a)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from mvp_model.utils.features import load_matches
+from mvp_model.utils.form import FORM_STATS, FormConfig, FormState, form_sources, load_player_matches, roster_arrays
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark de las features de forma: estado incremental vs recalcular la historia en cada partido")
+    p.add_argument("--csv-path", default="masters_csvs/matches.csv", help="matches.csv (las estadísticas de jugadores se leen de la misma carpeta)")
+    p.add_argument("--repeat", type=int, default=20, help="Veces que se replica el histórico (más partidos)")
+    return p.parse_args()
+
+
+def naive_roll(players: np.ndarray, obs: np.ndarray, config: FormConfig) -> np.ndarray:
+    """Referencia: en cada partido, media de los últimos `window` partidos de cada jugador desde su historial."""
+    history = {}
+    glob_sum = np.zeros(len(FORM_STATS))
+    glob_cnt = np.zeros(len(FORM_STATS))
+    out = np.empty((len(players), 2, len(FORM_STATS)))
+    for m in range(len(players)):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            prior = np.where(glob_cnt > 0, glob_sum / glob_cnt, 0.0)
+        for side in range(2):
+            vals = []
+            for p in players[m, side]:
+                if p < 0:
+                    continue
+                h = pd.DataFrame(history.get(p, []), columns=FORM_STATS).tail(config.window)
+                s = h.sum().to_numpy()
+                c = h.notna().sum().to_numpy()
+                vals.append((s + config.prior_weight * prior) / (c + config.prior_weight))
+            out[m, side] = np.mean(vals, axis=0) if vals else prior
+        for side in range(2):
+            for j, p in enumerate(players[m, side]):
+                if p < 0:
+                    continue
+                x = obs[m, side, j]
+                history.setdefault(p, []).append(x)
+                glob_sum += np.nan_to_num(x)
+                glob_cnt += ~np.isnan(x)
+    return out
+
+
+def main():
+    args = parse_args()
+    df = load_matches(args.csv_path)
+    player_stats_csv, performance_csv = form_sources(os.path.dirname(args.csv_path))
+    pm = load_player_matches(player_stats_csv, performance_csv)
+    players, obs = roster_arrays(df, pm, FormState())
+    n_players = int(players.max()) + 1
+
+    # Histórico más largo: el mismo calendario repetido con jugadores nuevos
+    big_players = np.concatenate([np.where(players >= 0, players + k * n_players, -1) for k in range(args.repeat)])
+    big_obs = np.concatenate([obs] * args.repeat)
+
+    config = FormConfig()
+    print(f"{'partidos':>9} {'naive (s)':>10} {'python (s)':>11} {'numba (s)':>10} {'speedup':>8}  exacto")
+    for n_rep in sorted({1, args.repeat}):
+        P, O = big_players[: len(players) * n_rep], big_obs[: len(players) * n_rep]
+        codes = [str(i) for i in range(int(P.max()) + 1)]
+
+        def run(use_jit: bool):
+            state = FormState(config)
+            state.codes(codes)
+            t0 = time.perf_counter()
+            roll, _ = state.process(P, O, use_jit=use_jit)
+            return time.perf_counter() - t0, roll
+
+        run(True)  # calentar el JIT
+        t_py, roll_py = run(False)
+        t_jit, roll_jit = run(True)
+        if n_rep == 1:
+            t0 = time.perf_counter()
+            ref = naive_roll(P, O, config)
+            t_naive = time.perf_counter() - t0
+            exact = "sí" if np.allclose(ref, roll_jit, rtol=1e-9, atol=1e-9) and np.array_equal(roll_py, roll_jit) else "NO"
+            speedup = f"{t_naive / t_jit:.0f}x"
+        else:
+            t_naive, exact, speedup = float("nan"), "-", "-"
+        print(f"{len(P):>9} {t_naive:>10.3f} {t_py:>11.3f} {t_jit:>10.4f} {speedup:>8}  {exact}")
+
+
+if __name__ == "__main__":
+    main()
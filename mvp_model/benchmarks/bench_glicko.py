@@ -0,0 +1,87 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from mvp_model.benchmarks.bench_elo import synthetic_matches
+from mvp_model.utils.elo import HAS_NUMBA, elo_pass, encode_teams
+from mvp_model.utils.features import load_matches
+from mvp_model.utils.glicko import GlickoConfig, expected_score, glicko_pass, rating_periods
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark de Glicko-2 por lotes diarios frente a Elo: tiempos y LogLoss en los maestros")
+    p.add_argument("--csv-path", default="masters_csvs/matches.csv", help="Path to matches.csv")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Número de partidos sintéticos")
+    p.add_argument("--n-teams", type=int, default=200, help="Número de equipos sintéticos")
+    p.add_argument("--per-day", type=int, default=40, help="Partidos sintéticos por día (tamaño del lote)")
+    p.add_argument("--elo-k", type=float, nargs="+", default=[16.0, 32.0, 48.0], help="K de Elo a comparar")
+    p.add_argument("--rd", type=float, nargs="+", default=[100.0, 150.0, 200.0, 350.0], help="RD inicial de Glicko-2 a comparar")
+    p.add_argument("--tau", type=float, default=0.5, help="tau de Glicko-2")
+    p.add_argument("--test-size", type=float, default=0.2, help="Fracción final de partidos (como train_mvp)")
+    p.add_argument("--seed", type=int, default=0)
+    return p.parse_args()
+
+
+def log_loss(y: np.ndarray, p: np.ndarray) -> float:
+    p = np.clip(p, 1e-15, 1 - 1e-15)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+
+def _timeit(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def bench_speed(args: argparse.Namespace) -> None:
+    if HAS_NUMBA:
+        elo_pass(np.zeros(1, np.int64), np.zeros(1, np.int64), np.zeros(1), np.full(1, 1500.0))
+    print(f"numba disponible: {HAS_NUMBA} | {args.per_day} partidos por día")
+    print(f"{'n':>10} {'días':>8} {'elo (s)':>10} {'glicko2 (s)':>13} {'partidos/s glicko2':>20}")
+    for n in args.sizes:
+        df = synthetic_matches(n, args.n_teams, args.seed)
+        codes1, codes2, teams = encode_teams(df, "team1", "team2")
+        y = df["team1_win"].to_numpy(dtype=np.float64)
+        periods = np.arange(n) // args.per_day
+        t_elo = _timeit(lambda: elo_pass(codes1, codes2, y, np.full(len(teams), 1500.0)))
+        t_gl = _timeit(lambda: glicko_pass(codes1, codes2, y, periods, len(teams)))
+        print(f"{n:>10} {periods[-1] + 1:>8} {t_elo:>10.3f} {t_gl:>13.3f} {n / t_gl:>20,.0f}")
+
+
+def bench_log_loss(args: argparse.Namespace) -> None:
+    # Probabilidad directa del rating previo al partido (sin modelo encima)
+    df = load_matches(args.csv_path)
+    codes1, codes2, teams = encode_teams(df, "team1", "team2")
+    y = df["team1_win"].to_numpy(dtype=np.float64)
+    periods = rating_periods(df["parsed_date"])
+    n_test = int(max(1, round(len(df) * args.test_size)))
+    test = slice(len(df) - n_test, None)
+
+    rows = []
+    for k in args.elo_k:
+        r1, r2, _ = elo_pass(codes1, codes2, y, np.full(len(teams), 1500.0), elo_k=k)
+        rows.append((f"elo K={k:g}", 1.0 / (1.0 + 10 ** ((r2 - r1) / 400.0))))
+    for rd in args.rd:
+        r1, r2, rd1, rd2 = glicko_pass(codes1, codes2, y, periods, len(teams), GlickoConfig(rd=rd, tau=args.tau))
+        rows.append((f"glicko2 RD={rd:g}", expected_score(r1, rd1, r2, rd2)))
+
+    print(f"\n{os.path.basename(args.csv_path)}: {len(df)} partidos, {periods[-1] + 1} periodos (días), "
+          f"test = últimos {n_test}")
+    print(f"{'motor':<20}{'LogLoss total':>15}{'LogLoss test':>14}{'Brier test':>12}")
+    for name, p in rows:
+        brier = float(np.mean((p[test] - y[test]) ** 2))
+        print(f"{name:<20}{log_loss(y, p):>15.4f}{log_loss(y[test], p[test]):>14.4f}{brier:>12.4f}")
+
+
+def main():
+    args = parse_args()
+    bench_speed(args)
+    if os.path.exists(args.csv_path):
+        bench_log_loss(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import argparse
+import os
+
+import pandas as pd
+
+from mvp_model.utils.schema import SCHEMAS, normalize, normalize_report
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark de la normalización tipada de los maestros (utils/schema.py)")
+    p.add_argument("--masters-dir", default="masters_csvs", help="Carpeta de los CSV maestros")
+    p.add_argument("--repeat", type=int, default=10, help="Veces que se replica cada maestro")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(f"{'maestro':<32}{'filas':>9}{'filas/s':>13}{'object (MB)':>13}{'tipado (MB)':>13}{'ahorro':>8}")
+    raw_total = typed_total = 0
+    for base in SCHEMAS:
+        csv_path = os.path.join(args.masters_dir, f"{base}.csv")
+        if not os.path.exists(csv_path):
+            continue
+        raw = pd.read_csv(csv_path, low_memory=False)
+        normalize(raw.head(100), base)  # calentar regex e imports
+        big = pd.concat([raw] * args.repeat, ignore_index=True)
+        _, r = normalize_report(big, base)
+        raw_total += r["raw_bytes"]
+        typed_total += r["typed_bytes"]
+        print(f"{base:<32}{r['rows']:>9}{r['rows_per_s']:>13,.0f}{r['raw_bytes'] / 1e6:>13.2f}"
+              f"{r['typed_bytes'] / 1e6:>13.2f}{r['saved']:>8.0%}")
+    if raw_total:
+        print(f"{'total':<32}{'':>9}{'':>13}{raw_total / 1e6:>13.2f}{typed_total / 1e6:>13.2f}"
+              f"{1 - typed_total / raw_total:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import time
+
+import numpy as np
+
+from mvp_model.utils.map_elo import HAS_NUMBA, map_elo_pass
+from mvp_model.utils.series import VETO_FORMATS, series_win_prob, simulate_series, veto_paths
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark del simulador de series (todos los caminos de veto) y del Elo por mapa")
+    p.add_argument("--calls", type=int, default=2000, help="Llamadas a simulate_series por formato")
+    p.add_argument("--maps", type=int, default=1_000_000, help="Mapas sintéticos para la pasada de Elo por mapa")
+    p.add_argument("--n-teams", type=int, default=200, help="Número de equipos sintéticos")
+    p.add_argument("--n-map-pool", type=int, default=11, help="Número de mapas distintos")
+    p.add_argument("--numpy-max", type=int, default=200_000, help="Tamaño máximo para correr la versión sin numba (es lenta)")
+    p.add_argument("--seed", type=int, default=0)
+    return p.parse_args()
+
+
+def brute_force_minimax(p: np.ndarray, fmt: str, team1_first: bool) -> float:
+    """Recursión directa sobre el árbol de veto (referencia de exactitud)."""
+    steps = VETO_FORMATS[fmt]
+
+    def rec(remaining, s, picks):
+        if s == len(steps):
+            return float(series_win_prob(p[picks + [remaining[0]]]))
+        actor, action = steps[s]
+        vals = [
+            rec(remaining[:i] + remaining[i + 1:], s + 1, picks + ([m] if action == "pick" else []))
+            for i, m in enumerate(remaining)
+        ]
+        return max(vals) if (actor == "A") == team1_first else min(vals)
+
+    return rec(list(range(len(p))), 0, [])
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'formato':>8} {'caminos':>8} {'conjuntos':>10} {'p50 (µs)':>10} {'p99 (µs)':>10}  exacto")
+    for fmt in VETO_FORMATS:
+        paths, played_sets, _ = veto_paths(fmt)
+        p_check = rng.random(7)
+        exact = all(
+            abs(simulate_series(p_check, fmt, t1).minimax - brute_force_minimax(p_check, fmt, t1)) < 1e-12
+            for t1 in (True, False)
+        )
+        pools = rng.random((args.calls, 7))
+        times = np.empty(args.calls)
+        for i, p in enumerate(pools):
+            t0 = time.perf_counter()
+            simulate_series(p, fmt, team1_first=bool(i % 2))
+            times[i] = time.perf_counter() - t0
+        p50, p99 = np.percentile(times * 1e6, [50, 99])
+        print(f"{fmt:>8} {len(paths):>8} {len(played_sets):>10} {p50:>10.1f} {p99:>10.1f}  {'sí' if exact else 'NO'}")
+
+    # Pasada de Elo por mapa sobre la matriz densa equipos × mapas
+    t1 = rng.integers(0, args.n_teams, size=args.maps)
+    t2 = (t1 + rng.integers(1, args.n_teams, size=args.maps)) % args.n_teams
+    m = rng.integers(0, args.n_map_pool, size=args.maps)
+    y = rng.integers(0, 2, size=args.maps).astype(np.float64)
+
+    def run(use_jit: bool):
+        R = np.full((args.n_teams, args.n_map_pool), 1500.0)
+        G = np.zeros(args.n_teams)
+        t0 = time.perf_counter()
+        before = map_elo_pass(t1, t2, m, y, R, G, 32.0, 0.25, use_jit=use_jit)
+        return time.perf_counter() - t0, before, R
+
+    print(f"\nnumba disponible: {HAS_NUMBA}")
+    ref = run(False) if args.maps <= args.numpy_max else None
+    t_py = ref[0] if ref else float("nan")
+    if not HAS_NUMBA:
+        print(f"Elo por mapa, {args.maps} mapas: numpy {t_py:.3f}s")
+        return
+    # Calentar el JIT para no medir la compilación
+    map_elo_pass(t1[:1], t2[:1], m[:1], y[:1], np.full((args.n_teams, args.n_map_pool), 1500.0),
+                 np.zeros(args.n_teams), 32.0, 0.25, use_jit=True)
+    t_jit, before, R = run(True)
+    exact = "-" if ref is None else ("sí" if np.array_equal(ref[2], R) and np.array_equal(ref[1][0], before[0]) else "NO")
+    print(f"Elo por mapa, {args.maps} mapas: numpy {t_py:.3f}s | numba {t_jit:.4f}s "
+          f"({args.maps / t_jit / 1e6:.1f} M mapas/s) | exacto: {exact}")
+
+
+if __name__ == "__main__":
+    main()
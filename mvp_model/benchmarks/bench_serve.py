@@ -0,0 +1,104 @@
+import argparse
+import http.client
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from typing import List
+
+import numpy as np
+
+from mvp_model.serve import make_server
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark del servicio de predicción: latencia p50/p99 y throughput con clientes concurrentes")
+    p.add_argument("--model", default="mvp_model/artifacts/model.pkl")
+    p.add_argument("--elo-state", default="mvp_model/artifacts/elo_state.json")
+    p.add_argument("--url", default=None, help="host:port de un servidor ya levantado (por defecto se levanta uno en este proceso)")
+    p.add_argument("--clients", type=int, default=4, help="Clientes concurrentes (una conexión keep-alive cada uno)")
+    p.add_argument("--requests", type=int, default=500, help="Peticiones por cliente")
+    p.add_argument("--batch", type=int, default=8, help="Partidos por petición /predict")
+    p.add_argument("--compare-cli", action="store_true", help="Medir también una ejecución en frío de predict_mvp")
+    p.add_argument("--seed", type=int, default=0)
+    return p.parse_args()
+
+
+def _client(host: str, port: int, bodies: List[bytes], latencies: List[float]) -> None:
+    conn = http.client.HTTPConnection(host, port)
+    headers = {"Content-Type": "application/json"}
+    for body in bodies:
+        t0 = time.perf_counter()
+        conn.request("POST", "/predict", body=body, headers=headers)
+        resp = conn.getresponse()
+        resp.read()
+        latencies.append(time.perf_counter() - t0)
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status}")
+    conn.close()
+
+
+def main():
+    args = parse_args()
+    server = None
+    if args.url:
+        host, port = args.url.rsplit(":", 1)
+        port = int(port)
+    else:
+        server = make_server(args.model, args.elo_state, port=0, persist=False)
+        host, port = server.server_address[:2]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with open(args.elo_state, "r", encoding="utf-8") as f:
+        teams = sorted(json.load(f)["ratings"])
+    rng = random.Random(args.seed)
+
+    def body() -> bytes:
+        pairs = [rng.sample(teams, 2) for _ in range(args.batch)]
+        return json.dumps({"matches": [{"team1": a, "team2": b} for a, b in pairs]}).encode("utf-8")
+
+    per_client = [[body() for _ in range(args.requests)] for _ in range(args.clients)]
+    latencies: List[List[float]] = [[] for _ in range(args.clients)]
+    threads = [
+        threading.Thread(target=_client, args=(host, port, per_client[i], latencies[i])) for i in range(args.clients)
+    ]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    ms = np.concatenate([np.array(lat) for lat in latencies]) * 1000.0
+    n_req = len(ms)
+    print(f"{args.clients} clientes x {args.requests} peticiones, lote de {args.batch} partidos")
+    print(f"Latencia cliente: p50 {np.percentile(ms, 50):.2f} ms | p99 {np.percentile(ms, 99):.2f} ms | max {ms.max():.2f} ms")
+    print(f"Throughput: {n_req / wall:,.0f} peticiones/s | {n_req * args.batch / wall:,.0f} partidos/s")
+
+    conn = http.client.HTTPConnection(host, port)
+    conn.request("GET", "/metrics")
+    server_metrics = json.loads(conn.getresponse().read())
+    conn.close()
+    pred = server_metrics["endpoints"].get("/predict", {})
+    if pred:
+        lat = pred["latency_ms"]
+        print(f"Latencia servidor (/metrics): p50 {lat['p50']:.2f} ms | p99 {lat['p99']:.2f} ms")
+
+    if args.compare_cli:
+        t0 = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "mvp_model.predict_mvp", "--model", args.model, "--csv", "masters_csvs/matches.csv",
+             "--no-cache", "--out", "mvp_model/artifacts/_bench_cli_preds.csv"],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        print(f"predict_mvp en frío (imports + joblib.load + Elo completo): {time.perf_counter() - t0:.2f} s por llamada")
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# Presupuesto de importación en frío (ms) por CLI, medido con `-X importtime`
+# sobre `python -m mvp_model.<cli> --help`. Aproximadamente el doble de lo
+# medido tras diferir las importaciones pesadas; escalar con --budget-scale en
+# máquinas más lentas.
+BUDGETS_MS: Dict[str, float] = {
+    "train_mvp": 150.0,
+    "predict_mvp": 150.0,
+    "print_test_tail": 120.0,
+    "print_test_all": 120.0,
+    "plot_test_predictions": 120.0,
+    "compare_models": 120.0,
+    "map_model": 120.0,
+    "simulate_bracket": 120.0,
+    "sweep": 200.0,
+    "backtest": 200.0,
+    "serve": 250.0,
+}
+
+# Paquetes que ningún CLI debe importar solo para arrancar (`--help`)
+HEAVY_PACKAGES = ("numpy", "pandas", "sklearn", "scipy", "joblib", "xgboost", "matplotlib", "numba", "pyarrow")
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark de arranque de los CLIs de mvp_model (-X importtime) con presupuesto")
+    p.add_argument("--clis", nargs="+", default=list(BUDGETS_MS), help="CLIs a medir (módulos de mvp_model)")
+    p.add_argument("--repeat", type=int, default=3, help="Repeticiones por CLI (se toma el mínimo)")
+    p.add_argument("--budget-scale", type=float, default=1.0, help="Multiplicador de los presupuestos")
+    p.add_argument("--top", type=int, default=5, help="Importaciones más costosas a mostrar si un CLI falla")
+    return p.parse_args()
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    """Líneas `import time: self | cumulative | name` -> (self_us, cum_us, name con sangría)."""
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # cabecera
+        out.append((int(parts[0]), int(parts[1]), parts[2].rstrip()))
+    return out
+
+
+def measure(cli: str) -> Tuple[float, float, List[Tuple[int, str]], List[str]]:
+    """(import_ms, wall_ms, importaciones de primer nivel, paquetes pesados cargados)."""
+    cmd = [sys.executable, "-X", "importtime", "-m", f"mvp_model.{cli}", "--help"]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - t0) * 1000.0
+    if proc.returncode != 0:
+        raise RuntimeError(f"{cli} --help falló:\n{proc.stderr[-2000:]}")
+    entries = parse_importtime(proc.stderr)
+    # Primer nivel = sin sangría extra tras el separador; su acumulado ya incluye a los hijos
+    top = [(cum, name.strip()) for _, cum, name in entries if not name.startswith("  ")]
+    heavy = sorted({
+        name.strip().split(".")[0] for _, _, name in entries if name.strip().split(".")[0] in HEAVY_PACKAGES
+    })
+    return sum(c for c, _ in top) / 1000.0, wall_ms, top, heavy
+
+
+def main():
+    args = parse_args()
+    failures = []
+    print(f"{'cli':<24}{'import ms':>10}{'wall ms':>10}{'budget':>9}  estado")
+    for cli in args.clis:
+        runs = [measure(cli) for _ in range(max(1, args.repeat))]
+        import_ms, wall_ms, top, heavy = min(runs, key=lambda r: r[0])
+        budget = BUDGETS_MS.get(cli, 150.0) * args.budget_scale
+        problems = []
+        if import_ms > budget:
+            problems.append(f"supera el presupuesto ({import_ms:.0f} > {budget:.0f} ms)")
+        if heavy:
+            problems.append("importa " + ", ".join(heavy) + " al arrancar")
+        status = "OK" if not problems else "FALLA: " + "; ".join(problems)
+        print(f"{cli:<24}{import_ms:>10.1f}{min(r[1] for r in runs):>10.1f}{budget:>9.0f}  {status}")
+        if problems:
+            failures.append(cli)
+            for cum, name in sorted(top, reverse=True)[: args.top]:
+                print(f"{'':<8}{cum / 1000.0:>8.1f} ms  {name}")
+    if failures:
+        print(f"\nRegresión de arranque en: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nTodos los CLIs dentro del presupuesto.")
+
+
+if __name__ == "__main__":
+    main()
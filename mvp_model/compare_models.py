@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import time
+from typing import List
+
+from mvp_model.plot_test_predictions import compute_test_slice
+from mvp_model.utils.cli import add_bootstrap_args, add_cache_args, add_feature_set_arg, add_rating_engine_arg, boot_jobs
+from mvp_model.utils.metrics import discrete_metrics, probability_metrics
+
+METRIC_COLUMNS = [
+    "model", "path", "log_loss", "roc_auc", "brier", "n_test",
+    "threshold", "tp", "tn", "fp", "fn", "accuracy", "precision", "recall", "f1",
+    "scoring", "load_seconds", "score_seconds",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Score N model artifacts on the same test block (features built once) and compare them")
+    p.add_argument("--models", nargs="+", required=True, help="Model artifacts: .pkl (joblib Pipeline) or .json (train_mvp export)")
+    p.add_argument("--names", nargs="+", default=None, help="Display names, one per model (default: file names)")
+    p.add_argument("--csv-path", default="masters_csvs/matches.csv", help="Path to matches.csv")
+    p.add_argument("--test-size", type=float, default=0.2, help="Fraction of tail for test (time split)")
+    p.add_argument("--threshold", type=float, default=0.5, help="Threshold for discrete metrics (confusion matrix)")
+    p.add_argument("--elo-k", type=float, default=32.0, help="Elo K-factor (must match training)")
+    p.add_argument("--elo-base", type=float, default=1500.0, help="Elo base rating (must match training)")
+    p.add_argument("--out-preds", default="mvp_model/artifacts/compare_preds.csv", help="Combined predictions CSV (one p_<model> column per model)")
+    p.add_argument("--out-metrics", default="mvp_model/artifacts/compare_metrics.csv", help="Metrics table CSV (one row per model)")
+    p.add_argument("--out-significance", default="mvp_model/artifacts/compare_significance.json",
+                   help="Bootstrap CIs per model and paired differences vs the first model (JSON)")
+    add_feature_set_arg(p)
+    add_rating_engine_arg(p)
+    add_bootstrap_args(p)
+    add_cache_args(p)
+    return p.parse_args()
+
+
+def model_names(paths: List[str], names: List[str] | None) -> List[str]:
+    if names is not None:
+        if len(names) != len(paths):
+            raise SystemExit("--names debe tener un nombre por modelo")
+        out = list(names)
+    else:
+        out = [os.path.basename(p) for p in paths]
+    if len(set(out)) != len(out):
+        # Mismo nombre de archivo en carpetas distintas: se numeran
+        out = [f"{n}#{i}" for i, n in enumerate(out)]
+    return out
+
+
+def load_model(path: str, feature_names: List[str]):
+    """(modelo, scorer lineal o None). Los lineales se puntúan en lote."""
+    from mvp_model.utils.scoring import LogisticScorer
+
+    if path.lower().endswith(".json"):
+        scorer = LogisticScorer.load(path)
+        return scorer, scorer
+    import joblib
+
+    model = joblib.load(path)
+    cols = list(getattr(model, "feature_names_in_", feature_names))
+    try:
+        return model, LogisticScorer.from_pipeline(model, cols)
+    except ValueError:
+        return model, None
+
+
+def main():
+    args = parse_args()
+    names = model_names(args.models, args.names)
+
+    import numpy as np
+    import pandas as pd
+
+    from mvp_model.utils.features import load_features
+    from mvp_model.utils.scoring import predict_proba_batch
+
+    t0 = time.perf_counter()
+    df, X, info = load_features(
+        args.csv_path, args.elo_k, args.elo_base, args.feature_set,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        engine=args.rating_engine,
+    )
+    idx = compute_test_slice(len(df), args.test_size, None)
+    df_test, X_test = df.iloc[idx], X.iloc[idx]
+    y_test = df_test["team1_win"].astype(int).to_numpy()
+    features_s = time.perf_counter() - t0
+
+    if any(not p.lower().endswith(".json") for p in args.models):
+        # Importar joblib/sklearn fuera del cronómetro: si no, el primer .pkl
+        # cargaría con todo el coste de importación
+        for mod in ("joblib", "sklearn.linear_model", "sklearn.pipeline"):
+            importlib.import_module(mod)
+
+    models, timing, scoring = {}, {}, {}
+    for name, path in zip(names, args.models):
+        t0 = time.perf_counter()
+        models[name] = load_model(path, info["feature_names"])
+        timing[name] = {"load_seconds": time.perf_counter() - t0}
+
+    # Lineales con las mismas columnas: un solo matmul apilado por grupo; el
+    # tiempo del lote se reparte a partes iguales entre sus modelos
+    proba = {}
+    groups = {}
+    for name, (_, scorer) in models.items():
+        if scorer is not None:
+            groups.setdefault(tuple(scorer.feature_names), []).append(name)
+    for cols, group in groups.items():
+        missing = [c for c in cols if c not in X_test.columns]
+        if missing:
+            raise SystemExit(f"Features no disponibles para {', '.join(group)}: {missing}")
+        t0 = time.perf_counter()
+        P = predict_proba_batch([models[n][1] for n in group], X_test[list(cols)])
+        share = (time.perf_counter() - t0) / len(group)
+        for name, p in zip(group, P):
+            proba[name] = p
+            timing[name]["score_seconds"] = share
+            scoring[name] = f"lote lineal ({len(group)})"
+    for name, (model, scorer) in models.items():
+        if scorer is not None:
+            continue
+        cols = list(getattr(model, "feature_names_in_", info["feature_names"]))
+        t0 = time.perf_counter()
+        proba[name] = model.predict_proba(X_test[cols])[:, 1]
+        timing[name]["score_seconds"] = time.perf_counter() - t0
+        scoring[name] = "individual"
+
+    rows = []
+    for name, path in zip(names, args.models):
+        rows.append({
+            "model": name,
+            "path": path,
+            **probability_metrics(y_test, proba[name]),
+            **discrete_metrics(y_test, proba[name], args.threshold),
+            "scoring": scoring[name],
+            **timing[name],
+        })
+    metrics_df = pd.DataFrame(rows, columns=METRIC_COLUMNS)
+
+    base_cols = [c for c in ("parsed_date", "match_id", "team1", "team2") if c in df_test.columns]
+    preds_df = df_test[base_cols].reset_index(drop=True)
+    for name in names:
+        preds_df[f"p_{name}"] = proba[name]
+    preds_df["team1_win"] = y_test
+    if len(names) > 1:
+        # Dispersión entre modelos por partido (desacuerdo)
+        preds_df["p_spread"] = np.ptp(np.stack([proba[n] for n in names]), axis=0)
+
+    for path, frame in ((args.out_preds, preds_df), (args.out_metrics, metrics_df)):
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        frame.to_csv(path, index=False)
+
+    if args.n_boot > 0:
+        from mvp_model.utils.bootstrap import bootstrap_report
+
+        # Mismas remuestras para todos: diferencias pareadas frente al primer modelo
+        report = bootstrap_report(y_test, {n: proba[n] for n in names}, baseline=names[0] if len(names) > 1 else None,
+                                  n_boot=args.n_boot, seed=args.boot_seed, jobs=boot_jobs(args))
+        out_dir = os.path.dirname(args.out_significance)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with open(args.out_significance, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(metrics_df.drop(columns=["path"]).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"Test: {len(y_test)} partidos | features (una vez): {features_s:.3f}s")
+    print("Tiempos por modelo:", json.dumps(
+        {n: {k: round(v * 1000, 3) for k, v in t.items()} for n, t in timing.items()}, indent=2
+    ), "(ms)")
+    if args.n_boot > 0 and len(names) > 1:
+        for name, row in report["paired"].items():
+            ll = row["log_loss"]
+            print(f"{name} - {names[0]}: LogLoss {ll['diff']:+.4f} [{ll['lo']:+.4f}, {ll['hi']:+.4f}] "
+                  f"p_bootstrap={ll['p_bootstrap']:.3f} p_permutación={ll['p_permutation']:.3f}")
+    print(f"Predicciones: {args.out_preds}\nMétricas: {args.out_metrics}")
+    if args.n_boot > 0:
+        print(f"IC y significancia ({args.n_boot} remuestras): {args.out_significance}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import TYPE_CHECKING, Dict, List
+
+from mvp_model.plot_test_predictions import compute_test_slice
+from mvp_model.utils.metrics import probability_metrics
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+# numpy/pandas (y numba, vía utils.map_elo) se importan dentro de las
+# funciones: `--help` arranca al instante
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Per-(team, map) Elo and series win probability under the pick/ban veto")
+    p.add_argument("--csv-path", default="masters_csvs/matches.csv", help="Path to matches.csv")
+    p.add_argument("--maps-csv", default="masters_csvs/detailed_matches_maps.csv", help="Path to detailed_matches_maps.csv")
+    p.add_argument("--overview-csv", default="masters_csvs/detailed_matches_overview.csv", help="Path to detailed_matches_overview.csv (format, pick_ban_info)")
+    p.add_argument("--k", type=float, default=32.0, help="Map Elo K-factor")
+    p.add_argument("--base", type=float, default=1500.0, help="Map Elo base rating")
+    p.add_argument("--share", type=float, default=0.25, help="Fraction of every update applied to all maps of the team (shared strength)")
+    p.add_argument("--elo-k", type=float, default=32.0, help="Series Elo K-factor (baseline)")
+    p.add_argument("--elo-base", type=float, default=1500.0, help="Series Elo base rating (baseline)")
+    p.add_argument("--test-size", type=float, default=0.2, help="Fraction of tail for test (time split)")
+    p.add_argument("--out-ratings", default="mvp_model/artifacts/map_ratings.json", help="Map ratings after all matches (read by prediction mode)")
+    p.add_argument("--metrics-out", default="mvp_model/artifacts/map_metrics.json", help="Map- and series-level test metrics")
+    p.add_argument("--out-preds", default="mvp_model/artifacts/map_series_preds.csv", help="Per-match series predictions on the test block")
+    # Modo predicción: usa --out-ratings sin reentrenar
+    p.add_argument("--team1", default=None, help="Prediction mode: team1 name (uses the ratings in --out-ratings)")
+    p.add_argument("--team2", default=None, help="Prediction mode: team2 name")
+    p.add_argument("--format", default="Bo3", choices=["Bo1", "Bo3", "Bo5"], help="Prediction mode: series format")
+    p.add_argument("--pool", nargs=7, default=None, metavar="MAP", help="Prediction mode: the 7-map pool (default: pool of the latest match)")
+    p.add_argument("--team2-first", action="store_true", help="Prediction mode: team2 starts the veto")
+    return p.parse_args()
+
+
+def load_vetoes(overview_csv: str, maps: pd.DataFrame) -> pd.DataFrame:
+    """
+    Veto por partido: formato, pool (7 mapas), mapas jugados según el veto
+    (picks + decider) y si team1 empezó el veto (None si no se sabe).
+    """
+    import pandas as pd
+
+    from mvp_model.utils.map_elo import OVERVIEW_COLUMNS
+    from mvp_model.utils.masters import read_master
+    from mvp_model.utils.series import POOL_SIZE, parse_pick_ban, team1_vetoes_first
+
+    ov = read_master(overview_csv, columns=OVERVIEW_COLUMNS).drop_duplicates("match_id")
+    # Quién eligió cada mapa y los equipos del partido, por ID del registro
+    teams = maps.drop_duplicates("match_id").set_index("match_id")[["team1_id", "team2_id"]]
+    picked = {mid: dict(zip(g["map_name"], g["picked_by_id"])) for mid, g in maps.groupby("match_id", sort=False)}
+    rows = []
+    for mid, fmt, info in ov[["match_id", "format", "pick_ban_info"]].itertuples(index=False):
+        if mid not in teams.index:
+            continue
+        steps, decider = parse_pick_ban(info)
+        pool = [m for _, _, m in steps] + ([decider] if decider else [])
+        if len(steps) != 6 or decider is None or len(set(pool)) != POOL_SIZE:
+            continue
+        team1, team2 = teams.loc[mid]
+        rows.append({
+            "match_id": mid,
+            "format": fmt,
+            "pool": pool,
+            "played": [m for _, action, m in steps if action == "pick"] + [decider],
+            "team1_first": team1_vetoes_first(steps, picked.get(mid, {}), team1, team2),
+        })
+    return pd.DataFrame(rows, columns=["match_id", "format", "pool", "played", "team1_first"])
+
+
+def series_probs(model, team1: str, team2: str, veto: dict) -> Dict[str, float]:
+    """Tres lecturas de P(team1 gana la serie) con los ratings previos al partido."""
+    from mvp_model.utils.series import series_win_prob, simulate_series
+
+    p_pool = model.map_probs(team1, team2, veto["pool"])
+    by_map = dict(zip(veto["pool"], p_pool))
+    known = float(series_win_prob([by_map[m] for m in veto["played"]]))
+    first = veto["team1_first"]
+    # Sin saber quién empieza el veto: media de ambos órdenes
+    orders = [first] if first is not None else [True, False]
+    odds = [simulate_series(p_pool, veto["format"], t1) for t1 in orders]
+    return {
+        "p_known_veto": known,
+        "p_minimax": sum(o.minimax for o in odds) / len(odds),
+        "p_uniform": odds[0].uniform,
+    }
+
+
+def evaluate(args: argparse.Namespace) -> dict:
+    import numpy as np
+    import pandas as pd
+
+    from mvp_model.utils.elo import build_elo_features
+    from mvp_model.utils.features import load_matches
+    from mvp_model.utils.map_elo import MapElo, MapEloConfig, load_map_results
+
+    matches = load_matches(args.csv_path)
+    maps = load_map_results(matches, args.maps_csv)
+    vetoes = load_vetoes(args.overview_csv, maps).set_index("match_id")
+
+    # Baseline: Elo de serie (matches.csv) como probabilidad de cada mapa y de la serie
+    elo = build_elo_features(matches, "team1", "team2", "team1_win", args.elo_k, args.elo_base)
+    p_series_elo = 1.0 / (1.0 + 10 ** (-elo["elo_diff"].to_numpy() / 400.0))
+
+    idx = compute_test_slice(len(matches), args.test_size, None)
+    test_start = idx.start
+    is_test_map = maps["match_pos"].to_numpy() >= test_start
+
+    model = MapElo(MapEloConfig(base=args.base, k=args.k, share=args.share))
+    # Bloque de entrenamiento: una sola pasada sobre todos sus mapas
+    train_maps = maps[~is_test_map]
+    t0 = time.perf_counter()
+    model.update(train_maps["team1"], train_maps["team2"], train_maps["map_name"], train_maps["team1_win"].to_numpy(dtype=float))
+    train_s = time.perf_counter() - t0
+
+    # Test: partido a partido, series con los ratings previos y después los mapas
+    test_maps = maps[is_test_map]
+    maps_by_match = {mid: g for mid, g in test_maps.groupby("match_id", sort=False)}
+    map_rows: List[pd.DataFrame] = []
+    series_rows = []
+    sim_s: List[float] = []
+    for pos in range(test_start, len(matches)):
+        row = matches.iloc[pos]
+        mid, team1, team2 = row["match_id"], row["team1"], row["team2"]
+        rec = {
+            "match_id": mid,
+            "team1": team1,
+            "team2": team2,
+            "p_series_elo": float(p_series_elo[pos]),
+            "team1_win": int(row["team1_win"]),
+        }
+        if mid in vetoes.index:
+            veto = vetoes.loc[mid]
+            t0 = time.perf_counter()
+            rec.update(series_probs(model, team1, team2, veto))
+            sim_s.append(time.perf_counter() - t0)
+            rec["format"] = veto["format"]
+        series_rows.append(rec)
+        g = maps_by_match.get(mid)
+        if g is not None:
+            r1, r2 = model.update(g["team1"], g["team2"], g["map_name"], g["team1_win"].to_numpy(dtype=float))
+            map_rows.append(pd.DataFrame({
+                "p_map_elo": 1.0 / (1.0 + 10 ** ((r2 - r1) / 400.0)),
+                "p_series_elo": float(p_series_elo[pos]),
+                "team1_win": g["team1_win"].to_numpy(),
+            }))
+
+    maps_df = pd.concat(map_rows, ignore_index=True)
+    series_df = pd.DataFrame(series_rows)
+    with_veto = series_df.dropna(subset=["p_known_veto"])
+    y_maps = maps_df["team1_win"].to_numpy()
+    y_series = with_veto["team1_win"].to_numpy()
+    metrics = {
+        "config": {"k": args.k, "base": args.base, "share": args.share, "elo_k": args.elo_k, "elo_base": args.elo_base},
+        "n_train_matches": int(test_start),
+        "n_train_maps": int(len(train_maps)),
+        "maps": {
+            "map_elo": probability_metrics(y_maps, maps_df["p_map_elo"].to_numpy()),
+            "series_elo": probability_metrics(y_maps, maps_df["p_series_elo"].to_numpy()),
+        },
+        # Solo partidos de test con veto completo, para comparar sobre las mismas filas
+        "series": {
+            name: probability_metrics(y_series, with_veto[col].to_numpy())
+            for name, col in (
+                ("known_veto", "p_known_veto"),
+                ("minimax", "p_minimax"),
+                ("uniform", "p_uniform"),
+                ("series_elo", "p_series_elo"),
+            )
+        },
+        "timing": {
+            "train_pass_seconds": train_s,
+            # Mediana: la primera llamada por formato construye la tabla de caminos
+            "series_eval_us_p50": float(np.median(sim_s)) * 1e6 if sim_s else None,
+        },
+    }
+
+    # Estado final con todos los partidos, para el modo predicción
+    if len(vetoes):
+        model.pool = list(vetoes["pool"].iloc[-1])
+    model.save(args.out_ratings)
+    for path in (args.metrics_out, args.out_preds):
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+    with open(args.metrics_out, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, indent=2)
+    series_df.to_csv(args.out_preds, index=False)
+    return metrics
+
+
+def predict(args: argparse.Namespace) -> None:
+    from mvp_model.utils.map_elo import MapElo
+    from mvp_model.utils.masters import registry_index, resolve
+    from mvp_model.utils.series import simulate_series, veto_paths
+
+    if not args.team2:
+        raise SystemExit("--team2 es obligatorio con --team1")
+    if not os.path.exists(args.out_ratings):
+        raise SystemExit(f"No existe {args.out_ratings}: ejecuta primero sin --team1 para generar los ratings")
+    model = MapElo.load(args.out_ratings)
+    pool = list(args.pool) if args.pool else model.pool
+    if len(pool) != 7:
+        raise SystemExit("No hay pool guardado en los ratings: indica los 7 mapas con --pool")
+    # Los ratings guardan los nombres de matches.csv: cualquier alias del
+    # registro (abreviatura, nombre con patrocinador) lleva al mismo equipo
+    index = registry_index(os.path.dirname(args.csv_path) or ".")
+    by_id = {i: t for t in model.teams if (i := resolve(t, "team", index)) >= 0}
+    team1, team2 = (by_id.get(resolve(t, "team", index), t.strip()) for t in (args.team1, args.team2))
+    for t in (team1, team2):
+        if t not in model.teams:
+            print(f"Aviso: {t} no tiene historial de mapas; se usa el rating base")
+    p_pool = model.map_probs(team1, team2, pool)
+    veto_paths(args.format)  # tabla de caminos fuera del cronómetro
+    t0 = time.perf_counter()
+    odds = simulate_series(p_pool, args.format, team1_first=not args.team2_first, pool=pool)
+    sim_us = (time.perf_counter() - t0) * 1e6
+
+    print(f"{team1} vs {team2} ({args.format}, veto empieza {'team2' if args.team2_first else 'team1'})")
+    for m, p in sorted(zip(pool, p_pool), key=lambda t: -t[1]):
+        print(f"  {m:<10} P(team1)={p:.3f}")
+    print(f"Serie (veto óptimo / minimax): {odds.minimax:.4f}")
+    print(f"Serie (veto al azar):          {odds.uniform:.4f}")
+    print(f"Rango sobre caminos de veto:   {odds.path_probs.min():.4f} - {odds.path_probs.max():.4f} ({len(odds.path_probs)} caminos, {sim_us:.0f} µs)")
+    print("Camino óptimo:", "; ".join(f"{t} {a} {m}" for t, a, m in odds.minimax_path))
+
+
+def main():
+    args = parse_args()
+    if args.team1:
+        predict(args)
+        return
+    metrics = evaluate(args)
+    print(json.dumps({k: metrics[k] for k in ("maps", "series")}, indent=2))
+    print(f"Pasada de entrenamiento: {metrics['timing']['train_pass_seconds'] * 1000:.2f} ms | "
+          f"simulación de serie: {metrics['timing']['series_eval_us_p50']:.0f} µs/partido (p50)")
+    print(f"Ratings: {args.out_ratings}\nMétricas: {args.metrics_out}\nPredicciones: {args.out_preds}")
+
+
+if __name__ == "__main__":
+    main()
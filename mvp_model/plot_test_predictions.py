@@ -1,18 +1,13 @@
 import argparse
 import os
 import json
-from typing import Optional
+from typing import List, Optional
 
-import joblib
-import numpy as np
-import pandas as pd
-from sklearn.metrics import log_loss, roc_auc_score, brier_score_loss
-from sklearn.calibration import calibration_curve
+from mvp_model.utils.cli import add_bootstrap_args, add_cache_args, add_feature_set_arg, add_rating_engine_arg, boot_jobs
+from mvp_model.utils.metrics import discrete_metrics, probability_metrics
 
-from mvp_model.utils.elo import build_elo_features
 
-
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Plot test predictions vs actuals and calibration curve")
     p.add_argument("--csv-path", default="masters_csvs/matches.csv", help="Path to matches.csv")
     p.add_argument("--model", default="mvp_model/artifacts/model.pkl", help="Path to trained model .pkl")
@@ -25,32 +20,11 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--style", default="seaborn-v0_8", help="Matplotlib style to use")
     p.add_argument("--dpi", type=int, default=140, help="Figure DPI for saved images")
     p.add_argument("--threshold", type=float, default=0.5, help="Threshold for discrete metrics (confusion matrix)")
-    return p.parse_args()
-
-
-def load_and_prepare(csv_path: str) -> pd.DataFrame:
-    df = pd.read_csv(csv_path)
-    # Filter only completed matches for proper labels
-    if "status" in df.columns:
-        df = df[df["status"].astype(str).str.lower() == "completed"].copy()
-    if "date" in df.columns:
-        df["parsed_date"] = pd.to_datetime(df["date"], errors="coerce")
-    else:
-        df["parsed_date"] = pd.NaT
-    # Clean strings and build label
-    for c in ["team1", "team2", "winner"]:
-        if c in df.columns:
-            df[c] = df[c].astype(str).str.strip()
-    if "winner" in df.columns and "team1" in df.columns:
-        df["team1_win"] = (df["winner"] == df["team1"]).astype(int)
-    else:
-        raise ValueError("CSV must contain columns: team1, winner")
-
-    if "match_id" in df.columns:
-        df = df.sort_values(["parsed_date", "match_id"], kind="stable").reset_index(drop=True)
-    else:
-        df = df.sort_values(["parsed_date"], kind="stable").reset_index(drop=True)
-    return df
+    add_feature_set_arg(p)
+    add_rating_engine_arg(p)
+    add_bootstrap_args(p)
+    add_cache_args(p)
+    return p.parse_args(argv)
 
 
 def compute_test_slice(n: int, test_size: float, last_n: Optional[int]) -> slice:
@@ -61,19 +35,16 @@ def compute_test_slice(n: int, test_size: float, last_n: Optional[int]) -> slice
     return slice(start, n)
 
 
-def main():
-    args = parse_args()
-
+def plot_test(args: argparse.Namespace, df, X, model) -> dict:
+    """Plots and test metrics from features and model already in memory."""
     # Lazy import matplotlib to avoid hard dependency at import time
     import matplotlib
     matplotlib.use("Agg")  # non-interactive backend
     import matplotlib.pyplot as plt
 
-    df = load_and_prepare(args.csv_path)
-    feats = build_elo_features(
-        df, team1_col="team1", team2_col="team2", label_col="team1_win", elo_k=args.elo_k, elo_base=args.elo_base
-    )
-    X = feats[["elo1_before", "elo2_before", "elo_diff"]]
+    # Same for the rest of the heavy imports (`--help` stays cheap)
+    import numpy as np
+    from sklearn.calibration import calibration_curve
 
     last_n = None if args.all_test else args.last_n
     idx = compute_test_slice(len(df), args.test_size, last_n)
@@ -81,38 +52,17 @@ def main():
     X_test = X.iloc[idx]
     y_test = df_test["team1_win"].astype(int).values
 
-    model = joblib.load(args.model)
     proba = model.predict_proba(X_test)[:, 1]
 
-    # Metrics summary (probabilistic)
-    metrics = {
-        "log_loss": float(log_loss(y_test, proba)),
-        "roc_auc": float(roc_auc_score(y_test, proba)) if len(np.unique(y_test)) > 1 else None,
-        "brier": float(brier_score_loss(y_test, proba)),
-        "n_test": int(len(y_test)),
-    }
-
-    # Discrete metrics at threshold
-    pred = (proba >= args.threshold).astype(int)
-    tp = int(((pred == 1) & (y_test == 1)).sum())
-    tn = int(((pred == 0) & (y_test == 0)).sum())
-    fp = int(((pred == 1) & (y_test == 0)).sum())
-    fn = int(((pred == 0) & (y_test == 1)).sum())
-    acc = (tp + tn) / max(1, len(y_test))
-    prec = tp / max(1, (tp + fp))
-    rec = tp / max(1, (tp + fn))
-    f1 = (2 * prec * rec / (prec + rec)) if (prec + rec) > 0 else 0.0
-    metrics["discrete"] = {
-        "threshold": args.threshold,
-        "tp": tp,
-        "tn": tn,
-        "fp": fp,
-        "fn": fn,
-        "accuracy": float(acc),
-        "precision": float(prec),
-        "recall": float(rec),
-        "f1": float(f1),
-    }
+    # Metrics summary (probabilistic) + discrete metrics at threshold
+    metrics = probability_metrics(y_test, proba)
+    metrics["discrete"] = discrete_metrics(y_test, proba, args.threshold)
+    if args.n_boot > 0:
+        from mvp_model.utils.bootstrap import model_vs_elo
+
+        metrics["bootstrap"] = model_vs_elo(
+            y_test, proba, X_test["elo_diff"].to_numpy(), args.n_boot, args.boot_seed, boot_jobs(args),
+        )
 
     os.makedirs(args.out_dir, exist_ok=True)
 
@@ -155,7 +105,28 @@ def main():
     print("Plots guardados:")
     print(" - ", out_ts)
     print(" - ", out_cal)
-    print("Métricas (test):", json.dumps(metrics, indent=2))
+    print("Métricas (test):", json.dumps({k: v for k, v in metrics.items() if k != "bootstrap"}, indent=2))
+    if "bootstrap" in metrics:
+        from mvp_model.utils.bootstrap import summary_lines
+
+        print(f"IC {1 - metrics['bootstrap']['alpha']:.0%} y diferencia frente al Elo directo:")
+        print("\n".join(summary_lines(metrics["bootstrap"])))
+    return metrics
+
+
+def main():
+    args = parse_args()
+
+    import joblib
+
+    from mvp_model.utils.features import load_features
+
+    df, X, _ = load_features(
+        args.csv_path, args.elo_k, args.elo_base, args.feature_set,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        engine=args.rating_engine,
+    )
+    plot_test(args, df, X, joblib.load(args.model))
 
 
 if __name__ == "__main__":
@@ -1,59 +1,268 @@
+from __future__ import annotations
+
 import argparse
-import json
+import csv
 import os
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import joblib
-import numpy as np
-import pandas as pd
+from mvp_model.utils.cli import add_cache_args, add_feature_set_arg, add_rating_engine_arg
+from mvp_model.utils.elo_core import EloState, team1_won
+from scripts.entity_registry import alias_index, ids_sibling, load_registry, resolve
+from scripts.match_index import parse_datetime
 
-from mvp_model.utils.elo import build_elo_features
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
 
+# pandas/sklearn/joblib se importan solo en la ruta completa (.pkl). Con un
+# modelo exportado a JSON (train_mvp --model-json-out) la predicción usa solo
+# csv + NumPy y arranca en milisegundos, con las mismas probabilidades. Esa
+# ruta solo calcula Elo: los demás sets (--feature-set) necesitan el .pkl.
+FEATURE_NAMES = ["elo1_before", "elo2_before", "elo_diff"]
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Predict match win probability for team1 using trained MVP model")
-    p.add_argument("--model", required=True, help="Path to trained model .pkl")
+    p.add_argument("--model", required=True, help="Path to trained model .pkl, or its JSON export (.json) for the sklearn-free path")
     p.add_argument("--csv", required=True, help="Path to matches.csv-like file")
     p.add_argument("--out", default=None, help="Optional output CSV for predictions")
     p.add_argument("--elo-k", type=float, default=32.0, help="Elo K-factor (must match training)")
     p.add_argument("--elo-base", type=float, default=1500.0, help="Elo base rating (must match training)")
+    p.add_argument(
+        "--elo-state",
+        default=None,
+        help="Serialized Elo state from train_mvp; only matches after its watermark are processed/predicted (K/base taken from the state)",
+    )
+    p.add_argument("--update-state", action="store_true", help="Write the advanced Elo state back to --elo-state")
+    p.add_argument(
+        "--train-info",
+        default=None,
+        help="train_info.json of a .pkl model (default: the one next to --model); its engine and K/base must match",
+    )
+    add_feature_set_arg(p)
+    add_rating_engine_arg(p)
+    add_cache_args(p)
     return p.parse_args()
 
 
-def load_and_prepare(csv_path: str, elo_k: float, elo_base: float) -> pd.DataFrame:
-    df = pd.read_csv(csv_path)
-    # Keep only completed or upcoming; label may not exist, but features no leak.
-    if "status" in df.columns:
-        # No filtramos para predicción, pero mantenemos el orden por fecha si existe
-        pass
-    if "date" in df.columns:
-        df["parsed_date"] = pd.to_datetime(df["date"], errors="coerce")
-    else:
-        df["parsed_date"] = pd.NaT
-    if "match_id" in df.columns:
-        df = df.sort_values(["parsed_date", "match_id"], kind="stable").reset_index(drop=True)
-    else:
-        df = df.sort_values(["parsed_date"], kind="stable").reset_index(drop=True)
+def load_and_prepare(csv_path: str, elo_k: float, elo_base: float, cache_dir: Optional[str] = None,
+                     feature_set: str = "elo", engine: str = "elo") -> pd.DataFrame:
+    import numpy as np
 
-    # Si existe winner, generamos label para referencia; no se usa para predecir
-    if "winner" in df.columns and "team1" in df.columns:
-        # Limpieza de espacios para evitar mismatches por espacios finales
-        df["team1"] = df["team1"].astype(str).str.strip()
-        df["team2"] = df["team2"].astype(str).str.strip()
-        df["winner"] = df["winner"].astype(str).str.strip()
-        df["team1_win"] = (df["winner"] == df["team1"]).astype(int)
+    from mvp_model.utils.features import load_features
 
-    feats = build_elo_features(df, team1_col="team1", team2_col="team2", label_col="team1_win" if "team1_win" in df.columns else "__none__", elo_k=elo_k, elo_base=elo_base)
+    # No filtramos para predicción; si existe winner, la etiqueta es solo de referencia
+    df, feats, _ = load_features(csv_path, elo_k, elo_base, feature_set, completed_only=False, cache_dir=cache_dir,
+                                 engine=engine)
     feats["match_id"] = df["match_id"] if "match_id" in df.columns else np.arange(len(df))
     return df, feats
 
 
+def load_incremental(csv_path: str, state: EloState, feature_set: str = "elo") -> pd.DataFrame:
+    """
+    Solo las filas posteriores a la marca de agua del estado, con sus
+    features. El Elo sale del estado; las demás columnas del set (forma,
+    economía) se calculan sobre el histórico completo del CSV.
+    """
+    from mvp_model.utils.features import ELO_FEATURES, FEATURE_SETS, RD_FEATURES, build_features, load_matches
+
+    extra = [c for c in FEATURE_SETS[feature_set] if c not in ELO_FEATURES]
+    if any(c in RD_FEATURES for c in extra):
+        raise SystemExit(f"--elo-state solo guarda ratings Elo: el set {feature_set} necesita la ruta sin --elo-state")
+
+    df = load_matches(csv_path, completed_only=False)
+    for c in ["team1", "team2"]:
+        df[c] = df[c].astype(str).str.strip()
+    # Partidos no completados: sin resultado (NaN) para no actualizar ratings
+    if "team1_win" in df.columns and "status" in df.columns:
+        done = df["status"].astype(str).str.lower() == "completed"
+        df["team1_win"] = df["team1_win"].where(done)
+    feats = state.update(df)
+    if extra:
+        X = build_features(df, state.config.k, state.config.base, feature_set, os.path.dirname(csv_path))
+        feats[extra] = X.loc[feats.index, extra]
+    df = df.loc[feats.index].reset_index(drop=True)
+    feats = feats.reset_index(drop=True)
+    feats["match_id"] = df["match_id"]
+    return df, feats
+
+
+def _as_number(value: str):
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return float("nan")
+
+
+def _light_ids(csv_path: str, rows: List[dict]) -> Dict[str, List[int]]:
+    # IDs de equipo como read_master: del sidecar matches.ids.csv si está al
+    # día; si no, con el registro guardado (sin reconstruirlo: -1 si un alias
+    # no está, y entonces se compara por nombre)
+    columns = ["team1_id", "team2_id", "winner_id"]
+    ids_path = ids_sibling(csv_path)
+    if ids_path is not None:
+        with open(ids_path, "r", encoding="utf-8", newline="") as f:
+            id_rows = list(csv.DictReader(f))
+        if len(id_rows) == len(rows) and (not id_rows or set(columns) <= set(id_rows[0])):
+            return {c: [int(r[c]) for r in id_rows] for c in columns}
+    index = alias_index(load_registry(os.path.dirname(csv_path) or "."))
+    return {c: [resolve(r.get(c[:-3]) or "", "team", index) for r in rows] for c in columns}
+
+
+def read_matches_light(csv_path: str) -> dict:
+    """
+    Equivalente de `load_matches(completed_only=False)` con el módulo csv:
+    listas por columna en orden cronológico (parsed_date, match_id), NaT al
+    final, con los IDs `team1_id`/`team2_id` del registro y la etiqueta de
+    `elo_core.team1_won`. Fechas con `match_index.parse_datetime`, los
+    formatos de `schema.parse_dates`. Nombres vacíos se convierten en "nan"
+    como hace pandas.
+    """
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+
+    def col(name: str) -> List[str]:
+        return [r.get(name) or "" for r in rows]
+
+    def team(v: str) -> str:
+        return v.strip() or "nan"
+
+    dates = [parse_datetime(v) for v in col("date")]
+    raw_ids = col("match_id")
+    mids = [_as_number(v) for v in raw_ids]
+    order = sorted(
+        range(len(rows)),
+        key=lambda i: (dates[i] is None, dates[i] or datetime.min, mids[i] != mids[i], mids[i] if mids[i] == mids[i] else 0),
+    )
+    team1 = [team(v) for v in col("team1")]
+    team2 = [team(v) for v in col("team2")]
+    winner = [team(v) for v in col("winner")]
+    status = col("status")
+    ids = _light_ids(csv_path, rows)
+    labels = [team1_won(t, w, ti, wi) for t, w, ti, wi in zip(team1, winner, ids["team1_id"], ids["winner_id"])]
+    return {
+        "date": [dates[i] for i in order],
+        "match_id": [mids[i] for i in order],
+        "match_id_raw": [raw_ids[i] for i in order],
+        "team1": [team1[i] for i in order],
+        "team2": [team2[i] for i in order],
+        "team1_id": [ids["team1_id"][i] for i in order],
+        "team2_id": [ids["team2_id"][i] for i in order],
+        "team1_win": [labels[i] for i in order],
+        "completed": [status[i].lower() == "completed" for i in order],
+    }
+
+
+def predict_light(args: argparse.Namespace) -> None:
+    """Ruta sin pandas ni sklearn: modelo JSON + Elo en Python puro + csv."""
+    from mvp_model.utils.elo_core import EloConfig
+    from mvp_model.utils.scoring import LogisticScorer, check_training_config
+
+    scorer = LogisticScorer.load(args.model)
+    if scorer.feature_names != FEATURE_NAMES:
+        raise SystemExit(f"La ruta JSON solo calcula Elo y el modelo espera {scorer.feature_names}: "
+                         "usa el .pkl con el mismo --feature-set del entrenamiento")
+    state = EloState.load(args.elo_state) if args.elo_state else None
+    config = state.config if state is not None else EloConfig(base=args.elo_base, k=args.elo_k)
+    try:
+        check_training_config(scorer.training, "elo", config.k, config.base)
+    except ValueError as e:
+        raise SystemExit(f"{args.model}: {e}")
+    m = read_matches_light(args.csv)
+    if state is not None:
+        watermark = state.last_match_id
+        # Partidos no completados: sin resultado para no actualizar ratings
+        labels = [float(y) if done else float("nan") for y, done in zip(m["team1_win"], m["completed"])]
+        keep, elo1, elo2 = state.update_records(
+            m["team1"], m["team2"], labels, m["date"], m["match_id"], m["team1_id"], m["team2_id"]
+        )
+        # Misma representación que to_csv: enteros si no hay ningún NaN en la columna
+        if all(m["completed"]):
+            labels = [str(m["team1_win"][i]) for i in keep]
+        else:
+            labels = ["" if labels[i] != labels[i] else repr(labels[i]) for i in keep]
+        print(f"Estado Elo: {len(keep)} partidos posteriores a la marca de agua (match_id={watermark})")
+        if args.update_state:
+            state.save(args.elo_state)
+        if not keep:
+            print("No hay partidos nuevos que predecir.")
+            return
+    else:
+        state = EloState(config=config)
+        ys = [float(y) for y in m["team1_win"]]
+        keep, elo1, elo2 = state.update_records(
+            m["team1"], m["team2"], ys, m["date"], m["match_id"], m["team1_id"], m["team2_id"]
+        )
+        labels = [str(m["team1_win"][i]) for i in keep]
+
+    X = [[a, b, a - b] for a, b in zip(elo1, elo2)]
+    proba = scorer.predict_proba(X)[:, 1].tolist()
+
+    header = ["match_id", "team1", "team2", "p_team1_win", "team1_win"]
+    rows = [
+        [m["match_id_raw"][i], m["team1"][i], m["team2"][i], repr(p), lab]
+        for i, p, lab in zip(keep, proba, labels)
+    ]
+    if args.out:
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f, lineterminator="\n")
+            w.writerow(header)
+            w.writerows(rows)
+        print(f"Predicciones guardadas en: {args.out}")
+    else:
+        shown = [header] + rows[:20]
+        widths = [max(len(r[c]) for r in shown) for c in range(len(header))]
+        for r in shown:
+            print(" ".join(v.rjust(w) for v, w in zip(r, widths)))
+
+
 def main():
     args = parse_args()
+    if args.model.lower().endswith(".json"):
+        predict_light(args)
+        return
+
+    import joblib
+    import pandas as pd
+
+    from mvp_model.utils.features import FEATURE_SETS
+    from mvp_model.utils.scoring import check_training_config, train_info_config
+
+    if args.feature_set not in FEATURE_SETS:
+        raise SystemExit(f"Feature set desconocido: {args.feature_set} (opciones: {sorted(FEATURE_SETS)})")
     model = joblib.load(args.model)
-    df, feats = load_and_prepare(args.csv, args.elo_k, args.elo_base)
+    feature_names = list(getattr(model, "feature_names_in_", FEATURE_SETS[args.feature_set]))
+    if feature_names != FEATURE_SETS[args.feature_set]:
+        raise SystemExit(f"El modelo espera {feature_names}: pasa el --feature-set con el que se entrenó")
+    if args.elo_state:
+        if args.rating_engine != "elo":
+            raise SystemExit("--elo-state guarda ratings Elo: no sirve con --rating-engine glicko2")
+        state = EloState.load(args.elo_state)
+    else:
+        state = None
+    # Elo y Glicko-2 comparten columnas: sin esta comprobación un modelo de
+    # otro motor o con otra K/base puntuaría features equivocadas sin error
+    k, base = (state.config.k, state.config.base) if state is not None else (args.elo_k, args.elo_base)
+    try:
+        check_training_config(train_info_config(args.model, args.train_info), args.rating_engine, k, base)
+    except ValueError as e:
+        raise SystemExit(f"{args.model}: {e}")
+    if state is not None:
+        watermark = state.last_match_id
+        df, feats = load_incremental(args.csv, state, args.feature_set)
+        print(f"Estado Elo: {len(df)} partidos posteriores a la marca de agua (match_id={watermark})")
+        if args.update_state:
+            state.save(args.elo_state)
+        if df.empty:
+            print("No hay partidos nuevos que predecir.")
+            return
+    else:
+        df, feats = load_and_prepare(args.csv, args.elo_k, args.elo_base, None if args.no_cache else args.cache_dir,
+                                     args.feature_set, args.rating_engine)
 
-    # Por compatibilidad con el MVP entrenado
-    feature_names = ["elo1_before", "elo2_before", "elo_diff"]
     X = feats[feature_names]
     proba = model.predict_proba(X)[:, 1]
 
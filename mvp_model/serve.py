@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from mvp_model.utils.elo_core import EloState
+
+# numpy/pandas/joblib (y sklearn al cargar un .pkl) se importan al levantar el
+# servidor, no al importar el módulo: `--help` arranca al instante
+
+# El servicio solo tiene ratings residentes: sirve modelos entrenados con el
+# set `elo` (forma/economía necesitan el histórico del partido; glicko2, su RD)
+FEATURE_NAMES = ["elo1_before", "elo2_before", "elo_diff"]
+LATENCY_WINDOW = 10_000  # últimas N peticiones por endpoint para p50/p99
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Local HTTP prediction service with a resident model and live Elo ratings")
+    p.add_argument("--model", default="mvp_model/artifacts/model.pkl", help="Path to trained model .pkl or its JSON export")
+    p.add_argument("--elo-state", default="mvp_model/artifacts/elo_state.json", help="Elo state written by train_mvp (ratings + watermark)")
+    p.add_argument(
+        "--train-info",
+        default=None,
+        help="train_info.json of a .pkl model (default: the one next to --model); JSON exports carry it inline",
+    )
+    p.add_argument("--host", default="127.0.0.1", help="Bind address")
+    p.add_argument("--port", type=int, default=8765, help="Bind port (0 = any free port)")
+    p.add_argument("--no-persist", action="store_true", help="Do not write the Elo state back to --elo-state after /result")
+    p.add_argument("--verbose", action="store_true", help="Log every request")
+    return p.parse_args()
+
+
+class PredictionService:
+    """
+    Modelo y tabla de ratings residentes en memoria. `predict` lee ratings,
+    `apply_results` los actualiza en vivo; ambos bajo el mismo lock, así que
+    cada lote ve un estado consistente.
+    """
+
+    def __init__(self, model, state: EloState, training: dict, state_path: Optional[str] = None):
+        from mvp_model.utils.scoring import check_training_config
+
+        names = list(getattr(model, "feature_names", None) or getattr(model, "feature_names_in_", FEATURE_NAMES))
+        if not set(names) <= set(FEATURE_NAMES):
+            raise ValueError(f"El servicio solo calcula {FEATURE_NAMES} y el modelo espera {names}: "
+                             "entrénalo con --feature-set elo")
+        # `training` (ver scoring.training_config): un modelo Glicko-2 o de otra
+        # K/base tiene las mismas columnas pero no estos ratings
+        check_training_config(training, "elo", state.config.k, state.config.base)
+        self.feature_names = names
+        self.model = model
+        self.state = state
+        self.state_path = state_path
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self._stats_lock = threading.Lock()
+        self._latency: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+        self._items: Dict[str, int] = {}
+
+    def predict(self, pairs: List[Tuple[str, str]]) -> List[dict]:
+        import numpy as np
+        import pandas as pd
+
+        with self.lock:
+            r1 = np.array([self.state.rating(t1) for t1, _ in pairs], dtype=np.float64)
+            r2 = np.array([self.state.rating(t2) for _, t2 in pairs], dtype=np.float64)
+        X = pd.DataFrame({"elo1_before": r1, "elo2_before": r2, "elo_diff": r1 - r2})[self.feature_names]
+        proba = self.model.predict_proba(X)[:, 1]
+        return [
+            {"team1": t1, "team2": t2, "elo1_before": a, "elo2_before": b, "p_team1_win": p}
+            for (t1, t2), a, b, p in zip(pairs, r1.tolist(), r2.tolist(), proba.tolist())
+        ]
+
+    def apply_results(self, results: List[dict]) -> List[dict]:
+        out = []
+        with self.lock:
+            for r in results:
+                before = self.state.apply_result(
+                    r["team1"], r["team2"], r["team1_win"], date=r.get("date"), match_id=r.get("match_id")
+                )
+                if before is None:
+                    # Repetido o anterior a la marca de agua: no toca los ratings
+                    out.append({"team1": r["team1"], "team2": r["team2"], "match_id": r.get("match_id"),
+                                "ignored": "no es posterior a la marca de agua"})
+                    continue
+                before1, before2 = before
+                out.append({
+                    "team1": r["team1"],
+                    "team2": r["team2"],
+                    "elo1_before": before1,
+                    "elo2_before": before2,
+                    "elo1_after": self.state.rating(r["team1"]),
+                    "elo2_after": self.state.rating(r["team2"]),
+                })
+            if self.state_path and any("ignored" not in o for o in out):
+                self.state.save(self.state_path)
+        return out
+
+    def record(self, endpoint: str, seconds: float, n_items: int) -> None:
+        with self._stats_lock:
+            self._latency.setdefault(endpoint, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+            self._items[endpoint] = self._items.get(endpoint, 0) + n_items
+
+    def metrics(self) -> dict:
+        import numpy as np
+
+        uptime = time.time() - self.started
+        endpoints = {}
+        with self._stats_lock:
+            for name, lat in self._latency.items():
+                ms = np.array(lat, dtype=np.float64) * 1000.0
+                endpoints[name] = {
+                    "requests": self._counts[name],
+                    "items": self._items[name],
+                    "requests_per_sec": self._counts[name] / uptime if uptime > 0 else None,
+                    "items_per_sec": self._items[name] / uptime if uptime > 0 else None,
+                    "latency_ms": {
+                        "p50": float(np.percentile(ms, 50)),
+                        "p99": float(np.percentile(ms, 99)),
+                        "max": float(ms.max()),
+                        "window": int(len(ms)),
+                    },
+                }
+        with self.lock:
+            elo = {
+                "teams": len(self.state.ratings),
+                "n_matches": self.state.n_matches,
+                "watermark": {"date": self.state.last_date, "match_id": self.state.last_match_id},
+            }
+        return {"uptime_seconds": uptime, "endpoints": endpoints, "elo": elo}
+
+
+def _parse_pairs(body: dict) -> List[Tuple[str, str]]:
+    items = body.get("matches", [body] if "team1" in body else None)
+    if not isinstance(items, list) or not items:
+        raise ValueError("Se espera {'matches': [{'team1': ..., 'team2': ...}, ...]}")
+    pairs = []
+    for m in items:
+        t1, t2 = (m.get("team1"), m.get("team2")) if isinstance(m, dict) else tuple(m)
+        if not t1 or not t2:
+            raise ValueError(f"Partido sin team1/team2: {m}")
+        pairs.append((str(t1).strip(), str(t2).strip()))
+    return pairs
+
+
+def _parse_results(body: dict) -> List[dict]:
+    items = body.get("results", [body] if "team1" in body else None)
+    if not isinstance(items, list) or not items:
+        raise ValueError("Se espera {'results': [{'team1': ..., 'team2': ..., 'winner': ...}, ...]}")
+    results = []
+    for r in items:
+        t1, t2 = str(r.get("team1", "")).strip(), str(r.get("team2", "")).strip()
+        if not t1 or not t2:
+            raise ValueError(f"Resultado sin team1/team2: {r}")
+        if "team1_win" in r:
+            y = float(r["team1_win"])
+        else:
+            winner = str(r.get("winner", "")).strip()
+            if winner not in (t1, t2):
+                raise ValueError(f"winner debe ser team1 o team2: {r}")
+            y = 1.0 if winner == t1 else 0.0
+        # Se validan antes de aplicar nada: un lote con errores no deja cambios a medias
+        date, match_id = r.get("date"), r.get("match_id")
+        if date is not None:
+            date = datetime.fromisoformat(str(date)).isoformat()
+        if match_id is not None:
+            match_id = int(match_id)
+        results.append({"team1": t1, "team2": t2, "team1_win": y, "date": date, "match_id": match_id})
+    return results
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: los clientes que sondean reutilizan la conexión
+    disable_nagle_algorithm = True  # cabeceras y cuerpo van en escrituras separadas (evita ~40 ms de delayed ACK)
+    service: PredictionService = None
+    verbose = False
+
+    def log_message(self, fmt, *args):
+        if self.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, code: int, payload: dict) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif url.path == "/metrics":
+            self._send(200, self.service.metrics())
+        elif url.path == "/ratings":
+            teams = parse_qs(url.query).get("team")
+            with self.service.lock:
+                ratings = self.service.state.ratings
+                data = {t: self.service.state.rating(t) for t in teams} if teams else dict(ratings)
+            self._send(200, {"ratings": data})
+        else:
+            self._send(404, {"error": f"Ruta desconocida: {url.path}"})
+
+    def do_POST(self):
+        t0 = time.perf_counter()
+        path = urlparse(self.path).path
+        try:
+            body = self._body()
+            if path == "/predict":
+                pairs = _parse_pairs(body)
+                payload = {"predictions": self.service.predict(pairs)}
+                n = len(pairs)
+            elif path == "/result":
+                results = _parse_results(body)
+                payload = {"updated": self.service.apply_results(results)}
+                n = len(results)
+            else:
+                self._send(404, {"error": f"Ruta desconocida: {path}"})
+                return
+        except (ValueError, TypeError, AttributeError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        self._send(200, payload)
+        self.service.record(path, time.perf_counter() - t0, n)
+
+
+def make_server(
+    model_path: str,
+    state_path: str,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    persist: bool = True,
+    verbose: bool = False,
+    train_info_path: Optional[str] = None,
+) -> ThreadingHTTPServer:
+    import joblib
+
+    from mvp_model.utils.scoring import LogisticScorer, train_info_config
+
+    # model.json (exportación de train_mvp) da las mismas probabilidades sin pasar por sklearn
+    if model_path.lower().endswith(".json"):
+        model = LogisticScorer.load(model_path)
+        training = model.training
+    else:
+        model = joblib.load(model_path)
+        training = train_info_config(model_path, train_info_path)
+    service = PredictionService(model, EloState.load(state_path), training, state_path if persist else None)
+    handler = type("Handler", (PredictionHandler,), {"service": service, "verbose": verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main():
+    args = parse_args()
+    try:
+        server = make_server(
+            args.model, args.elo_state, args.host, args.port, not args.no_persist, args.verbose, args.train_info
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+    host, port = server.server_address[:2]
+    state = server.service.state
+    print(f"Modelo y {len(state.ratings)} ratings cargados (marca de agua match_id={state.last_match_id})")
+    print(f"Sirviendo en http://{host}:{port}  (POST /predict, POST /result, GET /metrics, GET /ratings, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("Métricas finales:", json.dumps(server.service.metrics()["endpoints"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+    import pandas as pd
+
+    from mvp_model.utils.bracket import Bracket
+
+# numpy/pandas se importan dentro de las funciones: `--help` arranca al instante
+
+SOURCES = ("elo", "model", "map")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Monte Carlo bracket simulator: title odds and placement distributions for an event")
+    p.add_argument("--csv-path", default="masters_csvs/matches.csv", help="Path to matches.csv")
+    p.add_argument("--event", default=None, help="tournament_name of the event (default: latest event)")
+    p.add_argument("--stage", default=None, help="Bracket stage (default: the stage holding the Grand Final)")
+    p.add_argument("--as-of", default=None, help="Date (YYYY-MM-DD): bracket matches before it keep their real result; ratings use matches before it (default: stage start, pre-event odds)")
+    p.add_argument("--source", default="elo", choices=SOURCES, help="Match probabilities: series Elo, a trained model (--model) or map Elo + veto (map_model)")
+    p.add_argument("--model", default="mvp_model/artifacts/model.pkl", help="Model .pkl or .json export for --source model")
+    p.add_argument("--maps-csv", default="masters_csvs/detailed_matches_maps.csv", help="detailed_matches_maps.csv for --source map")
+    p.add_argument("--overview-csv", default="masters_csvs/detailed_matches_overview.csv", help="detailed_matches_overview.csv for --source map (formats and pool)")
+    p.add_argument("--elo-k", type=float, default=32.0, help="Elo K-factor")
+    p.add_argument("--elo-base", type=float, default=1500.0, help="Elo base rating")
+    p.add_argument("--sims", type=int, default=1_000_000, help="Number of simulated tournaments")
+    p.add_argument("--chunk-size", type=int, default=10_000, help="Tournaments per vectorized block (one seed per block; ~10k keeps the arrays in cache)")
+    p.add_argument("--jobs", type=int, default=1, help="Worker processes (0 = all cores); results do not depend on it")
+    p.add_argument("--seed", type=int, default=0, help="Root seed")
+    p.add_argument("--out", default="mvp_model/artifacts/bracket_odds.csv", help="Per-team placement distribution CSV")
+    p.add_argument("--list-events", action="store_true", help="List events and their bracket stages and exit")
+    return p.parse_args(argv)
+
+
+def pick_stage(event_df: pd.DataFrame) -> str:
+    """Fase del cuadro: la que contiene la Grand Final (o la última que no es showmatch)."""
+    final = event_df[event_df["week"].astype(str) == "Grand Final"]
+    if len(final):
+        return str(final["stage"].iloc[-1])
+    stages = [s for s in event_df["stage"].dropna().astype(str) if s != "Showmatch"]
+    if not stages:
+        raise SystemExit("El evento no tiene una fase de cuadro reconocible: indica --stage")
+    return stages[-1]
+
+
+def elo_ratings(matches: pd.DataFrame, cutoff, args: argparse.Namespace) -> dict:
+    from mvp_model.utils.elo_core import EloConfig, EloState
+
+    state = EloState(config=EloConfig(base=args.elo_base, k=args.elo_k))
+    state.update(matches[matches["parsed_date"] < cutoff])
+    return state.ratings
+
+
+def pair_probs(bracket: Bracket, matches: pd.DataFrame, cutoff, args: argparse.Namespace) -> np.ndarray:
+    """P[i, a, b] = P(a gana a b en el partido i del cuadro), todas las parejas."""
+    import numpy as np
+    import pandas as pd
+
+    teams = bracket.teams
+    n = len(teams)
+    ratings = elo_ratings(matches, cutoff, args)
+    r = np.array([ratings.get(t, args.elo_base) for t in teams])
+    n_matches = len(bracket.matches)
+
+    if args.source == "elo":
+        P = 1.0 / (1.0 + 10 ** ((r[None, :] - r[:, None]) / 400.0))
+        return np.broadcast_to(P, (n_matches, n, n))
+
+    if args.source == "model":
+        from mvp_model.compare_models import load_model
+
+        a, b = np.meshgrid(np.arange(n), np.arange(n), indexing="ij")
+        X = pd.DataFrame({"elo1_before": r[a.ravel()], "elo2_before": r[b.ravel()]})
+        X["elo_diff"] = X["elo1_before"] - X["elo2_before"]
+        model, scorer = load_model(args.model, list(X.columns))
+        if scorer is not None:
+            proba = scorer.predict_proba(X[scorer.feature_names].to_numpy())[:, 1]
+        else:
+            proba = model.predict_proba(X[list(getattr(model, "feature_names_in_", X.columns))])[:, 1]
+        return np.broadcast_to(proba.reshape(n, n), (n_matches, n, n))
+
+    # --source map: Elo por mapa hasta el corte y serie con veto óptimo según el formato del partido
+    from mvp_model.map_model import load_vetoes
+    from mvp_model.utils.map_elo import MapElo, load_map_results
+    from mvp_model.utils.masters import read_master
+    from mvp_model.utils.series import simulate_series
+
+    maps = load_map_results(matches, args.maps_csv)
+    before = maps[maps["match_id"].isin(matches.loc[matches["parsed_date"] < cutoff, "match_id"])]
+    model = MapElo()
+    model.update(before["team1"], before["team2"], before["map_name"], before["team1_win"].to_numpy(dtype=float))
+    vetoes = load_vetoes(args.overview_csv, maps).set_index("match_id")
+    in_bracket = vetoes[vetoes.index.isin(bracket.match_ids)]
+    if not len(in_bracket):
+        raise SystemExit("No hay vetos para los partidos del cuadro: usa --source elo o model")
+    pool = list(in_bracket["pool"].iloc[0])
+    fmt_by_id = read_master(args.overview_csv, columns=["match_id", "format"]).dropna().drop_duplicates("match_id")
+    fmt_by_id = dict(zip(fmt_by_id["match_id"].astype(int), fmt_by_id["format"].astype(str)))
+    formats = [fmt_by_id.get(mid, "Bo3") for mid in bracket.match_ids]
+    by_fmt = {}
+    for fmt in set(formats):
+        M = np.empty((n, n))
+        for i in range(n):
+            for j in range(n):
+                p_pool = model.map_probs(teams[i], teams[j], pool)
+                # Sin saber quién empieza el veto: media de ambos órdenes
+                M[i, j] = 0.5 * (simulate_series(p_pool, fmt, True).minimax + simulate_series(p_pool, fmt, False).minimax)
+        by_fmt[fmt] = M
+    return np.stack([by_fmt[f] for f in formats])
+
+
+def list_events(matches: pd.DataFrame) -> None:
+    for event, g in matches.groupby("tournament_name", sort=False):
+        try:
+            stage = pick_stage(g)
+        except SystemExit:
+            stage = "-"
+        print(f"{event:<40} {g['parsed_date'].min().date()}  cuadro: {stage} ({int((g['stage'].astype(str) == stage).sum())} partidos)")
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+
+    import numpy as np
+    import pandas as pd
+
+    from mvp_model.utils.bracket import infer_bracket, placement_table, simulate_bracket
+    from mvp_model.utils.features import load_matches
+
+    matches = load_matches(args.csv_path, extra_columns=["stage", "week"])
+    if args.list_events:
+        list_events(matches)
+        return
+    event = args.event or str(matches["tournament_name"].iloc[-1])
+    event_df = matches[matches["tournament_name"] == event]
+    if not len(event_df):
+        raise SystemExit(f"Evento no encontrado: {event} (usa --list-events)")
+    stage = args.stage or pick_stage(event_df)
+    stage_df = event_df[event_df["stage"].astype(str) == stage]
+    bracket = infer_bracket(stage_df)
+
+    start = stage_df["parsed_date"].min()
+    cutoff = pd.Timestamp(args.as_of) if args.as_of else start
+    played = (stage_df["parsed_date"] < cutoff).to_numpy()
+    fixed = np.where(played, stage_df["team1_win"].to_numpy(), -1)
+
+    t0 = time.perf_counter()
+    P = pair_probs(bracket, matches, cutoff, args)
+    probs_s = time.perf_counter() - t0
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    t0 = time.perf_counter()
+    counts = simulate_bracket(bracket, P, fixed, n_sims=args.sims, seed=args.seed, chunk_size=args.chunk_size, jobs=jobs)
+    sim_s = time.perf_counter() - t0
+
+    table = placement_table(bracket, counts, args.sims)
+    # Posición real: una sola simulación con todos los resultados fijados
+    actual = simulate_bracket(bracket, P, stage_df["team1_win"].to_numpy(), n_sims=1)
+    table["actual_place"] = [bracket.groups[g][0] for g in actual.argmax(axis=1)]
+    table = table.sort_values("expected_place", kind="stable").reset_index(drop=True)
+
+    out_dir = os.path.dirname(args.out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    table.to_csv(args.out, index=False)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(table.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    print(json.dumps({
+        "event": event,
+        "stage": stage,
+        "as_of": cutoff.date().isoformat(),
+        "fixed_matches": int(played.sum()),
+        "source": args.source,
+        "teams": len(bracket.teams),
+        "matches": len(bracket.matches),
+        "sims": args.sims,
+        "jobs": jobs,
+        "probs_seconds": round(probs_s, 4),
+        "sim_seconds": round(sim_s, 4),
+        "sims_per_second": round(args.sims / sim_s),
+    }, indent=2, ensure_ascii=False))
+    print(f"Distribución de posiciones: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
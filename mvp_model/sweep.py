@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from mvp_model.train_mvp import HAS_XGB, build_model, evaluate, time_train_test_split
+from mvp_model.utils.cli import add_feature_set_arg
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+    import pandas as pd
+
+# numpy/pandas y el motor Elo se importan dentro de las funciones (arranque ligero)
+ELO_COLUMNS = ["elo1_before", "elo2_before", "elo_diff"]
+LEADERBOARD_COLUMNS = [
+    "config_id", "elo_k", "elo_base", "hfa", "feature_set", "model", "params",
+    "log_loss", "brier", "roc_auc", "n_test", "fit_seconds",
+]
+
+# Datos compartidos por los workers (se envían una vez por proceso, no por tarea)
+_SHARED: Dict[str, object] = {}
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Hyperparameter sweep over Elo K/base/team1 advantage and model settings")
+    p.add_argument("--csv-path", default="masters_csvs/matches.csv", help="Path to matches.csv")
+    p.add_argument("--out", default="mvp_model/artifacts/sweep_leaderboard.csv", help="Output leaderboard CSV (sorted by log_loss)")
+    p.add_argument("--elo-k", type=float, nargs="+", default=[16.0, 24.0, 32.0, 40.0, 48.0], help="Elo K-factor values")
+    p.add_argument("--elo-base", type=float, nargs="+", default=[1500.0], help="Elo base rating values")
+    p.add_argument("--hfa", type=float, nargs="+", default=[0.0], help="Team1 advantage in Elo points (expected score only)")
+    p.add_argument("--models", nargs="+", choices=["lr", "xgb"], default=["lr"], help="Model families to sweep")
+    p.add_argument("--lr-c", type=float, nargs="+", default=[0.1, 1.0, 10.0], help="LogisticRegression C values")
+    p.add_argument("--xgb-max-depth", type=int, nargs="+", default=[3], help="XGBoost max_depth values")
+    p.add_argument("--xgb-n-estimators", type=int, nargs="+", default=[400], help="XGBoost n_estimators values")
+    p.add_argument("--xgb-learning-rate", type=float, nargs="+", default=[0.05], help="XGBoost learning_rate values")
+    p.add_argument("--search", choices=["grid", "random"], default="grid", help="Full grid or random sample of it")
+    p.add_argument("--n-iter", type=int, default=20, help="Number of configs for --search random")
+    p.add_argument("--seed", type=int, default=0, help="Seed for --search random")
+    p.add_argument("--test-size", type=float, default=0.2, help="Fraction of tail for test (time split)")
+    p.add_argument("--jobs", type=int, default=0, help="Worker processes (0 = all cores, 1 = in-process)")
+    p.add_argument("--resume", action="store_true", help="Keep results already in --out and only evaluate missing configs")
+    add_feature_set_arg(p)
+    return p.parse_args()
+
+
+def model_grid(args: argparse.Namespace) -> List[Tuple[str, dict]]:
+    grid: List[Tuple[str, dict]] = []
+    if "lr" in args.models:
+        grid += [("lr", {"C": c}) for c in args.lr_c]
+    if "xgb" in args.models:
+        if not HAS_XGB:
+            print("XGBoost no disponible: se omiten las configuraciones xgb.")
+        else:
+            for depth, n_est, lr in itertools.product(args.xgb_max_depth, args.xgb_n_estimators, args.xgb_learning_rate):
+                grid.append(("xgb", {"max_depth": depth, "n_estimators": n_est, "learning_rate": lr}))
+    return grid
+
+
+def config_id(data_sha: str, test_size: float, elo: Tuple[float, float, float], model: str, params: dict,
+              feature_set: str = "elo", sources_sha: Sequence[Optional[str]] = ()) -> str:
+    # Incluye el hash del CSV, de las demás fuentes del set (las mismas que
+    # features.cache_key: maestros y sidecars de IDs) y el split: resultados
+    # viejos no se reutilizan si cambian
+    spec = {"data": data_sha, "test_size": test_size, "elo": list(elo), "model": model, "params": params}
+    if feature_set != "elo":
+        spec["feature_set"] = feature_set
+    if sources_sha:
+        spec["sources"] = list(sources_sha)
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def elo_feature_stack(df: pd.DataFrame, elo_grid: List[Tuple[float, float, float]]) -> np.ndarray:
+    """Features Elo (n_configs, n_partidos, 3) de todas las configuraciones en una pasada."""
+    import numpy as np
+
+    from mvp_model.utils.elo import elo_pass_batch, encode_teams
+
+    codes1, codes2, teams = encode_teams(df, "team1", "team2")
+    y = df["team1_win"].to_numpy(dtype=np.float64)
+    ks, bases, hfas = (np.array(v, dtype=np.float64) for v in zip(*elo_grid))
+    elo1, elo2 = elo_pass_batch(codes1, codes2, y, len(teams), ks, bases, hfas)
+    return np.stack([elo1, elo2, elo1 - elo2], axis=2)
+
+
+def _init_worker(features: np.ndarray, y: np.ndarray, test_size: float, columns: List[str]) -> None:
+    _SHARED["features"] = features
+    _SHARED["columns"] = columns
+    _SHARED["y"] = y
+    _SHARED["test_size"] = test_size
+
+
+def _evaluate_config(task: Tuple[str, int, str, dict]) -> Tuple[str, dict]:
+    import pandas as pd
+
+    cid, elo_idx, model_name, params = task
+    X = pd.DataFrame(_SHARED["features"][elo_idx], columns=_SHARED["columns"])
+    X_train, X_test, y_train, y_test = time_train_test_split(X, _SHARED["y"], test_size=_SHARED["test_size"])
+    t0 = time.perf_counter()
+    model = build_model(use_xgb=model_name == "xgb", params=params)
+    model.fit(X_train, y_train)
+    metrics = evaluate(model, X_test, y_test)
+    metrics["fit_seconds"] = time.perf_counter() - t0
+    return cid, metrics
+
+
+def write_leaderboard(rows: List[dict], path: str) -> pd.DataFrame:
+    import pandas as pd
+
+    board = pd.DataFrame(rows, columns=LEADERBOARD_COLUMNS)
+    board = board.sort_values(["log_loss", "config_id"], kind="stable").reset_index(drop=True)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = os.path.join(os.path.dirname(path) or ".", f".tmp_{os.path.basename(path)}")
+    board.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    return board
+
+
+def load_previous(path: str) -> Dict[str, dict]:
+    import pandas as pd
+
+    if not os.path.exists(path):
+        return {}
+    prev = pd.read_csv(path)
+    if list(prev.columns) != LEADERBOARD_COLUMNS:
+        print(f"Leaderboard existente con otro formato, se ignora: {path}")
+        return {}
+    prev = prev.astype(object).where(prev.notna(), None)
+    return {row["config_id"]: row for row in prev.to_dict("records")}
+
+
+def main():
+    args = parse_args()
+
+    import numpy as np
+    import pandas as pd
+
+    from mvp_model.utils.features import (
+        ELO_FEATURES,
+        FEATURE_SETS,
+        RD_FEATURES,
+        build_features,
+        file_sha256,
+        load_matches,
+        sources_sha256,
+    )
+
+    if args.feature_set not in FEATURE_SETS:
+        raise SystemExit(f"Feature set desconocido: {args.feature_set} (opciones: {sorted(FEATURE_SETS)})")
+    # Columnas que no dependen de K/base/hfa (forma, economía): se calculan una vez
+    extra = [c for c in FEATURE_SETS[args.feature_set] if c not in ELO_FEATURES]
+    if any(c in RD_FEATURES for c in extra):
+        raise SystemExit(f"El sweep recorre configuraciones Elo: el set {args.feature_set} necesita glicko2")
+    columns = ELO_COLUMNS + extra
+
+    df = load_matches(args.csv_path)
+    if len(df) < 20:
+        raise SystemExit("Muy pocos partidos para entrenar un modelo (se requieren > 20).")
+    y = df["team1_win"].astype(int).values
+    data_sha = file_sha256(args.csv_path)
+    sources_sha = sources_sha256(args.feature_set, os.path.dirname(args.csv_path))
+
+    elo_grid = list(itertools.product(args.elo_k, args.elo_base, args.hfa))
+    configs = list(itertools.product(range(len(elo_grid)), model_grid(args)))
+    if args.search == "random" and args.n_iter < len(configs):
+        rng = np.random.default_rng(args.seed)
+        picked = np.sort(rng.choice(len(configs), size=args.n_iter, replace=False))
+        configs = [configs[i] for i in picked]
+    if not configs:
+        raise SystemExit("No hay configuraciones que evaluar.")
+
+    previous = load_previous(args.out) if args.resume else {}
+    rows: Dict[str, dict] = {}
+    tasks = []
+    for elo_idx, (model_name, params) in configs:
+        k, base, hfa = elo_grid[elo_idx]
+        cid = config_id(data_sha, args.test_size, elo_grid[elo_idx], model_name, params, args.feature_set, sources_sha)
+        if cid in previous:
+            rows[cid] = previous[cid]
+            continue
+        rows[cid] = {
+            "config_id": cid, "elo_k": k, "elo_base": base, "hfa": hfa, "feature_set": args.feature_set,
+            "model": model_name, "params": json.dumps(params, sort_keys=True),
+        }
+        tasks.append((cid, elo_idx, model_name, params))
+    print(f"Configuraciones: {len(configs)} ({len(configs) - len(tasks)} ya evaluadas, {len(tasks)} pendientes)")
+
+    # Solo las trayectorias Elo que hacen falta, todas en una pasada
+    needed = sorted({t[1] for t in tasks})
+    remap = {old: new for new, old in enumerate(needed)}
+    tasks = [(cid, remap[idx], m, p) for cid, idx, m, p in tasks]
+    t0 = time.perf_counter()
+    features = elo_feature_stack(df, [elo_grid[i] for i in needed]) if needed else np.empty((0, len(df), 3))
+    print(f"Elo: {len(needed)} trayectorias en una pasada ({time.perf_counter() - t0:.3f}s)")
+    if extra and needed:
+        shared = build_features(df, 32.0, 1500.0, args.feature_set, os.path.dirname(args.csv_path))[extra].to_numpy()
+        features = np.concatenate([features, np.broadcast_to(shared, (len(features),) + shared.shape)], axis=2)
+
+    t0 = time.perf_counter()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    jobs = min(jobs, max(1, len(tasks)))
+
+    def record(cid: str, metrics: dict) -> None:
+        rows[cid].update({m: metrics[m] for m in ("log_loss", "brier", "roc_auc", "n_test", "fit_seconds")})
+
+    if jobs == 1:
+        _init_worker(features, y, args.test_size, columns)
+        for task in tasks:
+            record(*_evaluate_config(task))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(features, y, args.test_size, columns)) as ex:
+            futures = [ex.submit(_evaluate_config, task) for task in tasks]
+            for done, fut in enumerate(as_completed(futures), 1):
+                record(*fut.result())
+                # Guardado incremental: un corte a mitad conserva lo evaluado (--resume)
+                if done % 20 == 0:
+                    write_leaderboard([r for r in rows.values() if "log_loss" in r], args.out)
+    elapsed = time.perf_counter() - t0
+
+    board = write_leaderboard(list(rows.values()), args.out)
+    print(f"Evaluadas {len(tasks)} configuraciones en {elapsed:.2f}s con {jobs} proceso(s)")
+    print(f"Leaderboard guardado en: {args.out}")
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        print(board.drop(columns=["config_id"]).head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
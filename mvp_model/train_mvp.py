@@ -1,82 +1,44 @@
+from __future__ import annotations
+
 import argparse
+import importlib.util
 import json
 import os
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING, List, Optional
 
-import numpy as np
-import pandas as pd
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import log_loss, roc_auc_score, brier_score_loss
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import StandardScaler
-import joblib
+from mvp_model.utils.cli import add_bootstrap_args, add_cache_args, add_feature_set_arg, add_memory_arg, add_rating_engine_arg, boot_jobs
+from mvp_model.utils.metrics import probability_metrics
 
-try:
-    from xgboost import XGBClassifier  # type: ignore
-    HAS_XGB = True
-except Exception:  # pragma: no cover
-    HAS_XGB = False
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+    import pandas as pd
+    from sklearn.pipeline import Pipeline
 
-from mvp_model.utils.elo import build_elo_features
+# numpy/pandas/sklearn/joblib se importan donde se usan, y xgboost solo con
+# --use-xgb: `--help` y los módulos que reutilizan estas funciones no pagan
+# esas importaciones al arrancar (ver benchmarks/bench_startup.py)
+HAS_XGB = importlib.util.find_spec("xgboost") is not None
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Train MVP match outcome model from matches.csv")
     p.add_argument("--csv-path", default="masters_csvs/matches.csv", help="Path to matches.csv")
     p.add_argument("--model-out", default="mvp_model/artifacts/model.pkl", help="Output path for trained model")
     p.add_argument("--metrics-out", default="mvp_model/artifacts/metrics.json", help="Output path for metrics JSON")
     p.add_argument("--train-info-out", default="mvp_model/artifacts/train_info.json", help="Output path for training info JSON")
+    p.add_argument("--model-json-out", default="mvp_model/artifacts/model.json", help="Output path for the dependency-free JSON export (LogisticRegression only)")
+    p.add_argument("--elo-state-out", default="mvp_model/artifacts/elo_state.json", help="Output path for serialized Elo state (ratings + watermark)")
     p.add_argument("--test-size", type=float, default=0.2, help="Fraction of tail for test (time split)")
     p.add_argument("--elo-k", type=float, default=32.0, help="Elo K-factor")
     p.add_argument("--elo-base", type=float, default=1500.0, help="Elo base rating")
     p.add_argument("--use-xgb", action="store_true", help="Force use XGBoost if available")
-    return p.parse_args()
-
-
-def load_matches(csv_path: str) -> pd.DataFrame:
-    df = pd.read_csv(csv_path)
-    # Filtrar solo partidos completados
-    if "status" in df.columns:
-        df = df[df["status"].astype(str).str.lower() == "completed"].copy()
-    # Parse date; fallback to original order if parsing fails
-    if "date" in df.columns:
-        df["parsed_date"] = pd.to_datetime(df["date"], errors="coerce")
-    else:
-        df["parsed_date"] = pd.NaT
-
-    # Limpieza de espacios y normalización básica en nombres de equipo y winner
-    for col in ["team1", "team2", "winner"]:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
-    # Label: 1 if team1 == winner else 0
-    if "winner" in df.columns and "team1" in df.columns:
-        df["team1_win"] = (df["winner"] == df["team1"]).astype(int)
-    else:
-        raise ValueError("CSV must contain columns: team1, winner")
-    # Sort chronologically (NaT at end keeps relative order)
-    if "match_id" in df.columns:
-        df = df.sort_values(["parsed_date", "match_id"], kind="stable")
-    else:
-        df = df.sort_values(["parsed_date"], kind="stable")
-    df = df.reset_index(drop=True)
-    return df
-
-
-def make_features(df: pd.DataFrame, elo_k: float, elo_base: float) -> pd.DataFrame:
-    features = build_elo_features(
-        df=df,
-        team1_col="team1",
-        team2_col="team2",
-        label_col="team1_win",
-        elo_k=elo_k,
-        elo_base=elo_base,
-    )
-    # Only pre-match numeric features for MVP
-    feat_cols = ["elo1_before", "elo2_before", "elo_diff"]
-    X = features[feat_cols].copy()
-    y = df["team1_win"].astype(int).values
-    meta = {"feature_names": feat_cols}
-    return X, y, meta
+    add_feature_set_arg(p)
+    add_rating_engine_arg(p)
+    add_bootstrap_args(p)
+    add_cache_args(p)
+    add_memory_arg(p)
+    return p.parse_args(argv)
 
 
 def time_train_test_split(X: pd.DataFrame, y: np.ndarray, test_size: float):
@@ -88,9 +50,14 @@ def time_train_test_split(X: pd.DataFrame, y: np.ndarray, test_size: float):
     return X_train, X_test, y_train, y_test
 
 
-def build_model(use_xgb: bool) -> Pipeline:
+def build_model(use_xgb: bool, params: Optional[dict] = None) -> Pipeline:
+    from sklearn.pipeline import Pipeline
+
+    # `params` sobreescribe hiperparámetros del estimador (p. ej. desde sweep.py)
     if use_xgb and HAS_XGB:
-        model = XGBClassifier(
+        from xgboost import XGBClassifier  # type: ignore
+
+        kwargs = dict(
             n_estimators=400,
             max_depth=3,
             learning_rate=0.05,
@@ -103,34 +70,52 @@ def build_model(use_xgb: bool) -> Pipeline:
             n_jobs=4,
             tree_method="hist",
         )
+        kwargs.update(params or {})
+        model = XGBClassifier(**kwargs)
         # No scaling needed for trees
         pipe = Pipeline(steps=[("model", model)])
     else:
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import StandardScaler
+
         # Simple and robust fallback
-        model = LogisticRegression(max_iter=200, solver="lbfgs")
+        kwargs = dict(max_iter=200, solver="lbfgs")
+        kwargs.update(params or {})
+        model = LogisticRegression(**kwargs)
         pipe = Pipeline(steps=[("scaler", StandardScaler()), ("model", model)])
     return pipe
 
 
-def evaluate(model: Pipeline, X_test: pd.DataFrame, y_test: np.ndarray) -> dict:
+def evaluate(model: Pipeline, X_test: pd.DataFrame, y_test: np.ndarray, n_boot: int = 0,
+             seed: int = 0, jobs: int = 1) -> dict:
+    """
+    Métricas del bloque de test. Con `n_boot` > 0 añade `bootstrap`: IC de
+    cada métrica y diferencia pareada frente al Elo directo (utils/bootstrap.py).
+    """
     proba = model.predict_proba(X_test)[:, 1]
-    metrics = {
-        "log_loss": float(log_loss(y_test, proba)),
-        "roc_auc": float(roc_auc_score(y_test, proba)) if len(np.unique(y_test)) > 1 else None,
-        "brier": float(brier_score_loss(y_test, proba)),
-        "n_test": int(len(y_test)),
-    }
+    metrics = probability_metrics(y_test, proba)
+    if n_boot > 0:
+        from mvp_model.utils.bootstrap import model_vs_elo
+
+        metrics["bootstrap"] = model_vs_elo(y_test, proba, X_test["elo_diff"].to_numpy(), n_boot, seed, jobs)
     return metrics
 
 
-def main():
-    args = parse_args()
+def train(args: argparse.Namespace, df: pd.DataFrame, X: pd.DataFrame, info: dict) -> Pipeline:
+    """
+    Entrena, evalúa y guarda los artefactos a partir de features ya cargadas
+    (`load_features`). Devuelve el modelo entrenado; scripts/run_pipeline.py
+    lo pasa en memoria a los pasos de exportación y gráficas.
+    """
+    import joblib
+
+    from mvp_model.utils.elo import EloConfig, EloState
+    from mvp_model.utils.scoring import export_logistic
 
-    df = load_matches(args.csv_path)
     if len(df) < 20:
         raise SystemExit("Muy pocos partidos para entrenar un modelo (se requieren > 20).")
-
-    X, y, meta = make_features(df, elo_k=args.elo_k, elo_base=args.elo_base)
+    y = df["team1_win"].astype(int).values
+    meta = {"feature_names": info["feature_names"]}
 
     X_train, X_test, y_train, y_test = time_train_test_split(X, y, test_size=args.test_size)
 
@@ -138,15 +123,33 @@ def main():
     model = build_model(use_xgb=use_xgb)
     model.fit(X_train, y_train)
 
-    metrics = evaluate(model, X_test, y_test)
+    metrics = evaluate(model, X_test, y_test, args.n_boot, args.boot_seed, boot_jobs(args))
 
     # Persist artifacts
     os.makedirs(os.path.dirname(args.model_out), exist_ok=True)
     joblib.dump(model, args.model_out)
+    # Exportación ligera (NumPy puro) para predict_mvp --model model.json
+    model_json = None
+    if not use_xgb:
+        export_logistic(
+            model, meta["feature_names"], args.model_json_out,
+            args.rating_engine, args.elo_k, args.elo_base,
+        )
+        model_json = args.model_json_out
 
     with open(args.metrics_out, "w", encoding="utf-8") as f:
         json.dump(metrics, f, indent=2)
 
+    # Estado Elo tras todo el histórico: permite predecir partidos nuevos sin
+    # repetir el recorrido desde el inicio (ver predict_mvp --elo-state). Con
+    # glicko2 no se escribe: ese estado solo reproduce las features Elo
+    elo_state_path = None
+    if args.rating_engine == "elo":
+        elo_state = EloState(config=EloConfig(base=args.elo_base, k=args.elo_k))
+        elo_state.update(df)
+        elo_state.save(args.elo_state_out)
+        elo_state_path = args.elo_state_out
+
     train_info = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "n_total": int(len(df)),
@@ -154,16 +157,43 @@ def main():
         "n_test": int(len(y_test)),
         "elo_k": args.elo_k,
         "elo_base": args.elo_base,
+        "feature_set": args.feature_set,
+        "rating_engine": args.rating_engine,
         "features": meta["feature_names"],
         "model_type": "XGBoost" if use_xgb else "LogisticRegression",
         "csv_path": args.csv_path,
+        "elo_state_path": elo_state_path,
+        "model_json_path": model_json,
     }
     with open(args.train_info_out, "w", encoding="utf-8") as f:
         json.dump(train_info, f, indent=2)
 
     print("Entrenamiento completado.")
-    print("Métricas (test temporal):", json.dumps(metrics, indent=2))
+    print("Métricas (test temporal):", json.dumps({k: v for k, v in metrics.items() if k != "bootstrap"}, indent=2))
+    if "bootstrap" in metrics:
+        from mvp_model.utils.bootstrap import summary_lines
+
+        b = metrics["bootstrap"]
+        print(f"IC {1 - b['alpha']:.0%} ({b['n_boot']} remuestras) y diferencia frente al Elo directo:")
+        print("\n".join(summary_lines(b)))
     print(f"Modelo guardado en: {args.model_out}")
+    if model_json:
+        print(f"Exportación JSON (sin sklearn) en: {model_json}")
+    return model
+
+
+def main():
+    args = parse_args()
+
+    from mvp_model.utils.features import load_features
+
+    df, X, info = load_features(
+        args.csv_path, args.elo_k, args.elo_base, args.feature_set,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        engine=args.rating_engine,
+        memory_mb=args.memory_mb,
+    )
+    train(args, df, X, info)
 
 
 if __name__ == "__main__":
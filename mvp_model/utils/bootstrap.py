@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Intervalos de confianza por bootstrap y comparación pareada de modelos sobre
+# el mismo bloque de test. Cada bloque de remuestras es una matriz de índices
+# (remuestras × partidos) que se convierte en pesos (cuántas veces entra cada
+# partido), así que todas las métricas de todos los modelos salen de unos
+# pocos productos matriz-vector. Los bloques tienen su propia semilla
+# (`SeedSequence(seed).spawn`, como utils/bracket.py): el resultado es el mismo
+# con cualquier número de procesos.
+
+METRICS = ("log_loss", "roc_auc", "brier", "accuracy")
+# Métricas que son media de una pérdida por partido (permutación = cambiar signos)
+_PER_MATCH = ("log_loss", "brier", "accuracy")
+# Métricas con p-valor de permutación pareada; ROC-AUC no es una media por
+# partido y se recalcula con las predicciones intercambiadas (_rank_auc)
+_PERMUTED = _PER_MATCH + ("roc_auc",)
+_EPS = 1e-15
+
+
+def _per_match(y: np.ndarray, P: np.ndarray) -> Dict[str, np.ndarray]:
+    # (modelos, partidos) por métrica; misma convención que utils/metrics.py
+    p = np.clip(P, _EPS, 1 - _EPS)
+    return {
+        "log_loss": -(y * np.log(p) + (1 - y) * np.log(1 - p)),
+        "brier": (P - y) ** 2,
+        "accuracy": ((P >= 0.5) == (y == 1)).astype(np.float64),
+    }
+
+
+def _weighted_auc(y: np.ndarray, p: np.ndarray, W: np.ndarray) -> np.ndarray:
+    # Mann-Whitney con pesos: por cada valor distinto de p, positivos × negativos
+    # por debajo (empates cuentan 1/2). NaN si falta una clase en la remuestra.
+    order = np.argsort(p, kind="stable")
+    ps = p[order]
+    starts = np.flatnonzero(np.r_[True, ps[1:] != ps[:-1]])
+    Wo = W[:, order]
+    yo = y[order]
+    pos = np.add.reduceat(Wo * yo, starts, axis=1)
+    neg = np.add.reduceat(Wo * (1 - yo), starts, axis=1)
+    below = np.cumsum(neg, axis=1) - neg
+    num = (pos * (below + 0.5 * neg)).sum(axis=1)
+    den = pos.sum(axis=1) * neg.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def _rank_auc(y: np.ndarray, S: np.ndarray) -> np.ndarray:
+    # AUC de cada fila de S (permutaciones, partidos) por suma de rangos de
+    # los positivos (empates = rango medio); NaN si falta una clase
+    n = S.shape[1]
+    n_pos = float(y.sum())
+    n_neg = n - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return np.full(len(S), np.nan)
+    order = np.argsort(S, axis=1, kind="stable")
+    v = np.take_along_axis(S, order, axis=1)
+    pos = np.arange(n)
+    starts = np.ones(v.shape, dtype=bool)
+    starts[:, 1:] = v[:, 1:] != v[:, :-1]
+    ends = np.ones(v.shape, dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, pos, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends, pos, n - 1)[:, ::-1], axis=1)[:, ::-1]
+    ranks = np.empty_like(S)
+    np.put_along_axis(ranks, order, (first + last) / 2.0 + 1.0, axis=1)
+    return (ranks @ y - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg)
+
+
+def _weighted_metrics(y: np.ndarray, P: np.ndarray, W: np.ndarray, losses: Dict[str, np.ndarray]) -> np.ndarray:
+    """(métricas, modelos, remuestras) con W = pesos (remuestras, partidos)."""
+    total = W.sum(axis=1)
+    out = np.empty((len(METRICS), len(P), len(W)))
+    for k, name in enumerate(METRICS):
+        if name == "roc_auc":
+            out[k] = [_weighted_auc(y, p, W) for p in P]
+        else:
+            out[k] = (losses[name] @ W.T) / total
+    return out
+
+
+def _run_chunk(args) -> Tuple[np.ndarray, np.ndarray]:
+    y, P, pairs, sizes, seeds = args
+    n = len(y)
+    losses = _per_match(y, P)
+    diffs = np.stack([[losses[m][a] - losses[m][b] for m in _PER_MATCH] for a, b in pairs]) if pairs else None
+    stats, perms = [], []
+    for size, seed in zip(sizes, seeds):
+        rng = np.random.default_rng(seed)
+        idx = rng.integers(0, n, size=(size, n))
+        W = np.bincount((idx + n * np.arange(size)[:, None]).ravel(), minlength=size * n).reshape(size, n)
+        stats.append(_weighted_metrics(y, P, W.astype(np.float64), losses))
+        if diffs is not None:
+            # Permutación pareada: intercambiar las predicciones de A y B en
+            # cada partido con probabilidad 1/2 = cambiar el signo de su diferencia
+            swap = rng.random((size, n)) < 0.5
+            signs = np.where(swap, -1.0, 1.0)
+            aucs = [_rank_auc(y, np.where(swap, P[b], P[a])) - _rank_auc(y, np.where(swap, P[a], P[b]))
+                    for a, b in pairs]
+            perms.append(np.concatenate([diffs @ signs.T / n, np.stack(aucs)[:, None]], axis=1))
+    perm = np.concatenate(perms, axis=-1) if perms else np.empty((0, len(_PERMUTED), 0))
+    return np.concatenate(stats, axis=-1), perm
+
+
+def resample_stats(
+    y: np.ndarray,
+    P: np.ndarray,
+    pairs: Sequence[Tuple[int, int]] = (),
+    n_boot: int = 2000,
+    seed: int = 0,
+    jobs: int = 1,
+    chunk_size: int = 250,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Métricas de `n_boot` remuestras con reemplazo de los partidos, las mismas
+    para todos los modelos de P (modelos, partidos). Devuelve (stats, perm):
+    stats (METRICS, modelos, n_boot) y, por cada par (a, b) de `pairs`, la
+    diferencia a - b bajo permutación pareada (pares, _PERMUTED, n_boot): media
+    de la pérdida por partido y, para ROC-AUC, AUC recalculado tras el
+    intercambio.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    P = np.atleast_2d(np.asarray(P, dtype=np.float64))
+    pairs = [tuple(p) for p in pairs]
+    n_chunks = max(1, -(-n_boot // chunk_size))
+    sizes = [chunk_size] * (n_chunks - 1) + [n_boot - chunk_size * (n_chunks - 1)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    if jobs <= 1 or n_chunks == 1:
+        return _run_chunk((y, P, pairs, sizes, seeds))
+    jobs = min(jobs, n_chunks)
+    # Bloques contiguos por proceso, concatenados en el orden de las semillas
+    bounds = np.linspace(0, n_chunks, jobs + 1).round().astype(int)
+    work = [(y, P, pairs, sizes[a:b], seeds[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        parts = list(ex.map(_run_chunk, work))
+    return np.concatenate([s for s, _ in parts], axis=-1), np.concatenate([p for _, p in parts], axis=-1)
+
+
+def _none(x: float) -> Optional[float]:
+    return None if x != x else float(x)
+
+
+def _interval(samples: np.ndarray, alpha: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    s = samples[~np.isnan(samples)]
+    if not len(s):
+        return None, None, None
+    lo, hi = np.percentile(s, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+    return float(lo), float(hi), float(s.std(ddof=1)) if len(s) > 1 else None
+
+
+def bootstrap_report(
+    y: np.ndarray,
+    probas: Dict[str, np.ndarray],
+    baseline: Optional[str] = None,
+    n_boot: int = 2000,
+    seed: int = 0,
+    alpha: float = 0.05,
+    jobs: int = 1,
+) -> dict:
+    """
+    IC percentil (1 - alpha) de LogLoss, ROC-AUC, Brier y accuracy de cada
+    modelo y, si hay `baseline`, la diferencia pareada modelo - baseline de
+    cada otro modelo con su IC y dos p-valores bilaterales: bootstrap (qué
+    fracción de remuestras cruza el 0) y permutación pareada (intercambiar
+    las predicciones de ambos modelos en cada partido con probabilidad 1/2;
+    None si falta una clase y el AUC no está definido).
+    """
+    y = np.asarray(y, dtype=np.float64)
+    names = list(probas)
+    P = np.stack([np.asarray(probas[m], dtype=np.float64) for m in names])
+    base = names.index(baseline) if baseline is not None else None
+    others = [i for i in range(len(names)) if base is not None and i != base]
+    pairs = [(i, base) for i in others]
+    stats, perm = resample_stats(y, P, pairs, n_boot, seed, jobs)
+    point = _weighted_metrics(y, P, np.ones((1, len(y))), _per_match(y, P))[..., 0]
+
+    out: dict = {"n_boot": int(n_boot), "seed": int(seed), "alpha": float(alpha), "models": {}}
+    for i, name in enumerate(names):
+        row = {}
+        for k, metric in enumerate(METRICS):
+            lo, hi, se = _interval(stats[k, i], alpha)
+            row[metric] = {"estimate": _none(point[k, i]), "lo": lo, "hi": hi, "se": se}
+        out["models"][name] = row
+    if base is not None:
+        out["baseline"] = names[base]
+        out["paired"] = {}
+        for j, (i, b) in enumerate(pairs):
+            row = {}
+            for k, metric in enumerate(METRICS):
+                d = stats[k, i] - stats[k, b]
+                d = d[~np.isnan(d)]
+                lo, hi, _ = _interval(d, alpha)
+                p_boot = min(1.0, 2 * min(np.mean(d <= 0), np.mean(d >= 0))) if len(d) else None
+                p_perm = None
+                obs = point[k, i] - point[k, b]
+                null = perm[j, _PERMUTED.index(metric)]
+                if obs == obs:
+                    p_perm = float((1 + np.sum(np.abs(null) >= abs(obs) - 1e-12)) / (len(null) + 1))
+                row[metric] = {"diff": _none(point[k, i] - point[k, b]), "lo": lo, "hi": hi,
+                               "p_bootstrap": None if p_boot is None else float(p_boot), "p_permutation": p_perm}
+            out["paired"][names[i]] = row
+    return out
+
+
+def elo_probability(elo_diff: np.ndarray) -> np.ndarray:
+    """P(gana team1) del Elo directo, sin modelo (baseline de las comparaciones)."""
+    return 1.0 / (1.0 + 10 ** (-np.asarray(elo_diff, dtype=np.float64) / 400.0))
+
+
+def model_vs_elo(y: np.ndarray, proba: np.ndarray, elo_diff: np.ndarray, n_boot: int = 2000,
+                 seed: int = 0, jobs: int = 1) -> dict:
+    """
+    Bloque `bootstrap` de metrics.json: IC de las métricas del modelo y su
+    diferencia pareada frente al Elo directo (`elo_probability`) en el mismo
+    bloque de test.
+    """
+    report = bootstrap_report(y, {"model": proba, "elo": elo_probability(elo_diff)}, baseline="elo",
+                              n_boot=n_boot, seed=seed, jobs=jobs)
+    return {
+        "n_boot": report["n_boot"],
+        "seed": report["seed"],
+        "alpha": report["alpha"],
+        "ci": report["models"]["model"],
+        "elo": report["models"]["elo"],
+        "vs_elo": report["paired"]["model"],
+    }
+
+
+def summary_lines(block: dict) -> List[str]:
+    """Resumen legible del bloque de model_vs_elo (una línea por métrica)."""
+    lines = []
+    for metric in METRICS:
+        ci, d = block["ci"][metric], block["vs_elo"][metric]
+        if ci["estimate"] is None or ci["lo"] is None:
+            continue
+        line = f"{metric:<9} {ci['estimate']:.4f} [{ci['lo']:.4f}, {ci['hi']:.4f}]"
+        if d["diff"] is not None and d["lo"] is not None:
+            line += f" | vs Elo {d['diff']:+.4f} [{d['lo']:+.4f}, {d['hi']:+.4f}] p={d['p_bootstrap']:.3f}"
+        lines.append(line)
+    return lines
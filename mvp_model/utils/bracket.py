@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Un hueco de un partido del cuadro: ("seed", equipo) si el equipo entra ahí,
+# ("W", i) / ("L", i) si viene del ganador / perdedor del partido i
+Slot = Tuple[str, int]
+
+
+@dataclass
+class Bracket:
+    """
+    Topología de un cuadro (eliminación simple o doble, con byes) y los
+    grupos de posición final. `matches[i]` son los dos huecos del partido i
+    en orden topológico; `groups` son resultados terminales (ganador o
+    perdedor que no juega más) agrupados por ronda, de mejor a peor.
+    """
+
+    teams: List[str]
+    matches: List[Tuple[Slot, Slot]]
+    labels: List[str]  # ronda (`week`) de cada partido
+    match_ids: List[int]
+    # (etiqueta de posición, [(partido, "W"/"L"), ...]) de mejor a peor
+    groups: List[Tuple[str, List[Tuple[int, str]]]] = field(default_factory=list)
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.groups)
+
+
+def infer_bracket(matches: pd.DataFrame) -> Bracket:
+    """
+    Reconstruye la topología a partir de los partidos del cuadro en orden
+    cronológico (`team1`, `team2`, `team1_win`, `week`, `match_id`): el hueco
+    de un equipo en un partido sale de su partido anterior dentro del cuadro
+    (si lo ganó, "W"; si lo perdió, "L"); sin partido anterior, entra como
+    cabeza de serie. Sirve para cuadros de eliminación simple o doble.
+    """
+    teams: List[str] = []
+    team_idx: Dict[str, int] = {}
+    last: Dict[str, Slot] = {}
+    used: Dict[Slot, int] = {}
+    slots: List[Tuple[Slot, Slot]] = []
+    for i, (t1, t2, y) in enumerate(matches[["team1", "team2", "team1_win"]].itertuples(index=False)):
+        pair = []
+        for t in (t1, t2):
+            if t in last:
+                slot = last[t]
+            else:
+                if t not in team_idx:
+                    team_idx[t] = len(teams)
+                    teams.append(t)
+                slot = ("seed", team_idx[t])
+            if slot[0] != "seed":
+                if slot in used:
+                    raise ValueError(f"{t}: el resultado {slot} alimenta dos partidos ({used[slot]} y {i})")
+                used[slot] = i
+            pair.append(slot)
+        slots.append((pair[0], pair[1]))
+        last[t1] = ("W", i) if y == 1 else ("L", i)
+        last[t2] = ("L", i) if y == 1 else ("W", i)
+
+    depth = []
+    for a, b in slots:
+        depth.append(1 + max((depth[s[1]] if s[0] != "seed" else 0) for s in (a, b)))
+    labels = matches["week"].astype(str).tolist()
+
+    # Resultados terminales agrupados por (ronda, W/L); mejor = más profundo, y
+    # en el mismo partido el ganador antes que el perdedor
+    by_key: Dict[Tuple[str, str], List[Tuple[int, str]]] = {}
+    for i in range(len(slots)):
+        for kind in ("W", "L"):
+            if (kind, i) not in used:
+                by_key.setdefault((labels[i], kind), []).append((i, kind))
+    order = sorted(by_key, key=lambda k: (-max(depth[i] for i, _ in by_key[k]), k[1] != "W"))
+    groups = []
+    place = 1
+    for key in order:
+        size = len(by_key[key])
+        groups.append((str(place) if size == 1 else f"{place}-{place + size - 1}", by_key[key]))
+        place += size
+    if place - 1 != len(teams):
+        raise ValueError(f"El cuadro no cierra: {place - 1} posiciones para {len(teams)} equipos")
+    return Bracket(
+        teams=teams,
+        matches=slots,
+        labels=labels,
+        match_ids=matches["match_id"].astype(int).tolist(),
+        groups=groups,
+    )
+
+
+def simulate_chunk(bracket: Bracket, P: np.ndarray, fixed: np.ndarray, n_sims: int,
+                   seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    `n_sims` torneos a la vez: cada partido se resuelve para todas las
+    simulaciones con un vector de uniformes. `P[i, a, b]` = P(a gana a b en el
+    partido i); `fixed[i]` = 1/0 si el partido ya se jugó (team1 ganó/perdió),
+    -1 si se simula. Devuelve conteos (equipos, grupos de posición).
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = len(bracket.teams)
+    W: List[np.ndarray] = []
+    L: List[np.ndarray] = []
+
+    def team(slot: Slot) -> np.ndarray:
+        kind, j = slot
+        if kind == "seed":
+            return np.full(n_sims, j, dtype=np.intp)
+        return W[j] if kind == "W" else L[j]
+
+    for i, (s1, s2) in enumerate(bracket.matches):
+        a, b = team(s1), team(s2)
+        if fixed[i] >= 0:
+            win = np.full(n_sims, bool(fixed[i]))
+        else:
+            win = rng.random(n_sims) < P[i].ravel()[a * n_teams + b]
+        W.append(np.where(win, a, b))
+        L.append(np.where(win, b, a))
+
+    counts = np.zeros((n_teams, bracket.n_groups), dtype=np.int64)
+    for g, (_, members) in enumerate(bracket.groups):
+        for i, kind in members:
+            counts[:, g] += np.bincount((W if kind == "W" else L)[i], minlength=n_teams)
+    return counts
+
+
+def _run_chunks(args) -> np.ndarray:
+    bracket, P, fixed, sizes, seeds = args
+    return sum(simulate_chunk(bracket, P, fixed, n, s) for n, s in zip(sizes, seeds))
+
+
+def simulate_bracket(bracket: Bracket, P: np.ndarray, fixed: Optional[Sequence[int]] = None,
+                     n_sims: int = 1_000_000, seed: int = 0, chunk_size: int = 10_000,
+                     jobs: int = 1) -> np.ndarray:
+    """
+    Conteos (equipos, grupos) de `n_sims` torneos en bloques de `chunk_size`.
+    Cada bloque tiene su semilla (`SeedSequence(seed).spawn`), así que el
+    resultado es el mismo con cualquier número de procesos (`jobs`).
+    """
+    fixed = np.full(len(bracket.matches), -1, dtype=np.int8) if fixed is None else np.asarray(fixed, dtype=np.int8)
+    n_chunks = max(1, -(-n_sims // chunk_size))
+    sizes = [chunk_size] * (n_chunks - 1) + [n_sims - chunk_size * (n_chunks - 1)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    if jobs <= 1 or n_chunks == 1:
+        return _run_chunks((bracket, P, fixed, sizes, seeds))
+    jobs = min(jobs, n_chunks)
+    # Bloques contiguos por proceso: cada worker recibe el cuadro y P una vez
+    bounds = np.linspace(0, n_chunks, jobs + 1).round().astype(int)
+    work = [(bracket, P, fixed, sizes[a:b], seeds[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        return sum(ex.map(_run_chunks, work))
+
+
+def placement_table(bracket: Bracket, counts: np.ndarray, n_sims: int) -> pd.DataFrame:
+    """Una fila por equipo: P(cada grupo de posición) y posición media esperada."""
+    probs = counts / float(n_sims)
+    out = pd.DataFrame(probs, columns=[f"p_{label}" for label, _ in bracket.groups])
+    out.insert(0, "team", bracket.teams)
+    # Punto medio de cada rango ("5-6" -> 5.5)
+    mids = np.array([np.mean([int(x) for x in label.split("-")]) for label, _ in bracket.groups])
+    out["expected_place"] = probs @ mids
+    return out
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from mvp_model.utils.masters import ENTITY_COLUMNS, entity_id_columns, ids_sibling, iter_indexed, resolve_ids, typed_sibling
+from mvp_model.utils.schema import base_name, normalize, parse_dates, source_columns
+
+# Columna de fecha y de partido de cada maestro (los que no tienen fecha se
+# filtran por fecha a través de los match_id de matches.csv)
+DATE_COLUMNS = {"matches": "date", "detailed_matches_overview": "date", "detailed_matches_player_stats": "match_date"}
+MATCH_ID_COLUMNS = {"performance_data": "Match ID"}
+NO_MATCH_ID = {"agents_stats", "event_info", "maps_stats"}
+
+DEFAULT_MEMORY_MB = 64.0
+_SAMPLE_ROWS = 2000
+# Un bloque convive con su copia tipada y la filtrada: margen sobre el tamaño en crudo
+_CHUNK_OVERHEAD = 3.0
+
+
+def match_id_column(base: str) -> Optional[str]:
+    return None if base in NO_MATCH_ID else MATCH_ID_COLUMNS.get(base, "match_id")
+
+
+def chunk_rows_for(csv_path: str, columns: Optional[Sequence[str]] = None, memory_mb: float = DEFAULT_MEMORY_MB) -> int:
+    """
+    Filas por bloque para no superar `memory_mb`: mide la memoria por fila
+    (columnas object incluidas) en una muestra del CSV.
+    """
+    usecols = None if columns is None else (lambda c, wanted=set(columns): c in wanted)
+    sample = pd.read_csv(csv_path, usecols=usecols, nrows=_SAMPLE_ROWS, low_memory=False)
+    if sample.empty:
+        return _SAMPLE_ROWS
+    per_row = sample.memory_usage(deep=True, index=False).sum() / len(sample)
+    return max(100, int(memory_mb * 1024 * 1024 / (per_row * _CHUNK_OVERHEAD)))
+
+
+def _match_ids_between(masters_dir: str, start, end, memory_mb: float) -> set:
+    ids: set = set()
+    for chunk in iter_master(os.path.join(masters_dir, "matches.csv"), ["match_id"], start=start, end=end,
+                             typed=False, memory_mb=memory_mb):
+        ids.update(int(x) for x in chunk["match_id"].dropna())
+    return ids
+
+
+def _indexed_chunks(csv_path: str, columns: Optional[List[str]], chunk_rows: int, typed: bool,
+                    ids: Optional[set], start, end) -> Optional[Iterator[pd.DataFrame]]:
+    # Solo los rangos de bytes de los partidos que pasan el filtro (índice .mindex.json)
+    base = base_name(csv_path)
+    read_cols = None if columns is None else (source_columns(base, columns) if typed else columns)
+    chunks = iter_indexed(csv_path, ids, start, end, read_cols, chunk_rows)
+    if chunks is None or not typed:
+        return chunks
+    return (normalize(chunk, base) for chunk in chunks)
+
+
+def _raw_chunks(csv_path: str, columns: Optional[List[str]], chunk_rows: int, typed: bool) -> Iterator[pd.DataFrame]:
+    base = base_name(csv_path)
+    typed_path = typed_sibling(csv_path) if typed else None
+    if typed_path is not None:
+        try:
+            import pyarrow.parquet as pq  # type: ignore
+        except Exception:  # pragma: no cover
+            pq = None
+        if pq is not None:
+            pf = pq.ParquetFile(typed_path)
+            cols = None if columns is None else [c for c in columns if c in set(pf.schema_arrow.names)]
+            for batch in pf.iter_batches(batch_size=chunk_rows, columns=cols):
+                yield batch.to_pandas()
+            return
+    read_cols = None if columns is None else set(source_columns(base, columns) if typed else columns)
+    usecols = None if read_cols is None else (lambda c: c in read_cols)
+    for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunk_rows, low_memory=False):
+        if typed:
+            chunk = normalize(chunk, base)
+            if columns is not None:
+                chunk = chunk[[c for c in columns if c in chunk.columns]]
+        yield chunk
+
+
+def iter_master(
+    csv_path: str,
+    columns: Optional[Iterable[str]] = None,
+    *,
+    start=None,
+    end=None,
+    tournaments: Optional[Iterable[str]] = None,
+    match_ids: Optional[Iterable] = None,
+    typed: bool = True,
+    memory_mb: float = DEFAULT_MEMORY_MB,
+    chunk_rows: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Recorre un CSV maestro por bloques sin cargarlo entero. Cada bloque sale
+    ya filtrado:
+
+    - `start`/`end`: rango de fechas inclusivo (columna de DATE_COLUMNS; en
+      maestros sin fecha, vía los match_id de matches.csv de la misma carpeta).
+    - `tournaments`: valores de `tournament_name`.
+    - `match_ids`: conjunto de partidos (`match_id` o `Match ID`).
+
+    Con `typed` (por defecto) los bloques salen normalizados con el esquema de
+    utils/schema.py (del `.typed.parquet` si está al día); con `typed=False`,
+    con los tipos de `pd.read_csv`. `columns` son las columnas de salida; las
+    de los filtros se leen aparte y no se devuelven si no se piden. El tamaño
+    de bloque se deriva de `memory_mb` (o se fija con `chunk_rows`).
+
+    Con filtro de partidos o fechas y un índice `.csv.mindex.json` al día
+    (merge) solo se leen los rangos de bytes de esos partidos.
+
+    Las columnas `<col>_id` del registro de entidades salen como en
+    `read_master`: del sidecar `.ids.csv` en una lectura completa y, si se
+    leen rangos o no hay sidecar al día, resueltas con el registro.
+    """
+    base = base_name(csv_path)
+    wanted = list(columns) if columns is not None else None
+    id_cols = entity_id_columns(csv_path, wanted) if wanted is not None else {}
+    date_col = DATE_COLUMNS.get(base)
+    mid_col = match_id_column(base)
+    ids = None if match_ids is None else {int(x) for x in match_ids}
+    if (start is not None or end is not None) and date_col is None:
+        if mid_col is None:
+            raise ValueError(f"{base} no tiene fecha ni match_id: no se puede filtrar por fecha")
+        in_range = _match_ids_between(os.path.dirname(csv_path), start, end, memory_mb)
+        ids = in_range if ids is None else ids & in_range
+        start = end = None
+    if ids is not None and mid_col is None:
+        raise ValueError(f"{base} no tiene match_id: no se puede filtrar por partido")
+    tset = None if tournaments is None else set(tournaments)
+
+    read_cols = wanted
+    if wanted is not None:
+        plain = [c for c in wanted if c not in id_cols]
+        extra = [c for c, on in ((date_col, start is not None or end is not None), (mid_col, ids is not None),
+                                 ("tournament_name", tset is not None)) if on and c not in plain]
+        extra += [src for src in id_cols.values() if src not in plain + extra]
+        read_cols = plain + extra
+    if chunk_rows is None:
+        src = None if read_cols is None else (source_columns(base, read_cols) if typed else read_cols)
+        chunk_rows = chunk_rows_for(csv_path, src, memory_mb)
+    lo = pd.Timestamp(start) if start is not None else None
+    hi = pd.Timestamp(end) if end is not None else None
+
+    chunks = None
+    if ids is not None or lo is not None or hi is not None:
+        chunks = _indexed_chunks(csv_path, read_cols, chunk_rows, typed, ids, start, end)
+    id_table = None
+    if chunks is None:
+        chunks = _raw_chunks(csv_path, read_cols, chunk_rows, typed)
+        # Lectura completa, en el orden del CSV: el sidecar se alinea por fila
+        ids_path = ids_sibling(csv_path) if id_cols else None
+        if ids_path is not None:
+            id_table = pd.read_csv(ids_path, usecols=lambda c: c in id_cols, dtype="int32")
+            if not set(id_cols) <= set(id_table.columns):
+                id_table = None
+    kinds = {src: ENTITY_COLUMNS[base][src] for src in id_cols.values()}
+    offset = 0
+    for chunk in chunks:
+        if id_cols:
+            part = id_table.iloc[offset:offset + len(chunk)] if id_table is not None else None
+            offset += len(chunk)
+            if part is not None and len(part) == len(chunk):
+                for c in id_cols:
+                    chunk[c] = part[c].to_numpy()
+            else:
+                chunk = resolve_ids(chunk, kinds, os.path.dirname(csv_path) or ".")
+        mask = np.ones(len(chunk), dtype=bool)
+        if lo is not None or hi is not None:
+            dates = parse_dates(chunk[date_col], date_col)
+            if lo is not None:
+                mask &= (dates >= lo).fillna(False).to_numpy(dtype=bool)
+            if hi is not None:
+                mask &= (dates <= hi).fillna(False).to_numpy(dtype=bool)
+        if ids is not None:
+            mask &= pd.to_numeric(chunk[mid_col], errors="coerce").isin(ids).to_numpy(dtype=bool)
+        if tset is not None:
+            mask &= chunk["tournament_name"].astype(str).isin(tset).to_numpy(dtype=bool)
+        if not mask.all():
+            chunk = chunk[mask]
+        if wanted is not None:
+            chunk = chunk[[c for c in wanted if c in chunk.columns]]
+        if len(chunk):
+            yield chunk
+
+
+class StreamingMean:
+    """
+    Media por grupo acumulada bloque a bloque: cada bloque aporta sumas y
+    recuentos parciales (NaN no cuenta, como `groupby().mean()`) y los
+    parciales se compactan al pasar de `max_partials`. El orden de los grupos
+    es el de primera aparición, como `groupby(sort=False)`.
+    """
+
+    def __init__(self, keys: Sequence[str], values: Sequence[str], max_partials: int = 8):
+        self.keys = list(keys)
+        self.values = list(values)
+        self.max_partials = max_partials
+        self._partials: List[pd.DataFrame] = []
+
+    def _reduce(self, frames: List[pd.DataFrame]) -> pd.DataFrame:
+        return pd.concat(frames).groupby(level=list(range(len(self.keys))), sort=False).sum()
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        g = chunk.groupby(self.keys, sort=False)[self.values]
+        part = g.sum(min_count=1).fillna(0.0).join(g.count(), rsuffix="__n")
+        self._partials.append(part)
+        if len(self._partials) > self.max_partials:
+            self._partials = [self._reduce(self._partials)]
+
+    def result(self) -> pd.DataFrame:
+        if not self._partials:
+            return pd.DataFrame(columns=self.keys + self.values)
+        total = self._reduce(self._partials)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = pd.DataFrame(
+                {v: total[v].to_numpy(dtype=np.float64) / total[f"{v}__n"].to_numpy(dtype=np.float64)
+                 for v in self.values},
+                index=total.index,
+            )
+        return out.reset_index()
+
+
+class StageMemory:
+    """
+    Pico de memoria (tracemalloc: objetos de Python y buffers de NumPy/pandas)
+    y duración de cada etapa: `with mem.stage("nombre"): ...`.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            self.stages[name] = {"peak_mb": max(0, peak - base) / (1024 * 1024), "seconds": time.perf_counter() - t0}
+            if started:
+                tracemalloc.stop()
+
+    def report(self) -> str:
+        lines = [f"{'etapa':<28}{'pico (MB)':>11}{'tiempo (s)':>12}"]
+        for name, s in self.stages.items():
+            lines.append(f"{name:<28}{s['peak_mb']:>11.2f}{s['seconds']:>12.3f}")
+        return "\n".join(lines)
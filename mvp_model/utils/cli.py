@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import argparse
+import os
+
+# Solo argparse: los CLIs lo importan sin arrastrar pandas/NumPy
+DEFAULT_CACHE_DIR = "mvp_model/artifacts/cache"
+RATING_ENGINES = ("elo", "glicko2")
+
+
+def add_cache_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directorio de la caché de features")
+    p.add_argument("--no-cache", action="store_true", help="No leer ni escribir la caché de features")
+
+
+def add_feature_set_arg(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--feature-set",
+        default="elo",
+        help="Set de features (FEATURE_SETS en utils/features.py): "
+        "elo, elo+rd (Elo + incertidumbre; requiere --rating-engine glicko2), elo+form (forma EWMA de los jugadores), elo+form_all (ventana móvil + EWMA), "
+        "elo+econ (eficiencia económica EWMA por equipo) o elo+form+econ",
+    )
+
+
+def add_memory_arg(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--memory-mb",
+        type=float,
+        default=None,
+        help="Techo de memoria (MB) por bloque al leer los maestros de jugadores para la forma "
+        "(utils/chunks.py; por defecto se cargan enteros). No cambia las features ni la clave de la caché",
+    )
+
+
+def add_bootstrap_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--n-boot", type=int, default=2000, help="Remuestras bootstrap para los IC y la comparación pareada (0 = no calcular)")
+    p.add_argument("--boot-seed", type=int, default=0, help="Semilla del bootstrap (mismo resultado con cualquier --boot-jobs)")
+    p.add_argument("--boot-jobs", type=int, default=1, help="Procesos para el bootstrap (0 = todos los núcleos)")
+
+
+def boot_jobs(args: argparse.Namespace) -> int:
+    return args.boot_jobs if args.boot_jobs > 0 else (os.cpu_count() or 1)
+
+
+def add_rating_engine_arg(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--rating-engine",
+        default="elo",
+        choices=RATING_ENGINES,
+        help="Motor de ratings de equipo: elo (K fijo) o glicko2 (rating + incertidumbre, "
+        "un lote por día de partidos; ver utils/glicko.py)",
+    )
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mvp_model.utils.form import FormConfig, FormState
+from mvp_model.utils.masters import read_master
+
+ECONOMY_FILE = "economy_data.csv"
+
+ECONOMY_COLUMNS = [
+    "match_id", "map", "Team", "Pistol Won", "Eco (won)", "Semi-eco (won)", "Semi-buy (won)", "Full buy(won)",
+]
+# Columnas "jugadas (ganadas)" -> prefijo de las columnas tipadas <tipo>_played / <tipo>_won
+BUY_COLUMNS = {"Eco (won)": "eco", "Semi-eco (won)": "semi_eco", "Semi-buy (won)": "semi_buy", "Full buy(won)": "full_buy"}
+ALL_MAPS = "All Maps"
+_PLAYED_WON = r"^\s*(?P<played>\d+)\s*\(\s*(?P<won>\d+)\s*\)\s*$"
+
+# Tasas por equipo y partido que alimentan las features (ganadas / jugadas)
+ECON_STATS = ["pistol_rate", "eco_rate", "semi_eco_rate", "semi_buy_rate", "full_buy_rate", "round_rate"]
+
+def econ_columns(kinds: Tuple[str, ...] = ("roll", "ewm")) -> List[str]:
+    """Nombres de las features (diferencia team1 - team2 de la eficiencia económica)."""
+    return [f"econ_{kind}_{stat}_diff" for kind in kinds for stat in ECON_STATS]
+
+
+def economy_sources(masters_dir: str) -> List[str]:
+    """CSV maestros que usan las features de economía (además de matches.csv)."""
+    return [os.path.join(masters_dir, ECONOMY_FILE)]
+
+
+def split_played_won(cells: pd.Series, use_arrow: Optional[bool] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(jugadas, ganadas) como float64 (NaN si la celda no encaja) con una sola pasada de regex."""
+    if use_arrow is None:
+        use_arrow = importlib.util.find_spec("pyarrow") is not None
+    if use_arrow:
+        # Con pyarrow la regex corre en Arrow (RE2) y la conversión a entero
+        # también: ~10x más rápido que `str.extract` sobre el dtype por defecto
+        import pyarrow as pa  # type: ignore
+
+        parts = cells.astype(pd.ArrowDtype(pa.string())).str.extract(_PLAYED_WON).astype(pd.ArrowDtype(pa.int32()))
+    else:
+        parts = cells.astype(str).str.extract(_PLAYED_WON).apply(pd.to_numeric)
+    return (parts["played"].to_numpy(dtype=np.float64, na_value=np.nan),
+            parts["won"].to_numpy(dtype=np.float64, na_value=np.nan))
+
+
+def parse_economy(raw: pd.DataFrame, use_arrow: Optional[bool] = None) -> pd.DataFrame:
+    """
+    Tipa economy_data.csv: cada celda "jugadas (ganadas)" ("14 (10)") pasa a
+    `<tipo>_played` / `<tipo>_won` (Int32, <NA> si no se puede leer). Todas
+    las celdas de las cuatro columnas se apilan en una sola Series y se
+    parsean con una única pasada de regex vectorizada.
+    """
+    cols = [c for c in BUY_COLUMNS if c in raw.columns]
+    n = len(raw)
+    played, won = split_played_won(pd.concat([raw[c] for c in cols], ignore_index=True), use_arrow)
+    played = played.reshape(len(cols), n)
+    won = won.reshape(len(cols), n)
+
+    out = pd.DataFrame({
+        "match_id": raw["match_id"].to_numpy(),
+        "map": raw["map"].astype(str).str.strip().to_numpy(),
+        "team": raw["Team"].astype(str).str.strip().to_numpy(),
+        "pistol_won": pd.to_numeric(raw["Pistol Won"], errors="coerce").astype("Int32").to_numpy(),
+    })
+    for i, c in enumerate(cols):
+        out[f"{BUY_COLUMNS[c]}_played"] = pd.array(played[i], dtype="Int32")
+        out[f"{BUY_COLUMNS[c]}_won"] = pd.array(won[i], dtype="Int32")
+    return out
+
+
+def load_economy(economy_csv: str, matches: pd.DataFrame) -> pd.DataFrame:
+    """
+    Una fila por (partido, `team_id`): rondas jugadas/ganadas por tipo de
+    compra sumadas sobre los mapas del partido (la fila "All Maps" solo si el
+    partido no tiene filas por mapa) y las tasas de ECON_STATS (NaN si no se
+    jugó ninguna ronda de ese tipo). Las abreviaturas de economy_data se
+    cruzan con `team1_id`/`team2_id` de `matches` por el ID del registro de
+    entidades (`Team_id`); se descartan las filas de otros equipos.
+    """
+    raw = read_master(economy_csv, columns=ECONOMY_COLUMNS + ["Team_id"])
+    eco = parse_economy(raw).assign(team_id=raw["Team_id"].to_numpy())
+    per_map = eco["map"] != ALL_MAPS
+    eco = eco[per_map | ~eco["match_id"].isin(eco.loc[per_map, "match_id"])]
+    counts = [c for c in eco.columns if c.endswith(("_played", "_won"))]
+    agg = (eco.assign(n_maps=per_map.astype(np.int64))
+           .groupby(["match_id", "team_id"], sort=False)[counts + ["n_maps"]].sum().reset_index())
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = agg[counts + ["n_maps"]].to_numpy(dtype=np.float64)
+        col = {c: values[:, i] for i, c in enumerate(counts + ["n_maps"])}
+        agg["pistol_rate"] = np.where(col["n_maps"] > 0, col["pistol_won"] / (2.0 * col["n_maps"]), np.nan)
+        played = np.zeros(len(agg))
+        won = np.zeros(len(agg))
+        for prefix in BUY_COLUMNS.values():
+            p, w = col[f"{prefix}_played"], col[f"{prefix}_won"]
+            agg[f"{prefix}_rate"] = np.where(p > 0, w / p, np.nan)
+            played += p
+            won += w
+        agg["round_rate"] = np.where(played > 0, won / played, np.nan)
+
+    pairs = agg.merge(matches[["match_id", "team1_id", "team2_id"]].drop_duplicates("match_id"), on="match_id")
+    own = (pairs["team_id"] >= 0) & ((pairs["team_id"] == pairs["team1_id"]) | (pairs["team_id"] == pairs["team2_id"]))
+    pairs = pairs[own]
+    return pairs[["match_id", "team_id", "n_maps"] + counts + ECON_STATS].reset_index(drop=True)
+
+
+def team_arrays(df: pd.DataFrame, economy: pd.DataFrame, state: FormState) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (teams, obs) alineados con `df` con la forma que espera FormState:
+    cada lado es un "roster" de un solo miembro, el equipo. Partidos sin
+    datos de economía cuentan en la ventana del equipo como hueco (NaN).
+    """
+    n = len(df)
+    team1 = df["team1_id"].tolist()
+    team2 = df["team2_id"].tolist()
+    codes = state.codes(team1 + team2)
+    teams = np.stack([codes[:n], codes[n:]], axis=1).reshape(n, 2, 1)
+    stats = economy.set_index(["match_id", "team_id"])[ECON_STATS]
+    obs = np.empty((n, 2, 1, len(ECON_STATS)))
+    for side, ids in enumerate((team1, team2)):
+        idx = pd.MultiIndex.from_arrays([df["match_id"].to_numpy(), ids])
+        obs[:, side, 0] = stats.reindex(idx).to_numpy(dtype=np.float64)
+    return teams, obs
+
+
+def build_economy_features(df: pd.DataFrame, masters_dir: str = "masters_csvs",
+                           config: Optional[FormConfig] = None) -> pd.DataFrame:
+    """
+    Features de economía pre-partido alineadas con `df` (orden cronológico,
+    con `team1_id`/`team2_id`): tasas de victoria por tipo de compra de cada
+    equipo en ventana móvil y con decaimiento exponencial (el mismo estado
+    incremental que la forma de jugadores), como diferencia team1 - team2
+    (econ_columns()).
+    """
+    economy = load_economy(os.path.join(masters_dir, ECONOMY_FILE), df)
+    state = FormState(config, n_stats=len(ECON_STATS))
+    teams, obs = team_arrays(df, economy, state)
+    roll, ewm = state.process(teams, obs)
+    diff = np.concatenate([roll[:, 0] - roll[:, 1], ewm[:, 0] - ewm[:, 1]], axis=1)
+    return pd.DataFrame(diff, columns=econ_columns(), index=df.index)
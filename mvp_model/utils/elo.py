@@ -1,20 +1,187 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict
+from typing import Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+# Núcleo sin pandas ni numba (también lo usa la ruta ligera de predict_mvp); se re-exporta aquí
+from mvp_model.utils.cli import RATING_ENGINES
+from mvp_model.utils.elo_core import EloConfig, EloState, elo_loop as _elo_loop, expected_score
+from mvp_model.utils.glicko import GlickoConfig, glicko_pass, rating_periods
 
-@dataclass
-class EloConfig:
-    base: float = 1500.0
-    k: float = 32.0
+__all__ = [
+    "HAS_NUMBA",
+    "EloConfig",
+    "EloState",
+    "expected_score",
+    "encode_teams",
+    "elo_pass",
+    "elo_pass_batch",
+    "build_elo_features",
+    "RATING_ENGINES",
+]
 
+try:
+    from numba import njit  # type: ignore
+    HAS_NUMBA = True
+except Exception:  # pragma: no cover
+    HAS_NUMBA = False
 
-def expected_score(r_a: float, r_b: float) -> float:
-    return 1.0 / (1.0 + 10 ** ((r_b - r_a) / 400.0))
+
+if HAS_NUMBA:
+    _elo_loop_jit = njit(cache=True, nogil=True)(_elo_loop)
+
+
+def encode_teams(df: pd.DataFrame, team1_col: str, team2_col: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Codifica ambos lados del partido con un único `pd.factorize`, de modo que
+    un mismo equipo recibe el mismo código sea team1 o team2.
+
+    Si df trae `<col>_id` (registro de equipos del merge, ver load_matches)
+    y todos los alias están resueltos, se factorizan esos enteros: los alias
+    de un mismo equipo comparten código sin normalizar cadenas.
+
+    Devuelve (codes1, codes2, teams) con teams[code] = nombre.
+    """
+    n = len(df)
+    names = pd.concat(
+        [df[team1_col].astype(str), df[team2_col].astype(str)],
+        ignore_index=True,
+    )
+    id1, id2 = f"{team1_col}_id", f"{team2_col}_id"
+    if id1 in df.columns and id2 in df.columns:
+        ids = np.concatenate([df[id1].to_numpy(dtype=np.int64), df[id2].to_numpy(dtype=np.int64)])
+        if n and ids.min() >= 0:
+            codes, _ = pd.factorize(ids, sort=False)
+            codes = codes.astype(np.int64, copy=False)
+            # Los códigos siguen el orden de aparición: nombre = el de la primera
+            first = np.unique(codes, return_index=True)[1]
+            return codes[:n], codes[n:], names.to_numpy(dtype=object)[first]
+    codes, teams = pd.factorize(names, sort=False)
+    codes = codes.astype(np.int64, copy=False)
+    return codes[:n], codes[n:], np.asarray(teams, dtype=object)
+
+
+def elo_pass(
+    codes1: np.ndarray,
+    codes2: np.ndarray,
+    y: np.ndarray,
+    ratings: np.ndarray,
+    elo_k: float = 32.0,
+    use_jit: Optional[bool] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Recorre los partidos codificados en orden y devuelve los ratings previos a
+    cada partido. `ratings` es el rating inicial por código de equipo; no se
+    modifica (se devuelve una copia actualizada).
+
+    Devuelve (elo1_before, elo2_before, ratings_after).
+    """
+    n = len(codes1)
+    if use_jit is None:
+        use_jit = HAS_NUMBA
+    y = np.asarray(y, dtype=np.float64)
+    if use_jit and HAS_NUMBA:
+        r = np.array(ratings, dtype=np.float64)
+        out1 = np.empty(n, dtype=np.float64)
+        out2 = np.empty(n, dtype=np.float64)
+        _elo_loop_jit(
+            np.ascontiguousarray(codes1, dtype=np.int64),
+            np.ascontiguousarray(codes2, dtype=np.int64),
+            y, r, float(elo_k), out1, out2,
+        )
+        return out1, out2, r
+
+    # Sin numba: listas planas de floats de Python (evita el boxing de
+    # escalares NumPy, que es lo que hace lento indexar arrays en un bucle)
+    r_list = np.asarray(ratings, dtype=np.float64).tolist()
+    out1_l = [0.0] * n
+    out2_l = [0.0] * n
+    _elo_loop(
+        np.asarray(codes1).tolist(),
+        np.asarray(codes2).tolist(),
+        y.tolist(), r_list, float(elo_k), out1_l, out2_l,
+    )
+    return (
+        np.array(out1_l, dtype=np.float64),
+        np.array(out2_l, dtype=np.float64),
+        np.array(r_list, dtype=np.float64),
+    )
+
+
+def _elo_batch_loop(codes1, codes2, y, ratings, ks, hfas, out1, out2):
+    # ratings: (n_configs, n_teams); una sola pasada por los partidos para todas
+    # las configuraciones (numba)
+    n_cfg = ratings.shape[0]
+    for i in range(len(codes1)):
+        a = codes1[i]
+        b = codes2[i]
+        yi = y[i]
+        for c in range(n_cfg):
+            r1 = ratings[c, a]
+            r2 = ratings[c, b]
+            out1[c, i] = r1
+            out2[c, i] = r2
+            if yi == yi:
+                e1 = 1.0 / (1.0 + 10 ** ((r2 - (r1 + hfas[c])) / 400.0))
+                e2 = 1.0 - e1
+                ratings[c, a] = r1 + ks[c] * (yi - e1)
+                ratings[c, b] = r2 + ks[c] * ((1.0 - yi) - e2)
+
+
+if HAS_NUMBA:
+    _elo_batch_loop_jit = njit(cache=True, nogil=True)(_elo_batch_loop)
+
+
+def elo_pass_batch(
+    codes1: np.ndarray,
+    codes2: np.ndarray,
+    y: np.ndarray,
+    n_teams: int,
+    ks: np.ndarray,
+    bases: np.ndarray,
+    hfas: Optional[np.ndarray] = None,
+    use_jit: Optional[bool] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trayectorias de Elo para muchas configuraciones (K, base, ventaja de team1)
+    en una sola pasada por los partidos. `hfa` suma puntos a team1 solo en el
+    score esperado. Con hfa=0 y numba coincide bit a bit con `elo_pass`; el
+    camino NumPy (sin numba) puede diferir en el último ulp (potencia vectorizada).
+
+    Devuelve (elo1_before, elo2_before), cada uno de forma (n_configs, n_partidos).
+    """
+    ks = np.asarray(ks, dtype=np.float64)
+    bases = np.asarray(bases, dtype=np.float64)
+    hfas = np.zeros_like(ks) if hfas is None else np.asarray(hfas, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n_cfg, n = len(ks), len(codes1)
+    ratings = np.repeat(bases[:, None], n_teams, axis=1)
+    out1 = np.empty((n_cfg, n), dtype=np.float64)
+    out2 = np.empty((n_cfg, n), dtype=np.float64)
+    if use_jit is None:
+        use_jit = HAS_NUMBA
+    if use_jit and HAS_NUMBA:
+        _elo_batch_loop_jit(
+            np.ascontiguousarray(codes1, dtype=np.int64),
+            np.ascontiguousarray(codes2, dtype=np.int64),
+            y, ratings, ks, hfas, out1, out2,
+        )
+        return out1, out2
+
+    # Sin numba: bucle por partido, vectorizado sobre las configuraciones
+    for i, (a, b, yi) in enumerate(zip(np.asarray(codes1).tolist(), np.asarray(codes2).tolist(), y.tolist())):
+        r1 = ratings[:, a].copy()
+        r2 = ratings[:, b].copy()
+        out1[:, i] = r1
+        out2[:, i] = r2
+        if yi == yi:
+            e1 = 1.0 / (1.0 + 10 ** ((r2 - (r1 + hfas)) / 400.0))
+            e2 = 1.0 - e1
+            ratings[:, a] = r1 + ks * (yi - e1)
+            ratings[:, b] = r2 + ks * ((1.0 - yi) - e2)
+    return out1, out2
 
 
 def build_elo_features(
@@ -24,41 +191,47 @@ def build_elo_features(
     label_col: str,
     elo_k: float = 32.0,
     elo_base: float = 1500.0,
+    engine: str = "elo",
+    glicko: Optional[GlickoConfig] = None,
+    date_col: str = "parsed_date",
 ) -> pd.DataFrame:
     """
     Recorre el DataFrame en orden (se recomienda orden temporal) y construye
     features de Elo previas al partido. Actualiza Elo tras el resultado.
 
-    Devuelve un DataFrame con columnas: elo1_before, elo2_before, elo_diff.
+    Los equipos se codifican a enteros con `pd.factorize` y el recorrido se
+    hace sobre arrays planos (compilado con numba si está disponible).
+
+    Con engine="glicko2" los ratings salen de utils/glicko.py (base
+    `elo_base`, `elo_k` no se usa): un lote por día de partidos (`date_col`;
+    sin esa columna, un periodo por fila) y además la incertidumbre de cada
+    equipo en `rd1_before` y `rd2_before`.
+
+    Devuelve un DataFrame con columnas: elo1_before, elo2_before, elo_diff
+    (más rd1_before, rd2_before con glicko2).
     """
-    ratings: Dict[str, float] = {}
-    elo1_before = np.zeros(len(df), dtype=float)
-    elo2_before = np.zeros(len(df), dtype=float)
-
-    # Iterar Secuencialmente; asume df ya está ordenado cronológicamente
-    for i, row in df.iterrows():
-        t1 = str(row[team1_col])
-        t2 = str(row[team2_col])
-
-        r1 = ratings.get(t1, elo_base)
-        r2 = ratings.get(t2, elo_base)
-        elo1_before[i] = r1
-        elo2_before[i] = r2
-
-        # Actualización tras el partido
-        if label_col in df.columns:
-            y = float(row[label_col])  # 1 si gana team1, 0 si no
-            e1 = expected_score(r1, r2)
-            e2 = 1.0 - e1
-            r1_new = r1 + elo_k * (y - e1)
-            r2_new = r2 + elo_k * ((1.0 - y) - e2)
-            ratings[t1] = r1_new
-            ratings[t2] = r2_new
+    if engine not in RATING_ENGINES:
+        raise ValueError(f"Motor de rating desconocido: {engine} (opciones: {list(RATING_ENGINES)})")
+    codes1, codes2, teams = encode_teams(df, team1_col, team2_col)
+    if label_col in df.columns:
+        y = df[label_col].to_numpy(dtype=np.float64)
+    else:
+        # Sin etiqueta no hay actualización: todos quedan en elo_base
+        y = np.full(len(df), np.nan)
+    if engine == "glicko2":
+        cfg = GlickoConfig(base=float(elo_base)) if glicko is None else glicko
+        periods = rating_periods(df[date_col]) if date_col in df.columns else np.arange(len(df))
+        elo1_before, elo2_before, rd1, rd2 = glicko_pass(codes1, codes2, y, periods, len(teams), cfg)
+    else:
+        ratings = np.full(len(teams), float(elo_base))
+        elo1_before, elo2_before, _ = elo_pass(codes1, codes2, y, ratings, elo_k=elo_k)
 
     out = pd.DataFrame({
         "elo1_before": elo1_before,
         "elo2_before": elo2_before,
     })
     out["elo_diff"] = out["elo1_before"] - out["elo2_before"]
+    if engine == "glicko2":
+        out["rd1_before"] = rd1
+        out["rd2_before"] = rd2
     return out
-
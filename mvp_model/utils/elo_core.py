@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+# Este módulo no importa pandas, NumPy ni numba: lo usa la ruta ligera de
+# predict_mvp (arranque en milisegundos). `EloState.update` recibe un
+# DataFrame e importa lo necesario en el momento.
+
+
+@dataclass
+class EloConfig:
+    base: float = 1500.0
+    k: float = 32.0
+
+
+def expected_score(r_a: float, r_b: float) -> float:
+    return 1.0 / (1.0 + 10 ** ((r_b - r_a) / 400.0))
+
+
+def elo_loop(codes1, codes2, y, ratings, k, out1, out2):
+    # Núcleo secuencial: funciona igual con listas de Python o arrays NumPy
+    # (numba). y NaN = partido sin resultado, no actualiza ratings.
+    for i in range(len(codes1)):
+        a = codes1[i]
+        b = codes2[i]
+        r1 = ratings[a]
+        r2 = ratings[b]
+        out1[i] = r1
+        out2[i] = r2
+        yi = y[i]
+        if yi == yi:
+            e1 = 1.0 / (1.0 + 10 ** ((r2 - r1) / 400.0))
+            e2 = 1.0 - e1
+            ratings[a] = r1 + k * (yi - e1)
+            ratings[b] = r2 + k * ((1.0 - yi) - e2)
+
+
+def team1_won(team1: str, winner: str, team1_id: int = -1, winner_id: int = -1) -> int:
+    """
+    Etiqueta `team1_win` de un partido: por ID de registro cuando ambos están
+    resueltos (>= 0), si no comparando nombres. La usan load_matches y
+    read_matches_light.
+    """
+    if team1_id >= 0 and winner_id >= 0:
+        return int(team1_id == winner_id)
+    return int(winner == team1)
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+@dataclass
+class EloState:
+    """
+    Estado persistente de ratings: tabla de rating por equipo, marca de agua
+    (fecha y `match_id` del último partido fechado con resultado procesado),
+    los `match_id` ya procesados que no tienen fecha y la configuración
+    K/base con la que se generó.
+
+    Los partidos sin fecha no mueven la marca de agua: si lo hicieran, una
+    marca sin fecha dejaría fuera todos los partidos fechados posteriores.
+
+    `update(new_matches)` solo procesa las filas posteriores a la marca de
+    agua, así que predecir partidos nuevos cuesta O(partidos nuevos) en lugar
+    de repetir todo el histórico. `update_records` hace lo mismo sobre listas
+    de Python (sin pandas) con resultados idénticos.
+    """
+
+    config: EloConfig = field(default_factory=EloConfig)
+    ratings: Dict[str, float] = field(default_factory=dict)
+    last_date: Optional[str] = None
+    last_match_id: Optional[int] = None
+    undated_ids: List[int] = field(default_factory=list)
+    n_matches: int = 0
+
+    def _after_watermark(self, dates: "pd.Series", match_ids: "pd.Series"):
+        import numpy as np
+        import pandas as pd
+
+        # Fechadas: mismo orden que sort_values(["parsed_date", "match_id"]).
+        # Sin fecha: las que aún no se procesaron.
+        mids = pd.to_numeric(match_ids, errors="coerce").to_numpy(dtype=np.float64)
+        nat = dates.isna().to_numpy()
+        new_undated = ~np.isin(mids, np.asarray(self.undated_ids, dtype=np.float64))
+        if self.last_date is None:
+            return np.where(nat, new_undated, True)
+        wm = pd.Timestamp(self.last_date)
+        later = (dates > wm).to_numpy()
+        same = (dates == wm).to_numpy()
+        after_id = mids > float(self.last_match_id) if self.last_match_id is not None else np.ones(len(mids), dtype=bool)
+        return np.where(nat, new_undated, later | (same & after_id))
+
+    def is_after_watermark(self, date: Optional[datetime], match_id) -> bool:
+        """Versión escalar de `_after_watermark` (date=None equivale a NaT)."""
+        if date is None:
+            return _to_float(match_id) not in {float(m) for m in self.undated_ids}
+        if self.last_date is None:
+            return True
+        wm = datetime.fromisoformat(self.last_date)
+        if self.last_match_id is None:
+            return date >= wm
+        return date > wm or (date == wm and _to_float(match_id) > float(self.last_match_id))
+
+    def _advance(self, teams: Sequence[str], after: Sequence[float], touched, n_played: int, last_date, last_id,
+                 undated: Sequence) -> None:
+        # last_date/last_id: último partido fechado jugado (None si no hubo)
+        for code in touched:
+            self.ratings[teams[code]] = float(after[code])
+        if last_date is not None:
+            self.last_date = last_date
+            self.last_match_id = int(last_id)
+        seen = set(self.undated_ids)
+        self.undated_ids += [m for m in (int(x) for x in undated) if not (m in seen or seen.add(m))]
+        self.n_matches += n_played
+
+    def update(
+        self,
+        new_matches: "pd.DataFrame",
+        team1_col: str = "team1",
+        team2_col: str = "team2",
+        label_col: str = "team1_win",
+        date_col: str = "parsed_date",
+        id_col: str = "match_id",
+    ) -> "pd.DataFrame":
+        """
+        Procesa (en orden) las filas posteriores a la marca de agua y devuelve
+        sus features pre-partido (elo1_before, elo2_before, elo_diff) con el
+        índice original de esas filas. Filas con etiqueta NaN (partidos aún no
+        jugados) reciben features pero no actualizan ratings ni la marca.
+        """
+        import numpy as np
+        import pandas as pd
+
+        from mvp_model.utils.elo import elo_pass, encode_teams
+
+        mask = self._after_watermark(new_matches[date_col], new_matches[id_col])
+        df = new_matches[mask]
+        codes1, codes2, teams = encode_teams(df, team1_col, team2_col)
+        if label_col in df.columns:
+            y = df[label_col].to_numpy(dtype=np.float64)
+        else:
+            y = np.full(len(df), np.nan)
+        init = np.array([self.ratings.get(t, self.config.base) for t in teams.tolist()], dtype=np.float64)
+        elo1_before, elo2_before, after = elo_pass(codes1, codes2, y, init, elo_k=self.config.k)
+
+        played = ~np.isnan(y)
+        if played.any():
+            touched = np.unique(np.concatenate([codes1[played], codes2[played]])).tolist()
+            nat = df[date_col].isna().to_numpy()
+            dated = np.flatnonzero(played & ~nat)
+            last_date = last_id = None
+            if len(dated):
+                # Último fechado en el orden (fecha, match_id), aunque haya NaT detrás
+                last_date = pd.Timestamp(df[date_col].iloc[dated[-1]]).isoformat()
+                last_id = df[id_col].iloc[dated[-1]]
+            undated = pd.to_numeric(df[id_col].iloc[np.flatnonzero(played & nat)], errors="coerce").dropna()
+            self._advance(teams, after, touched, int(played.sum()), last_date, last_id, undated.tolist())
+
+        out = pd.DataFrame({"elo1_before": elo1_before, "elo2_before": elo2_before}, index=df.index)
+        out["elo_diff"] = out["elo1_before"] - out["elo2_before"]
+        return out
+
+    def update_records(
+        self,
+        team1: Sequence[str],
+        team2: Sequence[str],
+        y: Sequence[float],
+        dates: Sequence[Optional[datetime]],
+        match_ids: Sequence,
+        team1_ids: Optional[Sequence[int]] = None,
+        team2_ids: Optional[Sequence[int]] = None,
+    ) -> Tuple[List[int], List[float], List[float]]:
+        """
+        Igual que `update` pero sobre listas ya ordenadas (fechas None = NaT,
+        etiquetas NaN = sin resultado). Con `team1_ids`/`team2_ids` los equipos
+        se identifican como en `encode_teams`: por ID si todos los procesados
+        están resueltos, con el nombre de su primera aparición. Devuelve
+        (posiciones procesadas, elo1_before, elo2_before).
+        """
+        keep = [i for i in range(len(team1)) if self.is_after_watermark(dates[i], match_ids[i])]
+        keys1, keys2 = team1, team2
+        if team1_ids is not None and team2_ids is not None and keep \
+                and min(min(team1_ids[i], team2_ids[i]) for i in keep) >= 0:
+            keys1, keys2 = team1_ids, team2_ids
+        # Orden de aparición de encode_teams: todos los team1 y luego los team2
+        index: Dict = {}
+        teams: List[str] = []
+
+        def code(key, name: str) -> int:
+            c = index.setdefault(key, len(index))
+            if c == len(teams):
+                teams.append(name)
+            return c
+
+        codes1 = [code(keys1[i], team1[i]) for i in keep]
+        codes2 = [code(keys2[i], team2[i]) for i in keep]
+        ys = [float(y[i]) for i in keep]
+        ratings = [self.ratings.get(t, self.config.base) for t in teams]
+        out1 = [0.0] * len(keep)
+        out2 = [0.0] * len(keep)
+        elo_loop(codes1, codes2, ys, ratings, float(self.config.k), out1, out2)
+
+        played = [j for j, v in enumerate(ys) if v == v]
+        if played:
+            touched = sorted({codes1[j] for j in played} | {codes2[j] for j in played})
+            dated = [keep[j] for j in played if dates[keep[j]] is not None]
+            undated = [match_ids[keep[j]] for j in played if dates[keep[j]] is None]
+            last = dated[-1] if dated else None
+            self._advance(
+                teams, ratings, touched, len(played),
+                None if last is None else dates[last].isoformat(),
+                None if last is None else match_ids[last],
+                [m for m in undated if _to_float(m) == _to_float(m)],
+            )
+        return keep, out1, out2
+
+    def rating(self, team: str) -> float:
+        return self.ratings.get(str(team).strip(), self.config.base)
+
+    def apply_result(
+        self,
+        team1: str,
+        team2: str,
+        team1_win: float,
+        date: Optional[str] = None,
+        match_id: Optional[int] = None,
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Aplica un resultado en vivo (misma aritmética que `elo_pass`) y devuelve
+        los ratings pre-partido (elo1_before, elo2_before), o None si el
+        resultado no es posterior a la marca de agua (`is_after_watermark`:
+        repetido o anterior a lo ya procesado) y se ignora. Con `date` (ISO
+        8601) la marca de agua pasa a (date, match_id) a la vez; un `match_id`
+        sin fecha se anota entre los procesados sin fecha. Sin fecha ni
+        `match_id` no hay con qué detectar repeticiones y siempre se aplica.
+        """
+        when = None if date is None else datetime.fromisoformat(str(date))
+        if (when is not None or match_id is not None) and not self.is_after_watermark(when, match_id):
+            return None
+        t1, t2 = str(team1).strip(), str(team2).strip()
+        r1, r2 = self.rating(t1), self.rating(t2)
+        y = float(team1_win)
+        e1 = expected_score(r1, r2)
+        e2 = 1.0 - e1
+        self.ratings[t1] = r1 + self.config.k * (y - e1)
+        self.ratings[t2] = r2 + self.config.k * ((1.0 - y) - e2)
+        if when is not None:
+            self.last_date = when.isoformat()
+            self.last_match_id = None if match_id is None else int(match_id)
+        elif match_id is not None:
+            self.undated_ids.append(int(match_id))
+        self.n_matches += 1
+        return r1, r2
+
+    def to_dict(self) -> dict:
+        return {
+            "config": {"k": self.config.k, "base": self.config.base},
+            "watermark": {"date": self.last_date, "match_id": self.last_match_id},
+            "undated_match_ids": self.undated_ids,
+            "n_matches": self.n_matches,
+            "ratings": self.ratings,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "EloState":
+        cfg = d.get("config", {})
+        wm = d.get("watermark", {})
+        if wm.get("date") is None and wm.get("match_id") is not None and "undated_match_ids" not in d:
+            # Formato anterior: una marca sin fecha excluía todos los partidos fechados
+            raise ValueError("Estado Elo con marca de agua sin fecha (formato anterior): regenéralo con train_mvp")
+        return cls(
+            config=EloConfig(base=float(cfg.get("base", 1500.0)), k=float(cfg.get("k", 32.0))),
+            ratings={str(t): float(r) for t, r in d.get("ratings", {}).items()},
+            last_date=wm.get("date"),
+            last_match_id=wm.get("match_id"),
+            undated_ids=[int(m) for m in d.get("undated_match_ids", [])],
+            n_matches=int(d.get("n_matches", 0)),
+        )
+
+    def save(self, path: str) -> None:
+        # Escritura atómica para no dejar un estado a medias
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "EloState":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
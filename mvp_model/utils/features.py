@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mvp_model.utils.cli import DEFAULT_CACHE_DIR
+from mvp_model.utils.economy import build_economy_features, econ_columns, economy_sources
+from mvp_model.utils.elo import build_elo_features
+from mvp_model.utils.elo_core import team1_won
+from mvp_model.utils.form import build_form_features, form_columns, form_sources
+from mvp_model.utils.masters import (
+    MATCHES_COLUMNS,
+    MATCHES_ID_COLUMNS,
+    file_sha256,
+    ids_sibling,
+    read_master,
+    resolve_ids,
+)
+from mvp_model.utils.schema import parse_dates
+
+# Subir si cambia la lógica de carga/features: invalida entradas de caché viejas
+FEATURES_VERSION = 5
+
+ELO_FEATURES = ["elo1_before", "elo2_before", "elo_diff"]
+# Incertidumbre del rating: solo la produce el motor glicko2
+RD_FEATURES = ["rd1_before", "rd2_before"]
+
+FEATURE_SETS: Dict[str, List[str]] = {
+    "elo": ELO_FEATURES,
+    "elo+rd": ELO_FEATURES + RD_FEATURES,
+    # Forma de los jugadores (utils/form.py): media exponencial del roster
+    "elo+form": ELO_FEATURES + form_columns(("ewm",)),
+    "elo+form_all": ELO_FEATURES + form_columns(("roll", "ewm")),
+    # Eficiencia económica por tipo de compra (utils/economy.py)
+    "elo+econ": ELO_FEATURES + econ_columns(("ewm",)),
+    "elo+form+econ": ELO_FEATURES + form_columns(("ewm",)) + econ_columns(("ewm",)),
+}
+
+
+def uses_form(feature_set: str) -> bool:
+    return any(c.startswith("form_") for c in FEATURE_SETS.get(feature_set, []))
+
+
+def uses_economy(feature_set: str) -> bool:
+    return any(c.startswith("econ_") for c in FEATURE_SETS.get(feature_set, []))
+
+
+def feature_sources(feature_set: str, masters_dir: str) -> List[str]:
+    """CSV maestros, además de matches.csv, de los que dependen las features del set."""
+    masters = [os.path.join(masters_dir, "matches.csv")]
+    if uses_form(feature_set):
+        masters += form_sources(masters_dir)
+    if uses_economy(feature_set):
+        masters += economy_sources(masters_dir)
+    # Los equipos se cruzan por los IDs de los sidecars `.ids.csv`
+    sources = [ids_path for ids_path in map(ids_sibling, masters) if ids_path is not None]
+    return masters[1:] + sources
+
+
+def sources_sha256(feature_set: str, masters_dir: str) -> List[Optional[str]]:
+    """sha256 de cada `feature_sources` (None si no existe): lo que, además del CSV, cambia las features."""
+    return [file_sha256(p) if os.path.exists(p) else None for p in feature_sources(feature_set, masters_dir)]
+
+
+def load_matches(csv_path: str, completed_only: bool = True, extra_columns: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Carga matches.csv, limpia nombres, crea la etiqueta `team1_win` y ordena
+    cronológicamente (parsed_date, match_id).
+
+    completed_only=True (entrenamiento/evaluación): solo partidos completados;
+    `team1` y `winner` son obligatorios. completed_only=False (predicción): no
+    filtra y solo crea la etiqueta si hay columna `winner`. `extra_columns`
+    añade columnas a la proyección (p. ej. `stage`, `week` para el cuadro).
+
+    Si existe el sidecar `matches.ids.csv` se cargan también `team1_id`,
+    `team2_id` y `winner_id` (registro de equipos del merge): la etiqueta y
+    el Elo usan esos enteros en lugar de comparar nombres.
+    """
+    columns = MATCHES_COLUMNS + MATCHES_ID_COLUMNS
+    df = read_master(csv_path, columns=columns + [c for c in extra_columns if c not in columns])
+    # Filtrar solo partidos completados
+    if completed_only and "status" in df.columns:
+        df = df[df["status"].astype(str).str.lower() == "completed"].copy()
+    # Parse date ("...2025Yesterday" incluido); fallback to original order if parsing fails
+    if "date" in df.columns:
+        df["parsed_date"] = parse_dates(df["date"])
+    else:
+        df["parsed_date"] = pd.NaT
+
+    if completed_only or "winner" in df.columns:
+        # Limpieza de espacios y normalización básica en nombres de equipo y winner
+        for col in ["team1", "team2", "winner"]:
+            if col in df.columns:
+                df[col] = df[col].astype(str).str.strip()
+        # Label: 1 if team1 == winner else 0 (por ID si ambos están resueltos)
+        if "winner" in df.columns and "team1" in df.columns:
+            if "winner_id" in df.columns and "team1_id" in df.columns:
+                ids = zip(df["team1_id"].tolist(), df["winner_id"].tolist())
+            else:
+                ids = ((-1, -1) for _ in range(len(df)))
+            df["team1_win"] = np.array(
+                [team1_won(t, w, ti, wi) for t, w, (ti, wi) in zip(df["team1"], df["winner"], ids)], dtype=int
+            )
+        else:
+            raise ValueError("CSV must contain columns: team1, winner")
+    # Sort chronologically (NaT at end keeps relative order)
+    if "match_id" in df.columns:
+        df = df.sort_values(["parsed_date", "match_id"], kind="stable")
+    else:
+        df = df.sort_values(["parsed_date"], kind="stable")
+    df = df.reset_index(drop=True)
+    return df
+
+
+def build_features(df: pd.DataFrame, elo_k: float, elo_base: float, feature_set: str = "elo",
+                   masters_dir: str = "masters_csvs", engine: str = "elo",
+                   memory_mb: Optional[float] = None) -> pd.DataFrame:
+    """
+    Matriz de features pre-partido (una fila por partido, mismo orden que df).
+    Los sets con forma o economía leen los CSV maestros de `masters_dir` y
+    cruzan los equipos por `team1_id`/`team2_id` (si df no los trae, se
+    resuelven con el registro de entidades de `masters_dir`). `engine` elige
+    el motor de ratings de build_elo_features ("elo" o "glicko2").
+    `memory_mb` lee los maestros de la forma por bloques (load_player_matches).
+    """
+    if feature_set not in FEATURE_SETS:
+        raise ValueError(f"Feature set desconocido: {feature_set} (opciones: {sorted(FEATURE_SETS)})")
+    if engine != "glicko2" and any(c in RD_FEATURES for c in FEATURE_SETS[feature_set]):
+        raise ValueError(f"El feature set {feature_set} necesita --rating-engine glicko2")
+    label_col = "team1_win" if "team1_win" in df.columns else "__none__"
+    feats = build_elo_features(
+        df=df,
+        team1_col="team1",
+        team2_col="team2",
+        label_col=label_col,
+        elo_k=elo_k,
+        elo_base=elo_base,
+        engine=engine,
+    )
+    if (uses_form(feature_set) or uses_economy(feature_set)) and not {"team1_id", "team2_id"} <= set(df.columns):
+        df = resolve_ids(df[["match_id", "team1", "team2"]].copy(), {"team1": "team", "team2": "team"}, masters_dir)
+    if uses_form(feature_set):
+        player_stats_csv, performance_csv = form_sources(masters_dir)
+        form = build_form_features(df, player_stats_csv, performance_csv, memory_mb=memory_mb)
+        feats = pd.concat([feats, form.reset_index(drop=True)], axis=1)
+    if uses_economy(feature_set):
+        econ = build_economy_features(df, masters_dir)
+        feats = pd.concat([feats, econ.reset_index(drop=True)], axis=1)
+    return feats[FEATURE_SETS[feature_set]].copy()
+
+
+def cache_key(csv_path: str, elo_k: float, elo_base: float, feature_set: str, completed_only: bool,
+              engine: str = "elo") -> str:
+    """Clave por contenido: hash del CSV (y de las demás fuentes del set) + parámetros Elo + feature set."""
+    spec = {
+        "input_sha256": file_sha256(csv_path),
+        "elo_k": float(elo_k),
+        "elo_base": float(elo_base),
+        "feature_set": feature_set,
+        "completed_only": bool(completed_only),
+        "version": FEATURES_VERSION,
+    }
+    if engine != "elo":
+        # Solo fuera del motor por defecto: las entradas Elo existentes siguen valiendo
+        spec["rating_engine"] = engine
+    sources = sources_sha256(feature_set, os.path.dirname(csv_path))
+    if sources:
+        spec["sources_sha256"] = sources
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:24]
+
+
+def _has_pyarrow() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _save_entry(entry_dir: str, df: pd.DataFrame, X: pd.DataFrame, meta: dict) -> None:
+    parent = os.path.dirname(entry_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".tmp_", dir=parent)
+    try:
+        if _has_pyarrow():
+            df.to_parquet(os.path.join(tmp, "frame.parquet"), index=False)
+        else:
+            df.to_pickle(os.path.join(tmp, "frame.pkl"))
+        np.save(os.path.join(tmp, "features.npy"), X.to_numpy(dtype=np.float64))
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        try:
+            os.replace(tmp, entry_dir)
+        except OSError:
+            pass  # otro proceso ya escribió la misma entrada
+    finally:
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _load_entry(entry_dir: str) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, dict]]:
+    meta_path = os.path.join(entry_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    pq_path = os.path.join(entry_dir, "frame.parquet")
+    if os.path.exists(pq_path):
+        df = pd.read_parquet(pq_path)
+    else:
+        df = pd.read_pickle(os.path.join(entry_dir, "frame.pkl"))
+    values = np.load(os.path.join(entry_dir, "features.npy"))
+    X = pd.DataFrame(values, columns=meta["feature_names"])
+    return df, X, meta
+
+
+def load_features(
+    csv_path: str,
+    elo_k: float = 32.0,
+    elo_base: float = 1500.0,
+    feature_set: str = "elo",
+    completed_only: bool = True,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    verbose: bool = True,
+    engine: str = "elo",
+    memory_mb: Optional[float] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """
+    Partidos preparados + features, reutilizando la caché por contenido si
+    existe (cache_dir=None la desactiva). Devuelve (df, X, info) con
+    info = {"cache": "hit"|"miss"|"off", "key", "feature_names"}.
+    `memory_mb` no entra en la clave: las features son las mismas.
+    """
+    if not cache_dir:
+        df = load_matches(csv_path, completed_only=completed_only)
+        X = build_features(df, elo_k, elo_base, feature_set, os.path.dirname(csv_path), engine, memory_mb)
+        return df, X, {"cache": "off", "key": None, "feature_names": list(X.columns)}
+
+    key = cache_key(csv_path, elo_k, elo_base, feature_set, completed_only, engine)
+    entry_dir = os.path.join(cache_dir, key)
+    cached = _load_entry(entry_dir)
+    if cached is not None:
+        df, X, meta = cached
+        status = "hit"
+    else:
+        df = load_matches(csv_path, completed_only=completed_only)
+        X = build_features(df, elo_k, elo_base, feature_set, os.path.dirname(csv_path), engine, memory_mb)
+        meta = {
+            "csv_path": csv_path,
+            "elo_k": float(elo_k),
+            "elo_base": float(elo_base),
+            "feature_set": feature_set,
+            "rating_engine": engine,
+            "completed_only": bool(completed_only),
+            "version": FEATURES_VERSION,
+            "feature_names": list(X.columns),
+            "n_rows": int(len(df)),
+        }
+        _save_entry(entry_dir, df, X, meta)
+        status = "miss"
+    if verbose:
+        print(f"Features [{feature_set}]: caché {status} ({key}) – {len(df)} partidos")
+    return df, X, {"cache": status, "key": key, "feature_names": meta["feature_names"]}
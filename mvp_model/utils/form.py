@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mvp_model.utils.elo import HAS_NUMBA
+from mvp_model.utils.masters import iter_indexed, load_master_index, read_master
+
+PLAYER_STATS_FILE = "detailed_matches_player_stats.csv"
+PERFORMANCE_FILE = "performance_data.csv"
+
+PLAYER_STATS_COLUMNS = [
+    "match_id", "player_name", "player_id", "player_team_id", "stat_type", "map_name",
+    "rating", "acs", "kd_diff", "kast", "adr", "hs_percent", "fk_fd_diff",
+]
+PERFORMANCE_COLUMNS = ["Match ID", "Map", "Player", "2K", "3K", "4K", "5K", "1v1", "1v2", "1v3", "1v4", "1v5"]
+
+_PERF_KEY = ["match_id", "map_name", "player_name"]
+# Estadísticas por jugador y mapa que alimentan la forma (medias por partido)
+FORM_STATS = ["rating", "acs", "kast", "adr", "kd_diff", "fk_fd_diff", "hs_percent", "multikills", "clutches"]
+ROSTER_SIZE = 5
+
+
+@dataclass
+class FormConfig:
+    window: int = 10  # últimos N partidos de cada jugador (media móvil)
+    halflife: float = 8.0  # vida media, en partidos del jugador, de la media exponencial
+    # Pseudo-partidos de la media global (previa) que se mezclan con la historia
+    # de cada jugador: un debutante vale la media global, no 0
+    prior_weight: float = 3.0
+
+
+def form_columns(kinds: Tuple[str, ...] = ("roll", "ewm")) -> List[str]:
+    """Nombres de las features (diferencia team1 - team2 de la media del roster)."""
+    return [f"form_{kind}_{stat}_diff" for kind in kinds for stat in FORM_STATS]
+
+
+def form_sources(masters_dir: str) -> List[str]:
+    """CSV maestros que usan las features de forma (en la carpeta de matches.csv)."""
+    return [os.path.join(masters_dir, PLAYER_STATS_FILE), os.path.join(masters_dir, PERFORMANCE_FILE)]
+
+
+def _percent(s: pd.Series) -> pd.Series:
+    if s.dtype.kind in "fi":
+        return s.astype(np.float64)
+    return pd.to_numeric(s.astype(str).str.rstrip("%"), errors="coerce")
+
+
+def _prepare_player_stats(ps: pd.DataFrame) -> pd.DataFrame:
+    ps = ps[ps["stat_type"].astype(str) == "map"].copy()
+    ps = ps.rename(columns={"player_team_id": "team_id"})
+    ps["player"] = np.where(
+        ps["player_id"].notna(), "id:" + ps["player_id"].astype("Int64").astype(str), "name:" + ps["player_name"].astype(str)
+    )
+    for col in ("kast", "hs_percent"):
+        ps[col] = _percent(ps[col])
+    return ps
+
+
+def _prepare_performance(perf: pd.DataFrame) -> pd.DataFrame:
+    perf = perf.rename(columns={"Match ID": "match_id", "Map": "map_name", "Player": "player_name"})
+    perf["multikills"] = perf[["2K", "3K", "4K", "5K"]].sum(axis=1)
+    perf["clutches"] = perf[["1v1", "1v2", "1v3", "1v4", "1v5"]].sum(axis=1)
+    return perf[["match_id", "map_name", "player_name", "multikills", "clutches"]]
+
+
+def _with_performance(ps: pd.DataFrame, perf: Optional[pd.DataFrame]) -> pd.DataFrame:
+    if perf is None:
+        return ps.assign(multikills=np.nan, clutches=np.nan)
+    return ps.merge(perf, on=_PERF_KEY, how="left")
+
+
+def load_player_matches(player_stats_csv: str, performance_csv: Optional[str] = None,
+                        memory_mb: Optional[float] = None) -> pd.DataFrame:
+    """
+    Una fila por (partido, jugador): media de sus mapas del partido en cada
+    estadística de FORM_STATS, con el equipo como `team_id` del registro de
+    entidades (sidecar `.ids.csv`). Multi-kills (2K-5K) y clutches (1vX) salen de
+    performance_data.csv si existe; si no, quedan NaN.
+
+    Con `memory_mb` los maestros se recorren por bloques (utils/chunks.py) y
+    las medias se acumulan como sumas y recuentos parciales, sin cargar
+    detailed_matches_player_stats.csv entero; el resultado es el mismo salvo
+    redondeo en el último bit. Si performance_data.csv tiene índice al día
+    (merge), cada bloque lee solo las filas de sus partidos; sin índice se
+    guarda la tabla compacta de multi-kills/clutches, deduplicada por bloque.
+    """
+    has_perf = bool(performance_csv) and os.path.exists(performance_csv)
+    if memory_mb is None:
+        ps = _prepare_player_stats(read_master(player_stats_csv, columns=PLAYER_STATS_COLUMNS))
+        perf = None
+        if has_perf:
+            perf = _prepare_performance(read_master(performance_csv, columns=PERFORMANCE_COLUMNS))
+            perf = perf.drop_duplicates(_PERF_KEY)
+        ps = _with_performance(ps, perf)
+        return ps.groupby(["match_id", "team_id", "player"], sort=False)[FORM_STATS].mean().reset_index()
+
+    from mvp_model.utils.chunks import StreamingMean, chunk_rows_for, iter_master
+
+    # Tipos de read_csv (typed=False): mismos valores que la carga en memoria
+    index = load_master_index(performance_csv) if has_perf else None
+    perf = None
+    if has_perf and index is None:
+        parts = [_prepare_performance(c).drop_duplicates(_PERF_KEY) for c in iter_master(
+            performance_csv, PERFORMANCE_COLUMNS, typed=False, memory_mb=memory_mb)]
+        if parts:
+            perf = pd.concat(parts, ignore_index=True).drop_duplicates(_PERF_KEY)
+    perf_rows = chunk_rows_for(performance_csv, PERFORMANCE_COLUMNS, memory_mb) if index is not None else 0
+    acc = StreamingMean(["match_id", "team_id", "player"], FORM_STATS)
+    for chunk in iter_master(player_stats_csv, PLAYER_STATS_COLUMNS, typed=False, memory_mb=memory_mb):
+        ps = _prepare_player_stats(chunk)
+        if index is not None:
+            ids = pd.to_numeric(ps["match_id"], errors="coerce").dropna().astype("int64").unique()
+            parts = [_prepare_performance(c) for c in iter_indexed(
+                performance_csv, ids, columns=PERFORMANCE_COLUMNS, chunk_rows=perf_rows, index=index)]
+            perf = pd.concat(parts, ignore_index=True).drop_duplicates(_PERF_KEY) if parts else None
+        acc.update(_with_performance(ps, perf))
+    return acc.result()
+
+
+def _form_loop(players, obs, decay, window, prior_weight,
+               ring, ring_sum, ring_cnt, ring_pos, ewm_num, ewm_den, glob_sum, glob_cnt,
+               roll_out, ewm_out):
+    # players (partidos, 2, roster) con -1 de relleno; obs (partidos, 2, roster, stats)
+    # con NaN si falta el dato. Primero se leen las features del partido con el
+    # estado previo y después se actualiza: sin fuga del resultado actual.
+    n_matches, n_sides, n_slots, n_stats = obs.shape
+    for m in range(n_matches):
+        for side in range(n_sides):
+            for s in range(n_stats):
+                prior = glob_sum[s] / glob_cnt[s] if glob_cnt[s] > 0 else 0.0
+                roll_acc = 0.0
+                ewm_acc = 0.0
+                n_players = 0
+                for j in range(n_slots):
+                    p = players[m, side, j]
+                    if p < 0:
+                        continue
+                    roll_acc += (ring_sum[p, s] + prior_weight * prior) / (ring_cnt[p, s] + prior_weight)
+                    ewm_acc += (ewm_num[p, s] + prior_weight * prior) / (ewm_den[p, s] + prior_weight)
+                    n_players += 1
+                roll_out[m, side, s] = roll_acc / n_players if n_players > 0 else prior
+                ewm_out[m, side, s] = ewm_acc / n_players if n_players > 0 else prior
+        for side in range(n_sides):
+            for j in range(n_slots):
+                p = players[m, side, j]
+                if p < 0:
+                    continue
+                pos = ring_pos[p]
+                for s in range(n_stats):
+                    x = obs[m, side, j, s]
+                    old = ring[p, pos, s]
+                    # Ventana: sale el valor de hace `window` partidos, entra el nuevo
+                    if old == old:
+                        ring_sum[p, s] -= old
+                        ring_cnt[p, s] -= 1.0
+                    ring[p, pos, s] = x
+                    ewm_num[p, s] *= decay
+                    ewm_den[p, s] *= decay
+                    if x == x:
+                        ring_sum[p, s] += x
+                        ring_cnt[p, s] += 1.0
+                        ewm_num[p, s] += x
+                        ewm_den[p, s] += 1.0
+                        glob_sum[s] += x
+                        glob_cnt[s] += 1.0
+                ring_pos[p] = (pos + 1) % window
+
+
+if HAS_NUMBA:
+    from numba import njit  # type: ignore
+
+    _form_loop_jit = njit(cache=True, nogil=True)(_form_loop)
+
+
+class FormState:
+    """
+    Estado incremental de forma por jugador: ventana circular de los últimos
+    `window` partidos con su suma y recuento (actualización O(1): entra un
+    valor, sale otro) y numerador/denominador de la media exponencial. La
+    media global (previa para jugadores con poca historia) también es
+    incremental. Sirve para cualquier entidad y estadística: las features de
+    economía (utils/economy.py) lo usan con equipos en lugar de jugadores.
+    """
+
+    def __init__(self, config: Optional[FormConfig] = None, n_stats: int = len(FORM_STATS)):
+        self.config = config or FormConfig()
+        self.players: List[str] = []
+        self._idx: dict = {}
+        self.n_stats = n_stats
+        self.ring = np.empty((0, self.config.window, n_stats))
+        self.ring_sum = np.empty((0, n_stats))
+        self.ring_cnt = np.empty((0, n_stats))
+        self.ring_pos = np.empty(0, dtype=np.int64)
+        self.ewm_num = np.empty((0, n_stats))
+        self.ewm_den = np.empty((0, n_stats))
+        self.glob_sum = np.zeros(n_stats)
+        self.glob_cnt = np.zeros(n_stats)
+
+    def _grow(self, players) -> None:
+        new = [p for p in dict.fromkeys(players) if p not in self._idx]
+        if not new:
+            return
+        for p in new:
+            self._idx[p] = len(self.players)
+            self.players.append(p)
+        k, n_stats = len(new), self.n_stats
+        self.ring = np.concatenate([self.ring, np.full((k, self.config.window, n_stats), np.nan)])
+        self.ring_sum = np.concatenate([self.ring_sum, np.zeros((k, n_stats))])
+        self.ring_cnt = np.concatenate([self.ring_cnt, np.zeros((k, n_stats))])
+        self.ring_pos = np.concatenate([self.ring_pos, np.zeros(k, dtype=np.int64)])
+        self.ewm_num = np.concatenate([self.ewm_num, np.zeros((k, n_stats))])
+        self.ewm_den = np.concatenate([self.ewm_den, np.zeros((k, n_stats))])
+
+    def process(self, players: np.ndarray, obs: np.ndarray, use_jit: Optional[bool] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recorre partidos en orden: `players` (partidos, 2, roster) con
+        códigos de `codes()` (-1 = hueco) y `obs` sus estadísticas. Devuelve
+        las medias del roster (rolling, exponencial) previas a cada partido,
+        ambas (partidos, 2, stats), y deja el estado actualizado.
+        """
+        n = len(players)
+        roll = np.empty((n, 2, self.n_stats))
+        ewm = np.empty((n, 2, self.n_stats))
+        decay = 0.5 ** (1.0 / self.config.halflife)
+        state = (self.ring, self.ring_sum, self.ring_cnt, self.ring_pos, self.ewm_num, self.ewm_den,
+                 self.glob_sum, self.glob_cnt)
+        if use_jit is None:
+            use_jit = HAS_NUMBA
+        loop = _form_loop_jit if use_jit and HAS_NUMBA else _form_loop
+        loop(np.ascontiguousarray(players, dtype=np.int64), np.ascontiguousarray(obs, dtype=np.float64),
+             decay, self.config.window, float(self.config.prior_weight), *state, roll, ewm)
+        return roll, ewm
+
+    def codes(self, players) -> np.ndarray:
+        self._grow(players)
+        return np.array([self._idx[p] for p in players], dtype=np.int64)
+
+
+def roster_arrays(df: pd.DataFrame, player_matches: pd.DataFrame, state: FormState) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (players, obs) alineados con `df` (partidos de matches.csv, con
+    `team1_id`/`team2_id`): para cada lado, hasta ROSTER_SIZE jugadores de
+    ese equipo en el partido. Partidos sin estadísticas quedan con huecos
+    (-1) y no actualizan a nadie.
+    """
+    n = len(df)
+    players = np.full((n, 2, ROSTER_SIZE), -1, dtype=np.int64)
+    obs = np.full((n, 2, ROSTER_SIZE, len(FORM_STATS)), np.nan)
+    pos = pd.Series(np.arange(n), index=df["match_id"].to_numpy())
+    pos = pos[~pos.index.duplicated()]
+    pm = player_matches[player_matches["match_id"].isin(pos.index)]
+    rows = pos.loc[pm["match_id"]].to_numpy()
+    team = pm["team_id"].to_numpy()
+    sides = np.where(team == df["team1_id"].to_numpy()[rows], 0,
+                     np.where(team == df["team2_id"].to_numpy()[rows], 1, -1))
+    sides[team < 0] = -1
+    codes = state.codes(pm["player"].tolist())
+    values = pm[FORM_STATS].to_numpy(dtype=np.float64)
+    filled = np.zeros((n, 2), dtype=np.int64)
+    for r, side, code, v in zip(rows.tolist(), sides.tolist(), codes.tolist(), values):
+        if side < 0 or filled[r, side] >= ROSTER_SIZE:
+            continue
+        players[r, side, filled[r, side]] = code
+        obs[r, side, filled[r, side]] = v
+        filled[r, side] += 1
+    return players, obs
+
+
+def build_form_features(df: pd.DataFrame, player_stats_csv: str, performance_csv: Optional[str] = None,
+                        config: Optional[FormConfig] = None, memory_mb: Optional[float] = None) -> pd.DataFrame:
+    """
+    Features de forma pre-partido alineadas con `df` (orden cronológico):
+    media del roster de la forma de cada jugador en ventana móvil y con
+    decaimiento exponencial, como diferencia team1 - team2 (form_columns()).
+    `memory_mb` activa la carga por bloques de load_player_matches.
+    """
+    state = FormState(config)
+    players, obs = roster_arrays(df, load_player_matches(player_stats_csv, performance_csv, memory_mb), state)
+    roll, ewm = state.process(players, obs)
+    diff = np.concatenate([roll[:, 0] - roll[:, 1], ewm[:, 0] - ewm[:, 1]], axis=1)
+    return pd.DataFrame(diff, columns=form_columns(), index=df.index)
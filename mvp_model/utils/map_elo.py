@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mvp_model.utils.elo import HAS_NUMBA
+from mvp_model.utils.masters import read_master
+
+# Columnas de detailed_matches_maps.csv / detailed_matches_overview.csv que se usan
+MAPS_COLUMNS = ["match_id", "map_name", "map_order", "winner_id", "picked_by_id"]
+OVERVIEW_COLUMNS = ["match_id", "format", "pick_ban_info"]
+
+@dataclass
+class MapEloConfig:
+    base: float = 1500.0
+    k: float = 32.0
+    # Fracción de cada actualización que se aplica a toda la fila del equipo
+    # (fuerza general, compartida entre mapas); el resto va solo al mapa jugado
+    share: float = 0.25
+
+
+def _map_elo_loop(codes1, codes2, maps, y, R, G, k, share, out1, out2):
+    # R: (equipos, mapas) denso; G: parte compartida acumulada por equipo
+    n_maps = R.shape[1]
+    for i in range(len(codes1)):
+        a = codes1[i]
+        b = codes2[i]
+        m = maps[i]
+        r1 = R[a, m]
+        r2 = R[b, m]
+        out1[i] = r1
+        out2[i] = r2
+        yi = y[i]
+        if yi == yi:
+            e1 = 1.0 / (1.0 + 10 ** ((r2 - r1) / 400.0))
+            d1 = k * (yi - e1)
+            d2 = k * ((1.0 - yi) - (1.0 - e1))
+            s1 = share * d1
+            s2 = share * d2
+            for j in range(n_maps):
+                R[a, j] += s1
+                R[b, j] += s2
+            G[a] += s1
+            G[b] += s2
+            R[a, m] += d1 - s1
+            R[b, m] += d2 - s2
+
+
+if HAS_NUMBA:
+    from numba import njit  # type: ignore
+
+    _map_elo_loop_jit = njit(cache=True, nogil=True)(_map_elo_loop)
+
+
+def map_elo_pass(
+    codes1: np.ndarray,
+    codes2: np.ndarray,
+    map_codes: np.ndarray,
+    y: np.ndarray,
+    R: np.ndarray,
+    G: np.ndarray,
+    k: float,
+    share: float,
+    use_jit: Optional[bool] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Recorre mapas ya codificados en orden cronológico, actualizando `R` y `G`
+    in situ. Devuelve los ratings (equipo, mapa) previos a cada mapa. Sin
+    numba, la parte compartida se aplica como suma sobre la fila completa
+    (misma aritmética elemento a elemento, resultados idénticos).
+    """
+    n = len(codes1)
+    y = np.asarray(y, dtype=np.float64)
+    out1 = np.empty(n, dtype=np.float64)
+    out2 = np.empty(n, dtype=np.float64)
+    if use_jit is None:
+        use_jit = HAS_NUMBA
+    if use_jit and HAS_NUMBA:
+        _map_elo_loop_jit(
+            np.ascontiguousarray(codes1, dtype=np.int64),
+            np.ascontiguousarray(codes2, dtype=np.int64),
+            np.ascontiguousarray(map_codes, dtype=np.int64),
+            y, R, G, float(k), float(share), out1, out2,
+        )
+        return out1, out2
+
+    for i, (a, b, m, yi) in enumerate(zip(
+        np.asarray(codes1).tolist(), np.asarray(codes2).tolist(), np.asarray(map_codes).tolist(), y.tolist()
+    )):
+        r1 = float(R[a, m])
+        r2 = float(R[b, m])
+        out1[i] = r1
+        out2[i] = r2
+        if yi == yi:
+            e1 = 1.0 / (1.0 + 10 ** ((r2 - r1) / 400.0))
+            d1 = k * (yi - e1)
+            d2 = k * ((1.0 - yi) - (1.0 - e1))
+            s1 = share * d1
+            s2 = share * d2
+            R[a] += s1
+            R[b] += s2
+            G[a] += s1
+            G[b] += s2
+            R[a, m] += d1 - s1
+            R[b, m] += d2 - s2
+    return out1, out2
+
+
+@dataclass
+class MapElo:
+    """
+    Ratings por (equipo, mapa) en una matriz densa `R` (equipos × mapas).
+    `G[t]` es la parte compartida acumulada del equipo: un mapa nuevo para un
+    equipo conocido arranca en `base + G[t]` (su fuerza general), no en base.
+    """
+
+    config: MapEloConfig = field(default_factory=MapEloConfig)
+    teams: List[str] = field(default_factory=list)
+    maps: List[str] = field(default_factory=list)
+    R: np.ndarray = field(default_factory=lambda: np.empty((0, 0)))
+    G: np.ndarray = field(default_factory=lambda: np.empty(0))
+    n_maps_played: int = 0
+    # Pool de mapas vigente (el del último veto visto): pool por defecto al predecir
+    pool: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._team_idx: Dict[str, int] = {t: i for i, t in enumerate(self.teams)}
+        self._map_idx: Dict[str, int] = {m: i for i, m in enumerate(self.maps)}
+
+    def _grow(self, teams: Sequence[str], maps: Sequence[str]) -> None:
+        new_teams = [t for t in dict.fromkeys(teams) if t not in self._team_idx]
+        new_maps = [m for m in dict.fromkeys(maps) if m not in self._map_idx]
+        if not new_teams and not new_maps:
+            return
+        n_t, n_m = len(self.teams) + len(new_teams), len(self.maps) + len(new_maps)
+        R = np.empty((n_t, n_m), dtype=np.float64)
+        G = np.zeros(n_t, dtype=np.float64)
+        G[: len(self.teams)] = self.G
+        # Celdas nuevas: fuerza general del equipo sobre la base
+        R[:] = (self.config.base + G)[:, None]
+        R[: len(self.teams), : len(self.maps)] = self.R
+        for t in new_teams:
+            self._team_idx[t] = len(self.teams)
+            self.teams.append(t)
+        for m in new_maps:
+            self._map_idx[m] = len(self.maps)
+            self.maps.append(m)
+        self.R, self.G = R, G
+
+    def update(self, team1: Sequence[str], team2: Sequence[str], maps: Sequence[str], y) -> Tuple[np.ndarray, np.ndarray]:
+        """Procesa mapas en orden (y = 1 si gana team1, NaN = sin resultado). Devuelve ratings previos."""
+        self._grow(list(team1) + list(team2), maps)
+        c1 = np.fromiter((self._team_idx[t] for t in team1), dtype=np.int64, count=len(team1))
+        c2 = np.fromiter((self._team_idx[t] for t in team2), dtype=np.int64, count=len(team2))
+        cm = np.fromiter((self._map_idx[m] for m in maps), dtype=np.int64, count=len(maps))
+        out = map_elo_pass(c1, c2, cm, y, self.R, self.G, self.config.k, self.config.share)
+        self.n_maps_played += int(np.sum(~np.isnan(np.asarray(y, dtype=np.float64))))
+        return out
+
+    def ratings(self, team: str, maps: Sequence[str]) -> np.ndarray:
+        """Rating del equipo en cada mapa; equipos o mapas sin historial usan base + G."""
+        i = self._team_idx.get(team)
+        g = self.G[i] if i is not None else 0.0
+        out = np.full(len(maps), self.config.base + g, dtype=np.float64)
+        if i is not None:
+            for j, m in enumerate(maps):
+                c = self._map_idx.get(m)
+                if c is not None:
+                    out[j] = self.R[i, c]
+        return out
+
+    def map_probs(self, team1: str, team2: str, maps: Sequence[str]) -> np.ndarray:
+        """P(team1 gana) en cada mapa de `maps`."""
+        r1 = self.ratings(team1, maps)
+        r2 = self.ratings(team2, maps)
+        return 1.0 / (1.0 + 10 ** ((r2 - r1) / 400.0))
+
+    def to_dict(self) -> dict:
+        return {
+            "config": {"base": self.config.base, "k": self.config.k, "share": self.config.share},
+            "teams": list(self.teams),
+            "maps": list(self.maps),
+            "ratings": self.R.tolist(),
+            "shared": self.G.tolist(),
+            "n_maps_played": self.n_maps_played,
+            "pool": list(self.pool),
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "MapElo":
+        n_maps = len(d["maps"])
+        return cls(
+            config=MapEloConfig(**d["config"]),
+            teams=list(d["teams"]),
+            maps=list(d["maps"]),
+            R=np.array(d["ratings"], dtype=np.float64).reshape(len(d["teams"]), n_maps),
+            G=np.array(d["shared"], dtype=np.float64),
+            n_maps_played=int(d.get("n_maps_played", 0)),
+            pool=list(d.get("pool", [])),
+        )
+
+    def save(self, path: str) -> None:
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MapElo":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def load_map_results(matches: pd.DataFrame, maps_csv: str) -> pd.DataFrame:
+    """
+    Una fila por mapa jugado, en el orden cronológico de `matches` (salida de
+    `load_matches`, con `team1_id`/`team2_id`) y luego por `map_order`.
+    Añade team1/team2 del partido y `team1_win` por mapa; `winner_id` y
+    `picked_by_id` son IDs del registro de entidades, como los del partido.
+    Descarta mapas cuyo ganador no es ninguno de los dos equipos.
+    """
+    maps = read_master(maps_csv, columns=MAPS_COLUMNS)
+    order = matches[["match_id", "team1", "team2", "team1_id", "team2_id"]].reset_index(names="match_pos")
+    df = maps.merge(order, on="match_id", how="inner")
+    df = df[(df["winner_id"] >= 0) & ((df["winner_id"] == df["team1_id"]) | (df["winner_id"] == df["team2_id"]))]
+    df = df.sort_values(["match_pos", "map_order"], kind="stable").reset_index(drop=True)
+    df["team1_win"] = (df["winner_id"] == df["team1_id"]).astype(int)
+    return df
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+# El índice `{csv}.mindex.json` y los sidecars `{base}.ids.csv` los escriben
+# y leen los scripts del merge (scripts/match_index.py y
+# scripts/entity_registry.py, solo stdlib): una sola implementación, con su
+# control de versión y de frescura. `scripts` es un paquete de espacio de
+# nombres, como `mvp_model`: se importa desde la raíz del repo
+from scripts.entity_registry import (
+    ENTITY_COLUMNS,
+    alias_index,
+    build_registry,
+    ids_sibling,
+    load_registry,
+    registry_path,
+    resolve,
+)
+from scripts.match_index import load_master_index, master_ranges, matches_between, read_ranges
+
+# Columnas de matches.csv que usan los scripts del modelo (proyección); las
+# `*_id` vienen del sidecar matches.ids.csv si existe
+MATCHES_COLUMNS = ["date", "match_id", "team1", "team2", "winner", "status", "tournament_name"]
+MATCHES_ID_COLUMNS = ["team1_id", "team2_id", "winner_id"]
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def parquet_sibling(csv_path: str) -> Optional[str]:
+    """
+    Ruta del `.parquet` tipado junto al CSV maestro (lo escribe
+    `merge_tournaments_to_masters.py --parquet`) si existe y está al día,
+    es decir, no es más antiguo que el CSV. Si no, None.
+    """
+    root, ext = os.path.splitext(csv_path)
+    if ext.lower() != ".csv":
+        return None
+    pq_path = root + ".parquet"
+    if not os.path.exists(pq_path) or not os.path.exists(csv_path):
+        return None
+    if os.path.getmtime(pq_path) < os.path.getmtime(csv_path):
+        return None
+    return pq_path
+
+
+def entity_id_columns(csv_path: str, columns: Iterable[str]) -> Dict[str, str]:
+    """
+    Columnas `<col>_id` de `columns` que son IDs del registro de entidades
+    (`entity_registry.ENTITY_COLUMNS` del maestro) -> columna de origen.
+    """
+    entities = ENTITY_COLUMNS.get(os.path.splitext(os.path.basename(csv_path))[0], {})
+    return {c: c[:-3] for c in columns if c.endswith("_id") and c[:-3] in entities}
+
+
+@lru_cache(maxsize=4)
+def _registry_index(masters_dir: str, signature: tuple) -> Dict[str, Dict[str, int]]:
+    # `signature` (mtime/tamaño del registro y los maestros) solo sirve de clave
+    return alias_index(build_registry(masters_dir, load_registry(masters_dir)))
+
+
+def registry_index(masters_dir: str) -> Dict[str, Dict[str, int]]:
+    """
+    Índice alias -> ID de equipos y jugadores de `masters_dir`: el registro
+    guardado como semilla (mismos IDs que los sidecars) al día con los
+    maestros actuales. Se cachea en memoria mientras no cambien los ficheros.
+    """
+    paths = [registry_path(masters_dir)] + [os.path.join(masters_dir, f"{b}.csv") for b in sorted(ENTITY_COLUMNS)]
+    signature = tuple((os.stat(p).st_mtime_ns, os.stat(p).st_size) if os.path.exists(p) else None for p in paths)
+    return _registry_index(os.path.abspath(masters_dir), signature)
+
+
+def resolve_ids(df: pd.DataFrame, kinds: Dict[str, str], masters_dir: str) -> pd.DataFrame:
+    """
+    Añade a `df` columnas de ID (int32, -1 = sin resolver) con el registro de
+    `masters_dir`: `kinds` es {columna de origen: "team" | "player"} y cada
+    una da `<columna>_id`. Para maestros sin sidecar al día y para CSV que no
+    son maestros (p. ej. partidos a predecir).
+    """
+    index = registry_index(masters_dir)
+    for src, kind in kinds.items():
+        if src not in df.columns:
+            continue
+        lookup = {v: -1 if pd.isna(v) else resolve(v, kind, index) for v in pd.unique(df[src])}
+        df[f"{src}_id"] = df[src].map(lookup).astype("int32")
+    return df
+
+
+def read_master(csv_path: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Lee un CSV maestro. Si hay una copia Parquet al día se usa esa (tipos ya
+    resueltos: fechas, numéricos y categóricas) leyendo solo `columns`.
+    Las columnas pedidas que no existan se ignoran, igual en ambos formatos.
+
+    Las columnas `<col>_id` pedidas (IDs del registro de entidades) se añaden
+    como int32, alineadas por fila (-1 = alias sin resolver): del sidecar
+    `.ids.csv` si está al día y, si no, resueltas en memoria con el registro.
+    """
+    wanted = list(columns) if columns is not None else None
+    id_cols = entity_id_columns(csv_path, wanted) if wanted is not None else {}
+    if not id_cols:
+        return _read_master(csv_path, wanted)
+    plain = [c for c in wanted if c not in id_cols]
+    ids_path = ids_sibling(csv_path)
+    if ids_path is not None:
+        ids = pd.read_csv(ids_path, usecols=lambda c: c in id_cols, dtype="int32")
+        if set(id_cols) <= set(ids.columns):
+            df = _read_master(csv_path, plain)
+            if len(ids) == len(df):
+                for c in id_cols:
+                    df[c] = ids[c].to_numpy()
+                return df
+    # Sin sidecar al día: los mismos IDs, resueltos en memoria
+    extra = [src for src in id_cols.values() if src not in plain]
+    df = _read_master(csv_path, plain + extra)
+    entities = ENTITY_COLUMNS[os.path.splitext(os.path.basename(csv_path))[0]]
+    df = resolve_ids(df, {src: entities[src] for src in id_cols.values()}, os.path.dirname(csv_path) or ".")
+    return df.drop(columns=[c for c in extra if c in df.columns])
+
+
+def _read_master(csv_path: str, wanted: Optional[List[str]]) -> pd.DataFrame:
+    pq_path = parquet_sibling(csv_path)
+    if pq_path is not None:
+        try:
+            import pyarrow.parquet as pq  # type: ignore
+        except Exception:  # pragma: no cover
+            pq = None
+        if pq is not None:
+            if wanted is not None:
+                available = set(pq.read_schema(pq_path).names)
+                wanted = [c for c in wanted if c in available]
+            return pd.read_parquet(pq_path, columns=wanted)
+
+    if wanted is None:
+        return pd.read_csv(csv_path)
+    wanted_set = set(wanted)
+    return pd.read_csv(csv_path, usecols=lambda c: c in wanted_set)
+
+
+def typed_sibling(csv_path: str) -> Optional[str]:
+    """`{base}.typed.parquet` (merge con `--typed`) si existe y no es más antiguo que el CSV."""
+    root, ext = os.path.splitext(csv_path)
+    if ext.lower() != ".csv":
+        return None
+    typed_path = root + ".typed.parquet"
+    if not os.path.exists(typed_path) or not os.path.exists(csv_path):
+        return None
+    if os.path.getmtime(typed_path) < os.path.getmtime(csv_path):
+        return None
+    return typed_path
+
+
+def read_typed(csv_path: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Maestro normalizado con el esquema declarado (utils/schema.py): porcentajes
+    como float32, "9/58" en `<col>_won`/`<col>_total`, duraciones en segundos,
+    marcadores en dos enteros y categóricas. `columns` usa los nombres ya
+    normalizados. Lee el `.typed.parquet` al día si existe; si no, normaliza
+    el CSV en memoria (mismo resultado).
+    """
+    from mvp_model.utils.schema import read_csv_typed
+
+    wanted = list(columns) if columns is not None else None
+    typed_path = typed_sibling(csv_path)
+    if typed_path is not None:
+        try:
+            import pyarrow.parquet as pq  # type: ignore
+        except Exception:  # pragma: no cover
+            pq = None
+        if pq is not None:
+            if wanted is not None:
+                available = set(pq.read_schema(typed_path).names)
+                wanted = [c for c in wanted if c in available]
+            return pd.read_parquet(typed_path, columns=wanted)
+    return read_csv_typed(csv_path, wanted)
+
+
+def iter_indexed(
+    csv_path: str,
+    match_ids: Optional[Iterable[Any]] = None,
+    start=None,
+    end=None,
+    columns: Optional[Iterable[str]] = None,
+    chunk_rows: int = 50_000,
+    index: Optional[Dict[str, Any]] = None,
+) -> Optional[Iterator[pd.DataFrame]]:
+    """
+    Filas de los partidos pedidos (`match_ids` y/o rango de fechas) leyendo
+    solo sus rangos de bytes del CSV, en bloques de unas `chunk_rows` filas:
+    los rangos se agrupan por su número de filas y cada grupo se lee (un seek
+    por rango) y se parsea por separado, sin juntar la selección entera.
+    None si el maestro no tiene índice al día (`load_master_index`; el
+    llamador cae a una lectura normal). `index` evita releer el índice en
+    consultas repetidas.
+    """
+    if index is None:
+        index = load_master_index(csv_path)
+    if index is None:
+        return None
+    ids = None if match_ids is None else {str(m).strip() for m in match_ids}
+    if start is not None or end is not None:
+        in_range = set(matches_between(
+            index,
+            None if start is None else pd.Timestamp(start).date().isoformat(),
+            None if end is None else pd.Timestamp(end).date().isoformat(),
+        ))
+        ids = in_range if ids is None else ids & in_range
+    if ids is None:
+        ids = set(index["matches"])
+    return _read_ranges(csv_path, master_ranges(index, ids), index["header"], columns, chunk_rows)
+
+
+def _read_ranges(csv_path: str, ranges: List[List[int]], header: List[str],
+                 columns: Optional[Iterable[str]], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    wanted = set(columns) if columns is not None else None
+    usecols = None if wanted is None else (lambda c: c in wanted)
+    group: List[List[int]] = []
+    rows = 0
+    for i, r in enumerate(ranges):
+        group.append(r)
+        rows += r[3]
+        if rows < chunk_rows and i + 1 < len(ranges):
+            continue
+        yield pd.read_csv(io.BytesIO(read_ranges(csv_path, group)), header=None, names=header, usecols=usecols,
+                          low_memory=False)
+        group, rows = [], 0
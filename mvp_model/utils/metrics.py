@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+# numpy/sklearn se importan dentro de las funciones: los CLIs que importan este
+# módulo no los cargan al arrancar
+
+
+def probability_metrics(y_true: np.ndarray, proba: np.ndarray) -> dict:
+    """LogLoss, ROC-AUC (None con una sola clase), Brier y n."""
+    import numpy as np
+    from sklearn.metrics import brier_score_loss, log_loss, roc_auc_score
+
+    return {
+        "log_loss": float(log_loss(y_true, proba, labels=[0, 1])),
+        "roc_auc": float(roc_auc_score(y_true, proba)) if len(np.unique(y_true)) > 1 else None,
+        "brier": float(brier_score_loss(y_true, proba)),
+        "n_test": int(len(y_true)),
+    }
+
+
+def discrete_metrics(y_true: np.ndarray, proba: np.ndarray, threshold: float = 0.5) -> dict:
+    """Matriz de confusión, accuracy, precision, recall y F1 con `proba >= threshold`."""
+    pred = (proba >= threshold).astype(int)
+    tp = int(((pred == 1) & (y_true == 1)).sum())
+    tn = int(((pred == 0) & (y_true == 0)).sum())
+    fp = int(((pred == 1) & (y_true == 0)).sum())
+    fn = int(((pred == 0) & (y_true == 1)).sum())
+    acc = (tp + tn) / max(1, len(y_true))
+    prec = tp / max(1, (tp + fp))
+    rec = tp / max(1, (tp + fn))
+    f1 = (2 * prec * rec / (prec + rec)) if (prec + rec) > 0 else 0.0
+    return {
+        "threshold": threshold,
+        "tp": tp,
+        "tn": tn,
+        "fp": fp,
+        "fn": fn,
+        "accuracy": float(acc),
+        "precision": float(prec),
+        "recall": float(rec),
+        "f1": float(f1),
+    }
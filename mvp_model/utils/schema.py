@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import os
+import time
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scripts.match_index import DATE_FORMATS, RELATIVE_DAY
+
+# Tipos declarados por columna (conversión vectorizada, una vez por columna):
+#   "percent"  "78%"            -> float32 (78.0)
+#   "fraction" "9/58"           -> <col>_won, <col>_total (Int16)
+#   "duration" "1:05:24"/"53:34" -> <col>_s (Int32, segundos)
+#   "score"    "13 - 9"         -> <col>_team1, <col>_team2 (Int16)
+#   "played_won" "14 (10)"      -> <tipo>_played, <tipo>_won (Int32; parser de utils/economy.py)
+#   "list"     "['Jett', 'Raze']" -> category ("Jett, Raze", como `agent`)
+#   "float32", "Int8", "Int16", "Int32" -> numérico (nullable en los enteros)
+#   "category", "datetime", "text" (cadena sin espacios extremos)
+# Lo que no encaja (N/A, -, vacío) queda como nulo. Columnas no declaradas no se tocan.
+_RATES = {c: "float32" for c in ("rating", "acs", "adr", "kd_ratio", "kpr", "apr", "fkpr", "fdpr")}
+_MAP_PICKS = {m: "float32" for m in (
+    "Split", "Abyss", "Pearl", "Lotus", "Bind", "Haven", "Fracture", "Icebox", "Ascent", "Corrode", "Sunset",
+)}
+
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    "agents_stats": {"agent_name": "category", "total_utilization": "float32", **_MAP_PICKS,
+                     "tournament_name": "category"},
+    "detailed_matches_maps": {
+        "match_id": "Int32", "map_name": "category", "map_order": "Int8", "score": "score",
+        "winner": "category", "duration": "duration", "picked_by": "category", "tournament_name": "category",
+    },
+    "detailed_matches_overview": {
+        "match_id": "Int32", "event": "category", "date": "datetime", "format": "category", "score": "score",
+        "maps_played": "Int8", "patch": "category", "pick_ban_info": "text", "tournament_name": "category",
+    },
+    "detailed_matches_player_stats": {
+        "match_id": "Int32", "event_name": "category", "event_stage": "category", "match_date": "datetime",
+        "team1": "category", "team2": "category", "score_overall": "score", "player_name": "category",
+        "player_id": "Int32", "player_team": "category", "stat_type": "category", "agent": "category",
+        "rating": "float32", "acs": "float32", "k": "Int16", "d": "Int16", "a": "Int16", "kd_diff": "Int16",
+        "kast": "percent", "adr": "float32", "hs_percent": "percent", "fk": "Int16", "fd": "Int16",
+        "fk_fd_diff": "Int16", "map_name": "category", "map_winner": "category", "tournament_name": "category",
+    },
+    "economy_data": {
+        "map": "category", "Team": "category", "Pistol Won": "Int8", "Eco (won)": "played_won",
+        "Semi-eco (won)": "played_won", "Semi-buy (won)": "played_won", "Full buy(won)": "played_won",
+        "match_id": "Int32", "tournament_name": "category",
+    },
+    "event_info": {"tournament_name": "category"},
+    "maps_stats": {"map_name": "category", "times_played": "Int16", "attack_win_percent": "percent",
+                   "defense_win_percent": "percent", "tournament_name": "category"},
+    "matches": {
+        "date": "datetime", "match_id": "Int32", "team1": "category", "score1": "Int8", "team2": "category",
+        "score2": "Int8", "score": "score", "winner": "category", "status": "category", "week": "category",
+        "stage": "category", "tournament_name": "category",
+    },
+    "performance_data": {
+        "Match ID": "Int32", "Map": "category", "Player": "category", "Team": "category", "Agent": "category",
+        **{c: "Int16" for c in ("2K", "3K", "4K", "5K", "1v1", "1v2", "1v3", "1v4", "1v5", "ECON", "PL", "DE")},
+        "tournament_name": "category",
+    },
+    "player_stats": {
+        "player": "category", "player_name": "category", "team": "category", "player_id": "Int32",
+        "agents": "list", "agents_count": "Int8", "rounds": "Int16", **_RATES, "kast": "percent",
+        "hs_percent": "percent", "cl_percent": "percent", "clutches": "fraction", "k_max": "Int16",
+        **{c: "Int16" for c in ("kills", "deaths", "assists", "first_kills", "first_deaths")},
+        "tournament_name": "category",
+    },
+}
+
+_SPLITS = {"fraction": ("_won", "_total"), "duration": ("_s",), "score": ("_team1", "_team2")}
+_PATTERNS = {
+    "fraction": r"^\s*(\d+)\s*/\s*(\d+)\s*$",
+    "duration": r"^\s*(?:(\d+):)?(\d+):(\d+)\s*$",
+    "score": r"^\s*(\d+)\s*-\s*(\d+)\s*$",
+}
+
+
+def base_name(csv_path: str) -> str:
+    """`masters_csvs/player_stats.csv` -> `player_stats` (clave de SCHEMAS)."""
+    return os.path.splitext(os.path.basename(csv_path))[0]
+
+
+def typed_columns(base: str, column: str) -> List[str]:
+    """Columnas que produce `column` tras normalizar (las divididas cambian de nombre)."""
+    kind = SCHEMAS.get(base, {}).get(column)
+    if kind == "played_won":
+        from mvp_model.utils.economy import BUY_COLUMNS
+
+        return [f"{BUY_COLUMNS[column]}_played", f"{BUY_COLUMNS[column]}_won"]
+    return [column + s for s in _SPLITS[kind]] if kind in _SPLITS else [column]
+
+
+def source_columns(base: str, columns: Sequence[str]) -> List[str]:
+    """Columnas del CSV necesarias para obtener `columns` (nombres ya normalizados)."""
+    produced = {t: c for c in SCHEMAS.get(base, {}) for t in typed_columns(base, c)}
+    out: List[str] = []
+    for c in columns:
+        src = produced.get(c, c)
+        if src not in out:
+            out.append(src)
+    return out
+
+
+def _text(s: pd.Series) -> pd.Series:
+    return s.astype("string").str.strip()
+
+
+def _numeric(s: pd.Series, dtype: str) -> pd.Series:
+    if s.dtype.kind not in "biuf":
+        s = pd.to_numeric(_text(s), errors="coerce")
+    if dtype.startswith("Int"):
+        # Decimales o fuera de rango -> nulo en vez de truncar en silencio
+        info = np.iinfo(dtype.lower())
+        s = s.where((s % 1 == 0) & s.between(info.min, info.max))
+    return s.astype(dtype)
+
+
+def parse_dates(s: pd.Series, column: str = "date") -> pd.Series:
+    """
+    Fechas de un maestro como datetime64, sin el sufijo "Yesterday"/"Today".
+    Cada valor se lee con el primer formato de `DATE_FORMATS` que encaja, los
+    mismos que scripts/match_index.parse_datetime. Los valores no vacíos que
+    no encajan en ninguno quedan como NaT y se avisan (warnings) con cuántos
+    son y unos ejemplos.
+    """
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    text = _text(s).str.replace(RELATIVE_DAY, "", regex=True)
+    parsed = pd.to_datetime(text, format=DATE_FORMATS[0], errors="coerce")
+    for fmt in DATE_FORMATS[1:]:
+        todo = parsed.isna() & text.notna()
+        if not todo.any():
+            break
+        parsed = parsed.fillna(pd.to_datetime(text[todo], format=fmt, errors="coerce"))
+    bad = text[parsed.isna() & text.notna() & (text != "")]
+    if len(bad):
+        warnings.warn(f"{column}: {len(bad)} fechas sin interpretar quedan como NaT "
+                      f"(p. ej. {list(bad.unique()[:3])})", stacklevel=2)
+    return parsed
+
+
+def _convert(s: pd.Series, column: str, kind: str) -> Dict[str, pd.Series]:
+    if kind == "percent":
+        if s.dtype.kind in "biuf":
+            return {column: s.astype("float32")}
+        return {column: pd.to_numeric(_text(s).str.rstrip("%"), errors="coerce").astype("float32")}
+    if kind in _PATTERNS:
+        parts = _text(s).str.extract(_PATTERNS[kind]).apply(pd.to_numeric)
+        if kind == "duration":
+            secs = parts[0].fillna(0) * 3600 + parts[1] * 60 + parts[2]
+            return {column + "_s": secs.astype("Int32")}
+        return {column + suffix: parts[i].astype("Int16") for i, suffix in enumerate(_SPLITS[kind])}
+    if kind == "played_won":
+        from mvp_model.utils.economy import BUY_COLUMNS, split_played_won
+
+        played, won = split_played_won(s)
+        return {f"{BUY_COLUMNS[column]}_{part}": pd.Series(pd.array(v, dtype="Int32"), index=s.index)
+                for part, v in (("played", played), ("won", won))}
+    if kind == "text":
+        text = _text(s)
+        return {column: text.mask(text == "")}
+    if kind == "list":
+        flat = _text(s).str.replace(r"[\[\]'\"]", "", regex=True).str.strip()
+        return {column: flat.mask(flat == "").astype("category")}
+    if kind == "category":
+        return {column: s.astype("category")}
+    if kind == "datetime":
+        return {column: parse_dates(s, column)}
+    return {column: _numeric(s, kind)}
+
+
+def normalize(df: pd.DataFrame, base: str) -> pd.DataFrame:
+    """
+    Aplica SCHEMAS[base] a un DataFrame leído del CSV maestro (completo o un
+    bloque). Cada columna declarada se convierte con operaciones de cadena
+    vectorizadas; las divididas (fraction/duration/score) se reemplazan por
+    sus columnas nuevas en la misma posición.
+    """
+    schema = SCHEMAS.get(base, {})
+    out: Dict[str, pd.Series] = {}
+    for col in df.columns:
+        kind = schema.get(col)
+        if kind is None:
+            out[col] = df[col]
+        else:
+            out.update(_convert(df[col], col, kind))
+    return pd.DataFrame(out, index=df.index)
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def normalize_report(raw: pd.DataFrame, base: str) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """
+    normalize() cronometrado. Devuelve (typed, report) con report = {"rows",
+    "seconds", "rows_per_s", "raw_bytes", "typed_bytes", "saved"}; `raw_bytes`
+    es la memoria de `raw` tal como la deja `pd.read_csv` (texto en columnas
+    object, numéricos en 64 bits).
+    """
+    t0 = time.perf_counter()
+    typed = normalize(raw, base)
+    seconds = time.perf_counter() - t0
+    raw_bytes, typed_bytes = memory_bytes(raw), memory_bytes(typed)
+    return typed, {
+        "rows": int(len(raw)),
+        "seconds": seconds,
+        "rows_per_s": len(raw) / seconds if seconds > 0 else float("inf"),
+        "raw_bytes": raw_bytes,
+        "typed_bytes": typed_bytes,
+        "saved": 1.0 - typed_bytes / raw_bytes if raw_bytes else 0.0,
+    }
+
+
+def read_csv_typed(csv_path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Lee el CSV maestro (solo lo necesario para `columns`) y lo normaliza en memoria."""
+    base = base_name(csv_path)
+    if columns is None:
+        raw = pd.read_csv(csv_path, low_memory=False)
+    else:
+        wanted = set(source_columns(base, columns))
+        raw = pd.read_csv(csv_path, usecols=lambda c: c in wanted, low_memory=False)
+    typed = normalize(raw, base)
+    return typed if columns is None else typed[[c for c in columns if c in typed.columns]]
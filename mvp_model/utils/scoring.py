@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+# Exportación ligera del Pipeline StandardScaler + LogisticRegression: un JSON
+# con medias/escalas, coeficientes, intercepto y nombres de features. Cargarlo
+# y puntuar solo necesita NumPy (sin scikit-learn ni pandas). Desde la v2 el
+# JSON guarda también el motor de rating y K/base con los que se calcularon
+# las features: Elo y Glicko-2 comparten nombres de columna.
+EXPORT_FORMAT = "mvp-logistic"
+EXPORT_VERSION = 2
+
+
+def logistic_payload(
+    pipeline,
+    feature_names: Sequence[str],
+    rating_engine: Optional[str] = None,
+    k: Optional[float] = None,
+    base: Optional[float] = None,
+) -> dict:
+    """
+    Parámetros de `pipeline` (StandardScaler opcional + LogisticRegression
+    binaria) en el formato de exportación. ValueError si es otro modelo.
+    """
+    steps = dict(getattr(pipeline, "named_steps", {}))
+    model = steps.get("model")
+    scaler = steps.get("scaler")
+    if type(model).__name__ != "LogisticRegression":
+        raise ValueError(f"Solo se exporta LogisticRegression (modelo: {type(model).__name__})")
+    if len(model.classes_) != 2:
+        raise ValueError("Solo se exportan modelos binarios")
+    payload = {
+        "format": EXPORT_FORMAT,
+        "version": EXPORT_VERSION,
+        "feature_names": list(feature_names),
+        "classes": [int(c) for c in model.classes_],
+        "mean": scaler.mean_.tolist() if scaler is not None and scaler.with_mean else None,
+        "scale": scaler.scale_.tolist() if scaler is not None and scaler.with_std else None,
+        "coef": model.coef_.ravel().tolist(),
+        "intercept": float(model.intercept_[0]),
+        "rating_engine": rating_engine,
+        "k": None if k is None else float(k),
+        "base": None if base is None else float(base),
+    }
+    return payload
+
+
+def export_logistic(
+    pipeline,
+    feature_names: Sequence[str],
+    path: str,
+    rating_engine: str,
+    k: float,
+    base: float,
+) -> dict:
+    """
+    Escribe `pipeline` como JSON en `path` (escritura atómica). Los floats se
+    guardan con `repr`, que es exacto al volver a leerlos.
+    """
+    payload = logistic_payload(pipeline, feature_names, rating_engine, k, base)
+    out_dir = os.path.dirname(path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+    return payload
+
+
+def training_config(info: dict) -> dict:
+    """
+    Motor de rating y K/base de un modelo, leídos de su export JSON (`k`,
+    `base`) o de train_info.json (`elo_k`, `elo_base`). Los train_info
+    anteriores a `--rating-engine` no declaran motor: eran siempre Elo.
+    """
+    return {
+        "rating_engine": info.get("rating_engine", "elo" if "elo_k" in info else None),
+        "k": info.get("k", info.get("elo_k")),
+        "base": info.get("base", info.get("elo_base")),
+    }
+
+
+def train_info_config(model_path: str, train_info_path: Optional[str] = None) -> dict:
+    """
+    `training_config` de un .pkl: lee `train_info_path` o, si no se indica,
+    el train_info.json junto al modelo (donde lo deja train_mvp por defecto).
+    """
+    path = train_info_path or os.path.join(os.path.dirname(model_path), "train_info.json")
+    if not os.path.exists(path):
+        raise ValueError(f"No se encuentra {path}: indica el train_info.json del modelo con --train-info")
+    with open(path, "r", encoding="utf-8") as f:
+        return training_config(json.load(f))
+
+
+def check_training_config(trained: dict, engine: str, k: float, base: float) -> None:
+    """
+    ValueError si las features que se van a calcular (motor `engine`, K/base)
+    no son las del entrenamiento. Con los mismos nombres de columna, un modelo
+    Glicko-2 o con otra K puntuaría Elo sin avisar.
+    """
+    if trained.get("rating_engine") is None or trained.get("k") is None or trained.get("base") is None:
+        raise ValueError("El modelo no declara motor de rating ni K/base: vuelve a entrenarlo con train_mvp")
+    if trained["rating_engine"] != engine:
+        raise ValueError(
+            f"El modelo se entrenó con features {trained['rating_engine']} y aquí se calculan con {engine}"
+        )
+    if float(trained["k"]) != float(k) or float(trained["base"]) != float(base):
+        raise ValueError(
+            f"El modelo se entrenó con K={trained['k']:g}, base={trained['base']:g} "
+            f"y aquí se usa K={k:g}, base={base:g}"
+        )
+
+
+def _expit(v: float) -> float:
+    # Misma fórmula que scipy.special.expit (1 / (1 + exp(-x)) con exp de libm).
+    # np.exp usa otra implementación y difiere en el último bit en ~2% de valores.
+    try:
+        return 1.0 / (1.0 + math.exp(-v))
+    except OverflowError:
+        return 0.0
+
+
+class LogisticScorer:
+    """
+    Puntúa el modelo exportado con NumPy. `predict_proba` reproduce bit a bit
+    `Pipeline.predict_proba` cuando sklearn recibe un DataFrame: escalado en
+    el mismo orden, producto con la matriz en orden Fortran (como la que sale
+    de `DataFrame.to_numpy()`) y la misma sigmoide.
+    """
+
+    def __init__(
+        self,
+        feature_names: Sequence[str],
+        coef: Sequence[float],
+        intercept: float,
+        mean: Optional[Sequence[float]] = None,
+        scale: Optional[Sequence[float]] = None,
+    ):
+        self.feature_names: List[str] = list(feature_names)
+        self.coef_T = np.asarray(coef, dtype=np.float64).reshape(-1, 1)
+        self.intercept = np.array([intercept], dtype=np.float64)
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+        # Motor y K/base del entrenamiento (ver `training_config`); vacío si el
+        # scorer viene de un Pipeline en memoria
+        self.training: dict = {"rating_engine": None, "k": None, "base": None}
+
+    @classmethod
+    def load(cls, path: str) -> "LogisticScorer":
+        with open(path, "r", encoding="utf-8") as f:
+            d = json.load(f)
+        if d.get("format") != EXPORT_FORMAT or d.get("version") != EXPORT_VERSION:
+            raise ValueError(f"Formato de modelo no soportado en {path}: {d.get('format')} v{d.get('version')}")
+        return cls._from_payload(d)
+
+    @classmethod
+    def from_pipeline(cls, pipeline, feature_names: Sequence[str]) -> "LogisticScorer":
+        """Scorer equivalente a un Pipeline ya cargado (ValueError si no es lineal)."""
+        return cls._from_payload(logistic_payload(pipeline, feature_names))
+
+    @classmethod
+    def _from_payload(cls, d: dict) -> "LogisticScorer":
+        scorer = cls(d["feature_names"], d["coef"], d["intercept"], d.get("mean"), d.get("scale"))
+        scorer.training = training_config(d)
+        return scorer
+
+    def decision_function(self, X) -> np.ndarray:
+        Z = np.array(X, dtype=np.float64, order="F")
+        if Z.ndim != 2 or Z.shape[1] != len(self.feature_names):
+            raise ValueError(f"Se esperan {len(self.feature_names)} columnas: {self.feature_names}")
+        if self.mean is not None:
+            Z -= self.mean
+        if self.scale is not None:
+            Z /= self.scale
+        return (Z @ self.coef_T + self.intercept).reshape(-1)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Matriz (n, 2) [P(clase 0), P(clase 1)], como sklearn."""
+        p = np.array([_expit(v) for v in self.decision_function(X).tolist()], dtype=np.float64)
+        return np.stack([1 - p, p], axis=1)
+
+
+def predict_proba_batch(scorers: Sequence[LogisticScorer], X) -> np.ndarray:
+    """
+    P(clase 1) de varios modelos lineales sobre las mismas features en una
+    sola pasada: matriz (modelos, n). Cada modelo ve su propia copia escalada
+    en orden Fortran y el producto es un matmul apilado, así que cada fila
+    coincide bit a bit con `predict_proba` del modelo por separado.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim != 2:
+        raise ValueError("Se espera una matriz (n, features)")
+    n, d = X.shape
+    if any(len(s.feature_names) != d for s in scorers):
+        raise ValueError("Todos los modelos del lote deben usar las mismas columnas")
+    # (M, d, n) contiguo -> transpuesto, cada Z[m] es (n, d) en orden Fortran
+    Z = np.empty((len(scorers), d, n), dtype=np.float64)
+    Z[:] = X.T
+    Z = Z.transpose(0, 2, 1)
+    # Sin scaler: restar 0 y dividir por 1 no cambia ningún bit
+    Z -= np.stack([s.mean if s.mean is not None else np.zeros(d) for s in scorers])[:, None, :]
+    Z /= np.stack([s.scale if s.scale is not None else np.ones(d) for s in scorers])[:, None, :]
+    W = np.stack([s.coef_T for s in scorers])
+    logits = (Z @ W)[:, :, 0] + np.concatenate([s.intercept for s in scorers])[:, None]
+    try:
+        from scipy.special import expit  # misma sigmoide que sklearn, vectorizada
+    except ImportError:
+        return np.array([[_expit(v) for v in row] for row in logits.tolist()], dtype=np.float64)
+    return expit(logits)
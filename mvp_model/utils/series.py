@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import itertools
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Formato de veto sobre un pool de 7 mapas: acciones en orden (A = equipo que
+# empieza el veto, B = el otro); el mapa que queda es el decider. Los mapas
+# jugados son los picks en orden y después el decider.
+VETO_FORMATS: Dict[str, List[Tuple[str, str]]] = {
+    "Bo1": [("A", "ban"), ("B", "ban"), ("A", "ban"), ("B", "ban"), ("A", "ban"), ("B", "ban")],
+    "Bo3": [("A", "ban"), ("B", "ban"), ("A", "pick"), ("B", "pick"), ("A", "ban"), ("B", "ban")],
+    "Bo5": [("A", "ban"), ("B", "ban"), ("A", "pick"), ("B", "pick"), ("A", "pick"), ("B", "pick")],
+}
+POOL_SIZE = 7
+
+_VETO_STEP = re.compile(r"^(?P<actor>.+?)\s+(?P<action>ban|pick)\s+(?P<map>.+)$")
+_VETO_REMAINS = re.compile(r"^(?P<map>.+?)\s+remains$")
+
+
+@lru_cache(maxsize=None)
+def veto_paths(fmt: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Todos los caminos de veto del formato como índices del pool: `paths`
+    (7·6·5·4·3·2 = 5040, 6) en orden lexicográfico, de modo que los valores
+    por camino se pueden ver como un árbol (7, 6, 5, 4, 3, 2) donde el eje s
+    elige entre los mapas que quedan en el paso s.
+
+    Con mapas independientes la serie solo depende del conjunto de mapas
+    jugados (picks + decider), no del orden: `played_sets` (conjuntos
+    distintos, mapas jugados) y `path_set` (5040,) con el conjunto de cada
+    camino. Bo3 tiene 35 conjuntos y Bo5 21, así que la probabilidad de serie
+    se calcula una vez por conjunto y se reparte a los caminos.
+    """
+    steps = VETO_FORMATS[fmt]
+    paths = np.array(list(itertools.permutations(range(POOL_SIZE), len(steps))), dtype=np.int64)
+    decider = POOL_SIZE * (POOL_SIZE - 1) // 2 - paths.sum(axis=1)
+    picks = [i for i, (_, action) in enumerate(steps) if action == "pick"]
+    played = np.column_stack([paths[:, picks], decider]) if picks else decider[:, None]
+    masks = np.bitwise_or.reduce(np.left_shift(1, played), axis=1)
+    uniq, first, path_set = np.unique(masks, return_index=True, return_inverse=True)
+    played_sets = np.sort(played[first], axis=1)
+    for a in (paths, played_sets, path_set):
+        a.setflags(write=False)
+    return paths, played_sets, path_set.reshape(-1)
+
+
+@lru_cache(maxsize=None)
+def _majority_outcomes(n: int) -> np.ndarray:
+    # Resultados (2^n, n) de n mapas (True = gana team1) con mayoría de victorias
+    wins = ((np.arange(2 ** n)[:, None] >> np.arange(n)) & 1).astype(bool)
+    out = wins[wins.sum(axis=1) > n // 2]
+    out.setflags(write=False)
+    return out
+
+
+def series_win_prob(p: np.ndarray) -> np.ndarray:
+    """
+    P(ganar la serie) dadas las probabilidades por mapa en el último eje
+    (mapas independientes). Jugar todos los mapas y contar mayoría da el mismo
+    ganador que parar al alcanzarla, así que basta con sumar las
+    probabilidades de los resultados con mayoría (como mucho 16 para un Bo5),
+    enumerados una vez por número de mapas.
+    """
+    p = np.asarray(p, dtype=np.float64)
+    q = p[..., None, :]
+    return np.where(_majority_outcomes(p.shape[-1]), q, 1.0 - q).prod(axis=-1).sum(axis=-1)
+
+
+@dataclass
+class SeriesOdds:
+    """Probabilidad de que team1 gane la serie bajo el formato de veto."""
+
+    fmt: str
+    pool: List[str]
+    path_probs: np.ndarray  # (5040,) un valor por camino de veto
+    uniform: float  # media sobre caminos (veto al azar)
+    minimax: float  # ambos equipos vetan de forma óptima
+    minimax_path: List[Tuple[str, str, str]]  # (equipo, acción, mapa) del camino óptimo
+
+
+def _reduce_last(v: np.ndarray, op) -> np.ndarray:
+    # max/min sobre un último eje corto (2..7) como cadena elemento a elemento:
+    # mucho más rápido que ndarray.max(axis=-1) con ejes internos tan pequeños
+    out = v[..., 0]
+    for i in range(1, v.shape[-1]):
+        out = op(out, v[..., i])
+    return out
+
+
+def simulate_series(p_pool: Sequence[float], fmt: str = "Bo3", team1_first: bool = True,
+                    pool: Optional[Sequence[str]] = None) -> SeriesOdds:
+    """
+    Evalúa todos los caminos de veto de un Bo1/Bo3/Bo5 a partir de P(team1
+    gana) en cada mapa del pool (7 mapas). `minimax` resuelve el árbol de veto
+    hacia atrás: en sus turnos team1 elige la acción que maximiza su
+    probabilidad de serie y team2 la que la minimiza (bans y picks por igual).
+    """
+    p_pool = np.asarray(p_pool, dtype=np.float64)
+    if p_pool.shape != (POOL_SIZE,):
+        raise ValueError(f"Se esperan {POOL_SIZE} probabilidades (una por mapa del pool)")
+    pool = list(pool) if pool is not None else [str(i) for i in range(POOL_SIZE)]
+    steps = VETO_FORMATS[fmt]
+    _, played_sets, path_set = veto_paths(fmt)
+    probs = series_win_prob(p_pool[played_sets])[path_set]
+
+    # Árbol (7, 6, 5, 4, 3, 2): reducir desde el último paso hacia el primero
+    shape = tuple(range(POOL_SIZE, POOL_SIZE - len(steps), -1))
+    values = [probs.reshape(shape)]
+    for s in range(len(steps) - 1, -1, -1):
+        team1_turn = (steps[s][0] == "A") == team1_first
+        values.append(_reduce_last(values[-1], np.maximum if team1_turn else np.minimum))
+    # Recuperar el camino óptimo bajando por el árbol
+    choice: List[int] = []
+    for s in range(len(steps)):
+        sub = values[len(steps) - 1 - s][tuple(choice)]
+        team1_turn = (steps[s][0] == "A") == team1_first
+        choice.append(int(np.argmax(sub) if team1_turn else np.argmin(sub)))
+    remaining = list(range(POOL_SIZE))
+    best_path = []
+    for (actor, action), c in zip(steps, choice):
+        team = "team1" if (actor == "A") == team1_first else "team2"
+        best_path.append((team, action, pool[remaining.pop(c)]))
+    best_path.append(("-", "decider", pool[remaining[0]]))
+    return SeriesOdds(
+        fmt=fmt,
+        pool=pool,
+        path_probs=probs,
+        uniform=float(probs.mean()),
+        minimax=float(values[-1]),
+        minimax_path=best_path,
+    )
+
+
+def parse_pick_ban(info: str) -> Tuple[List[Tuple[str, str, str]], Optional[str]]:
+    """
+    "LOUD ban Fracture; EG ban Haven; ...; Lotus remains" -> ([(actor, acción,
+    mapa), ...], decider). Los actores van abreviados (EG); las notas que no
+    son pasos de veto se ignoran. ([], None) si no hay información.
+    """
+    steps: List[Tuple[str, str, str]] = []
+    decider = None
+    if not isinstance(info, str):
+        return steps, decider
+    for token in info.split(";"):
+        token = token.strip()
+        m = _VETO_STEP.match(token)
+        if m:
+            steps.append((m.group("actor").strip(), m.group("action"), m.group("map").strip()))
+            continue
+        m = _VETO_REMAINS.match(token)
+        if m and decider is None:
+            decider = m.group("map").strip()
+    return steps, decider
+
+
+def team1_vetoes_first(steps: Sequence[Tuple[str, str, str]], picked_by: Dict[str, str],
+                       team1: str, team2: str) -> Optional[bool]:
+    """
+    ¿Empieza team1 el veto? Los actores del veto van abreviados, así que se
+    resuelven con `picked_by` (mapa -> equipo que lo eligió, con la misma
+    clave que `team1`/`team2`; map_model usa IDs del registro).
+    None si no se puede saber (Bo1 sin picks, datos incompletos).
+    """
+    if not steps:
+        return None
+    first = steps[0][0]
+    for actor, action, map_name in steps:
+        team = picked_by.get(map_name) if action == "pick" else None
+        if team not in (team1, team2):
+            continue
+        return (team == team1) == (actor == first)
+    return None
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""Canonical team/player ID registry over the masters CSVs.
+
+The raw dumps name the same team in several ways: full names in
+`matches.csv` ("BBL Esports"), abbreviations in `economy_data.csv`,
+`performance_data.csv` and `player_stats.csv` ("BBL"), sponsored names in
+`detailed_matches_*` ("VISA KRÜ(KRÜ Esports)") and stray whitespace
+anywhere. `build_registry` resolves every alias to one integer ID:
+
+- teams are the `team1`/`team2` names of `matches.csv`; sponsored names map
+  to the name in parentheses;
+- abbreviations are resolved by the players of each match (performance_data
+  vs detailed_matches_player_stats), then by elimination against the rival in
+  economy_data, then by the players of each tournament (player_stats);
+- players are keyed by their vlr.gg `player_id` when known, else by name.
+
+IDs are stable across runs: existing entities keep theirs and new ones get
+the next free ID. `write_id_sidecar` annotates each master with a
+row-aligned `{base}.ids.csv` holding one integer `<column>_id` per entity
+column (-1 when the value does not resolve). Stdlib only, like the merge.
+"""
+import csv
+import json
+import os
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+REGISTRY_NAME = "entity_registry.json"
+REGISTRY_VERSION = 1
+
+# Entity columns per master base name: column -> "team" | "player"
+ENTITY_COLUMNS: Dict[str, Dict[str, str]] = {
+    "detailed_matches_maps": {"winner": "team", "picked_by": "team"},
+    "detailed_matches_player_stats": {
+        "team1": "team", "team2": "team", "player_team": "team", "player_name": "player",
+    },
+    "economy_data": {"Team": "team"},
+    "matches": {"team1": "team", "team2": "team", "winner": "team"},
+    "performance_data": {"Team": "team", "Player": "player"},
+    "player_stats": {"team": "team", "player_name": "player"},
+}
+
+
+def registry_path(output_dir: str) -> str:
+    return os.path.join(output_dir, REGISTRY_NAME)
+
+
+def ids_path(csv_path: str) -> str:
+    root, _ = os.path.splitext(csv_path)
+    return root + ".ids.csv"
+
+
+def ids_sibling(csv_path: str) -> Optional[str]:
+    """`ids_path` of a master if it exists and is not older than the CSV, else None."""
+    root, ext = os.path.splitext(csv_path)
+    if ext.lower() != ".csv":
+        return None
+    path = ids_path(csv_path)
+    if not os.path.exists(path) or not os.path.exists(csv_path):
+        return None
+    if os.path.getmtime(path) < os.path.getmtime(csv_path):
+        return None
+    return path
+
+
+def normalize(value: Any) -> str:
+    """Alias key: inner whitespace collapsed, stripped and casefolded."""
+    return " ".join(str(value).split()).casefold()
+
+
+def canonical_team(value: Any) -> str:
+    """Name as in matches.csv: "VISA KRÜ(KRÜ Esports)" -> "KRÜ Esports"."""
+    s = " ".join(str(value).split())
+    if s.endswith(")") and "(" in s:
+        inner = s[s.rindex("(") + 1:-1].strip()
+        if inner and "(" not in inner:
+            return inner
+    return s
+
+
+def _rows(csv_path: str, columns: List[str]) -> Iterator[Tuple[str, ...]]:
+    """Stream the given columns of a master ('' when a column is missing)."""
+    if not os.path.exists(csv_path):
+        return
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        try:
+            header = next(reader)
+        except StopIteration:
+            return
+        col_idx = {c: i for i, c in enumerate(header)}
+        picks = [col_idx.get(c) for c in columns]
+        for row in reader:
+            if not row:
+                continue
+            n = len(row)
+            yield tuple(row[i] if i is not None and i < n else "" for i in picks)
+
+
+def _vote(pairs: Counter) -> Dict[str, str]:
+    """For each alias, the name with most votes (ties: smallest name)."""
+    best: Dict[str, Tuple[int, str]] = {}
+    for (alias, name), n in pairs.items():
+        cur = best.get(alias)
+        if cur is None or n > cur[0] or (n == cur[0] and name < cur[1]):
+            best[alias] = (n, name)
+    return {alias: name for alias, (_, name) in best.items()}
+
+
+class _Entities:
+    """Stable integer IDs plus the alias -> ID hash index of one entity kind."""
+
+    def __init__(self, prev: Optional[List[Dict[str, Any]]] = None):
+        self.records: Dict[int, Dict[str, Any]] = {}
+        self.by_key: Dict[str, int] = {}
+        self.index: Dict[str, int] = {}
+        for rec in prev or []:
+            self.records[rec["id"]] = {**rec, "aliases": []}
+            self.by_key[rec["key"]] = rec["id"]
+        self._next = max(self.records, default=-1) + 1
+        self._seen: set = set()
+
+    def add(self, key: str, name: str, **extra: Any) -> int:
+        ent_id = self.by_key.get(key)
+        if ent_id is None:
+            ent_id = self._next
+            self._next += 1
+            self.by_key[key] = ent_id
+            self.records[ent_id] = {"id": ent_id, "key": key, "name": name, "aliases": [], **extra}
+        if ent_id not in self._seen:
+            # Display name/extras follow the current data; the ID never changes
+            self._seen.add(ent_id)
+            self.records[ent_id].update(name=name, **extra)
+        return ent_id
+
+    def alias(self, alias: str, ent_id: int) -> None:
+        key = normalize(alias)
+        if key and key not in self.index:
+            self.index[key] = ent_id
+            self.records[ent_id]["aliases"].append(key)
+
+    def dump(self) -> List[Dict[str, Any]]:
+        # Entities absent from the current masters keep their ID (no aliases)
+        return [{**self.records[i], "aliases": sorted(self.records[i]["aliases"])} for i in sorted(self.records)]
+
+
+def load_registry(output_dir: str) -> Dict[str, Any]:
+    try:
+        with open(registry_path(output_dir), "r", encoding="utf-8") as f:
+            registry = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return registry if registry.get("version") == REGISTRY_VERSION else {}
+
+
+def build_registry(output_dir: str, prev: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Registry dict {"version", "teams", "players"} from the masters in `output_dir`."""
+    prev = prev or {}
+    teams = _Entities(prev.get("teams"))
+    players = _Entities(prev.get("players"))
+
+    def path(base: str) -> str:
+        return os.path.join(output_dir, f"{base}.csv")
+
+    # 1) Canonical teams (matches.csv) and their sponsored variants
+    for t1, t2 in _rows(path("matches"), ["team1", "team2"]):
+        for name in (t1, t2):
+            name = canonical_team(name)
+            if name:
+                teams.alias(name, teams.add(normalize(name), name))
+    for base, cols in (("detailed_matches_player_stats", ["team1", "team2", "player_team"]),
+                       ("detailed_matches_maps", ["winner", "picked_by"])):
+        for row in _rows(path(base), cols):
+            for raw in row:
+                ent_id = teams.index.get(normalize(canonical_team(raw)))
+                if ent_id is not None:
+                    teams.alias(raw, ent_id)
+
+    # 2) Players; rosters per match and per tournament for the abbreviations
+    roster: Dict[Tuple[str, str], str] = {}
+    event_rosters: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+    vlr_names: Dict[str, Counter] = defaultdict(Counter)
+    for match_id, name, vlr_id, team, tname in _rows(
+        path("detailed_matches_player_stats"), ["match_id", "player_name", "player_id", "player_team", "tournament_name"]
+    ):
+        name = " ".join(name.split())
+        if not name:
+            continue
+        vlr_names[vlr_id.strip()][name] += 1
+        team = canonical_team(team)
+        roster[(match_id.strip(), normalize(name))] = team
+        event_rosters[(tname, normalize(name))][team] += 1
+    for name, vlr_id in _rows(path("player_stats"), ["player_name", "player_id"]):
+        name = " ".join(name.split())
+        if name:
+            vlr_names[vlr_id.strip()][name] += 1
+
+    name_votes: Dict[str, Counter] = defaultdict(Counter)
+    for vlr_id in sorted(vlr_names):
+        if not vlr_id:
+            continue
+        name = vlr_names[vlr_id].most_common(1)[0][0]
+        ent_id = players.add(f"vlr:{vlr_id}", name, vlr_id=vlr_id)
+        for alias, n in vlr_names[vlr_id].items():
+            name_votes[normalize(alias)][ent_id] += n
+    # A name shared by several vlr ids resolves to the most frequent one
+    for alias in sorted(name_votes):
+        players.alias(alias, max(sorted(name_votes[alias]), key=lambda i: name_votes[alias][i]))
+    # Players without a vlr id anywhere are keyed by name
+    unkeyed = {normalize(n) for n in vlr_names.get("", {})} | {normalize(n) for n, in _rows(path("performance_data"), ["Player"])}
+    for name in sorted(unkeyed - set(players.index)):
+        if name:
+            players.alias(name, players.add(f"name:{name}", name))
+
+    # 3) Team abbreviations: players of each match
+    votes: Counter = Counter()
+    for match_id, player, abbr in _rows(path("performance_data"), ["Match ID", "Player", "Team"]):
+        team = roster.get((match_id.strip(), normalize(player)))
+        if team and normalize(team) in teams.index and normalize(abbr):
+            votes[(normalize(abbr), team)] += 1
+    resolved = {a: teams.index[normalize(t)] for a, t in _vote(votes).items()}
+
+    # 4) Elimination: in an economy_data match with one known abbreviation,
+    #    the other one is the rival from matches.csv
+    sides: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
+    for match_id, t1, t2 in _rows(path("matches"), ["match_id", "team1", "team2"]):
+        sides.setdefault(match_id.strip(), (
+            teams.index.get(normalize(canonical_team(t1))), teams.index.get(normalize(canonical_team(t2)))
+        ))
+    eco: Dict[str, set] = defaultdict(set)
+    for match_id, abbr in _rows(path("economy_data"), ["match_id", "Team"]):
+        if normalize(abbr):
+            eco[match_id.strip()].add(normalize(abbr))
+    while True:
+        guesses: Counter = Counter()
+        for match_id, abbrs in eco.items():
+            pair = sides.get(match_id)
+            if pair is None or len(abbrs) != 2 or None in pair:
+                continue
+            a, b = sorted(abbrs)
+            for known, other in ((a, b), (b, a)):
+                if known in resolved and other not in resolved and resolved[known] in pair:
+                    guesses[(other, pair[1] if resolved[known] == pair[0] else pair[0])] += 1
+        if not guesses:
+            break
+        resolved.update(_vote(guesses))
+
+    # 5) Tournament rosters for abbreviations only seen in player_stats
+    votes = Counter()
+    for tname, player, abbr in _rows(path("player_stats"), ["tournament_name", "player_name", "team"]):
+        abbr = normalize(abbr)
+        if not abbr or abbr in resolved or abbr in teams.index:
+            continue
+        for team, n in event_rosters.get((tname, normalize(player)), {}).items():
+            if normalize(team) in teams.index:
+                votes[(abbr, teams.index[normalize(team)])] += n
+    resolved.update(_vote(votes))
+
+    # Full names take precedence over an abbreviation that collides with one
+    for abbr in sorted(resolved):
+        teams.alias(abbr, resolved[abbr])
+
+    return {"version": REGISTRY_VERSION, "teams": teams.dump(), "players": players.dump()}
+
+
+def save_registry(output_dir: str, registry: Dict[str, Any]) -> None:
+    path = registry_path(output_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(registry, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def alias_index(registry: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """{"team": {alias: id}, "player": {alias: id}}: the hash index, keyed by `normalize`."""
+    return {
+        kind: {alias: rec["id"] for rec in registry.get(key, []) for alias in rec["aliases"]}
+        for kind, key in (("team", "teams"), ("player", "players"))
+    }
+
+
+def resolve(value: Any, kind: str, index: Dict[str, Dict[str, int]]) -> int:
+    """ID of one raw value ("team" | "player") in `alias_index`; -1 when it does not resolve."""
+    lookup = index[kind]
+    ent_id = lookup.get(normalize(value))
+    if ent_id is None and kind == "team":
+        ent_id = lookup.get(normalize(canonical_team(value)))
+    return -1 if ent_id is None else ent_id
+
+
+def write_id_sidecar(csv_path: str, columns: Dict[str, str], index: Dict[str, Dict[str, int]]) -> int:
+    """Write `{base}.ids.csv` next to one master (atomic replace). Returns rows written."""
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f), [])
+    cols = [c for c in columns if c in header]
+    out_path = ids_path(csv_path)
+    tmp = os.path.join(os.path.dirname(out_path), f".tmp_{os.path.basename(out_path)}")
+    kinds = [columns[c] for c in cols]
+    rows = 0
+    try:
+        with open(tmp, "w", newline="", encoding="utf-8") as fout:
+            writer = csv.writer(fout)
+            writer.writerow([f"{c}_id" for c in cols])
+            for row in _rows(csv_path, cols):
+                writer.writerow([resolve(value, kind, index) for value, kind in zip(row, kinds)])
+                rows += 1
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+    return rows
+
+
+def refresh(output_dir: str, force: bool = False) -> Dict[str, Any]:
+    """
+    Rebuild the registry from the masters and rewrite the `.ids.csv` sidecars
+    that are missing, older than their master, or stale because an alias
+    changed its ID (`force`: all of them). The rebuild is always seeded from
+    the saved registry, so a full re-merge keeps every existing ID. Returns
+    {"teams", "players", "aliases", "sidecars"}.
+    """
+    prev = load_registry(output_dir)
+    registry = build_registry(output_dir, prev)
+    changed = force or alias_index(prev) != alias_index(registry) or not prev
+    save_registry(output_dir, registry)
+
+    index = alias_index(registry)
+    written = []
+    for base, columns in ENTITY_COLUMNS.items():
+        csv_path = os.path.join(output_dir, f"{base}.csv")
+        if not os.path.exists(csv_path):
+            continue
+        side = ids_path(csv_path)
+        if changed or not os.path.exists(side) or os.path.getmtime(side) < os.path.getmtime(csv_path):
+            write_id_sidecar(csv_path, columns, index)
+            written.append(base)
+    return {
+        "teams": len(registry["teams"]),
+        "players": len(registry["players"]),
+        "aliases": sum(len(v) for v in index.values()),
+        "sidecars": written,
+    }
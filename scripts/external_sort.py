@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""External merge sort for row streams under a memory budget.
+
+Rows are buffered until their estimated size reaches the budget, sorted and
+spilled to a temporary run file; the runs are then combined lazily with a
+k-way `heapq.merge`. If everything fits in one buffer nothing touches disk.
+Sorting is stable (ties keep input order) as long as `key` is.
+"""
+import heapq
+import os
+import pickle
+import sys
+import tempfile
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+_BATCH_BYTES = 64 * 1024  # target size of one pickle record in a run file
+
+
+def row_size(row: List[Any]) -> int:
+    """Rough in-memory footprint of a row of short strings/ints (bytes)."""
+    return 56 + 8 * len(row) + sum(49 + len(v) if isinstance(v, str) else 32 for v in row)
+
+
+def _write_run(rows: Iterable[Any], tmp_dir: str, size: Callable[[Any], int]) -> str:
+    # Records are capped in bytes, not rows: merging k runs then holds about
+    # k * _BATCH_BYTES no matter how wide the rows are
+    fd, path = tempfile.mkstemp(prefix="run_", suffix=".pkl", dir=tmp_dir)
+    with os.fdopen(fd, "wb") as f:
+        batch: List[Any] = []
+        used = 0
+        for row in rows:
+            batch.append(row)
+            used += size(row)
+            if used >= _BATCH_BYTES:
+                pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+                batch = []
+                used = 0
+        if batch:
+            pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path: str) -> Iterator[Any]:
+    try:
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    batch = pickle.load(f)
+                except EOFError:
+                    break
+                yield from batch
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def external_sort(
+    rows: Iterable[Any],
+    key: Callable[[Any], Any],
+    budget_bytes: int,
+    tmp_dir: Optional[str] = None,
+    size: Callable[[Any], int] = row_size,
+) -> Iterator[Any]:
+    """Yield `rows` sorted by `key` holding at most ~`budget_bytes` of rows."""
+    tmp_dir = tmp_dir or tempfile.gettempdir()
+    buf: List[Any] = []
+    used = 0
+    runs: List[str] = []
+    for row in rows:
+        buf.append(row)
+        used += size(row)
+        if used >= budget_bytes:
+            buf.sort(key=key)
+            runs.append(_write_run(buf, tmp_dir, size))
+            buf = []
+            used = 0
+    buf.sort(key=key)
+    if not runs:
+        yield from buf
+        return
+    if buf:
+        runs.append(_write_run(buf, tmp_dir, size))
+        buf = []
+    # Limit the fan-in so the merge itself stays within budget; extra runs are
+    # merged into longer runs first (heapq.merge is stable across runs in list
+    # order, so ties keep input order at every level)
+    fan_in = max(2, budget_bytes // _BATCH_BYTES)
+    while len(runs) > fan_in:
+        merged: List[str] = []
+        for i in range(0, len(runs), fan_in):
+            group = runs[i:i + fan_in]
+            if len(group) == 1:
+                merged.append(group[0])
+                continue
+            merged.append(_write_run(heapq.merge(*(_read_run(p) for p in group), key=key), tmp_dir, size))
+        runs = merged
+    yield from heapq.merge(*(_read_run(p) for p in runs), key=key)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None if unavailable)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
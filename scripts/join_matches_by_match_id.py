@@ -3,8 +3,13 @@ import os
 import csv
 import json
 import argparse
+import itertools
+import tempfile
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from external_sort import external_sort, peak_rss_mb, row_size
+from match_index import IndexedCsvWriter, match_sort_key
 
 def _detect_project_root() -> str:
     """Detect project root so the script works from any CWD.
@@ -34,25 +39,71 @@ def _detect_masters_dir(root: str, override: str | None = None) -> str:
     return os.path.join(root, "masters_csvs")
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Join masters CSVs by match_id into matches_joined.csv")
     p.add_argument(
         "--masters-dir",
         default=None,
         help="Directory containing masters CSVs (default: ./datasets/masters_csvs or ./masters_csvs)",
     )
-    return p.parse_args()
+    p.add_argument(
+        "--format",
+        choices=["json", "long", "both"],
+        default="json",
+        help=(
+            "json: matches_joined.csv with players_json/maps_json (default); "
+            "long: matches_joined_{flat,players,maps}.csv sorted by match_id with a byte-offset index; "
+            "both: write both"
+        ),
+    )
+    p.add_argument(
+        "--parquet",
+        action="store_true",
+        help="With long output, also write typed .parquet copies (requires pandas + pyarrow)",
+    )
+    p.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Bounded-memory join: external sort by match_id + merge join (same output as the in-memory join)",
+    )
+    p.add_argument(
+        "--memory-budget-mb",
+        type=float,
+        default=256.0,
+        help="Memory budget for buffered rows in --streaming mode (default: 256)",
+    )
+    p.add_argument(
+        "--tmp-dir",
+        default=None,
+        help="Directory for --streaming sort runs (default: system temp dir)",
+    )
+    return p.parse_args(argv)
+
 
+# Set by configure() (paths depend on --masters-dir)
+ARGS: argparse.Namespace = argparse.Namespace()
+IN_DIR = OUT_PATH = OUT_TMP = ""
+BASE_FILE = OV_FILE = PLAYERS_FILE = MAPS_FILE = ""
+LONG_FLAT_PATH = LONG_PLAYERS_PATH = LONG_MAPS_PATH = ""
 
-ARGS = parse_args()
-IN_DIR = _detect_masters_dir(ROOT, ARGS.masters_dir)
-OUT_PATH = os.path.join(IN_DIR, "matches_joined.csv")
-OUT_TMP = os.path.join(IN_DIR, ".tmp_matches_joined.csv")
 
-BASE_FILE = os.path.join(IN_DIR, "matches.csv")
-OV_FILE = os.path.join(IN_DIR, "detailed_matches_overview.csv")
-PLAYERS_FILE = os.path.join(IN_DIR, "detailed_matches_player_stats.csv")
-MAPS_FILE = os.path.join(IN_DIR, "detailed_matches_maps.csv")
+def configure(args: argparse.Namespace) -> None:
+    """Bind parsed arguments and derived paths to the module globals (also used by run_pipeline.py)."""
+    global ARGS, IN_DIR, OUT_PATH, OUT_TMP, BASE_FILE, OV_FILE, PLAYERS_FILE, MAPS_FILE
+    global LONG_FLAT_PATH, LONG_PLAYERS_PATH, LONG_MAPS_PATH
+    ARGS = args
+    IN_DIR = _detect_masters_dir(ROOT, args.masters_dir)
+    OUT_PATH = os.path.join(IN_DIR, "matches_joined.csv")
+    OUT_TMP = os.path.join(IN_DIR, ".tmp_matches_joined.csv")
+
+    BASE_FILE = os.path.join(IN_DIR, "matches.csv")
+    OV_FILE = os.path.join(IN_DIR, "detailed_matches_overview.csv")
+    PLAYERS_FILE = os.path.join(IN_DIR, "detailed_matches_player_stats.csv")
+    MAPS_FILE = os.path.join(IN_DIR, "detailed_matches_maps.csv")
+
+    LONG_FLAT_PATH = os.path.join(IN_DIR, "matches_joined_flat.csv")
+    LONG_PLAYERS_PATH = os.path.join(IN_DIR, "matches_joined_players.csv")
+    LONG_MAPS_PATH = os.path.join(IN_DIR, "matches_joined_maps.csv")
 
 
 def read_csv(path: str) -> List[Dict[str, Any]]:
@@ -68,27 +119,18 @@ def group_by(rows: List[Dict[str, Any]], key: str) -> Dict[str, List[Dict[str, A
     return g
 
 
-def main() -> None:
-    # Leer bases
-    base_rows = read_csv(BASE_FILE)
-    ov_rows = read_csv(OV_FILE)
-    player_rows = read_csv(PLAYERS_FILE)
-    map_rows = read_csv(MAPS_FILE)
-
-    # Indexaciones por match_id
-    ov_by_match = group_by(ov_rows, "match_id")
-    players_by_match = group_by(player_rows, "match_id")
-    maps_by_match = group_by(map_rows, "match_id")
-
-    # Construir encabezados de salida
-    base_header = []
-    if base_rows:
-        base_header = list(base_rows[0].keys())
+def _header(rows: List[Dict[str, Any]]) -> List[str]:
+    return [c for c in rows[0].keys() if c is not None] if rows else []
 
-    ov_header = []
-    if ov_rows:
-        ov_header = [c for c in ov_rows[0].keys() if c != "match_id"]
 
+def write_json_joined(
+    base_rows: List[Dict[str, Any]],
+    base_header: List[str],
+    ov_by_match: Dict[str, List[Dict[str, Any]]],
+    ov_header: List[str],
+    players_by_match: Dict[str, List[Dict[str, Any]]],
+    maps_by_match: Dict[str, List[Dict[str, Any]]],
+) -> None:
     # Prefijar columnas de overview para evitar colisiones
     ov_out_cols = [f"ov_{c}" for c in ov_header]
 
@@ -129,13 +171,318 @@ def main() -> None:
 
     os.replace(OUT_TMP, OUT_PATH)
 
+
+def _write_indexed(path: str, header: List[str], rows: Any) -> int:
+    """Write rows (grouped by match_id) plus `{path}.idx.json`, atomically."""
+    tmp = os.path.join(os.path.dirname(path), f".tmp_{os.path.basename(path)}")
+    n = 0
+    try:
+        with open(tmp, "wb") as fout:
+            writer = IndexedCsvWriter(fout, header, key_col="match_id")
+            for row in rows:
+                writer.writerow(row)
+                n += 1
+        os.replace(tmp, path)
+        writer.save_index(path)
+    finally:
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+    return n
+
+
+def write_long_joined(
+    base_rows: List[Dict[str, Any]],
+    base_header: List[str],
+    ov_by_match: Dict[str, List[Dict[str, Any]]],
+    ov_header: List[str],
+    player_rows: List[Dict[str, Any]],
+    players_by_match: Dict[str, List[Dict[str, Any]]],
+    map_rows: List[Dict[str, Any]],
+    maps_by_match: Dict[str, List[Dict[str, Any]]],
+) -> Dict[str, int]:
+    """
+    Normalized alternative to the JSON columns: three long tables sorted by
+    match_id (one row per match / player row / map row, no JSON to decode),
+    each with a byte-offset index for direct access by match.
+    """
+    os.makedirs(IN_DIR, exist_ok=True)
+    # Orden estable por match_id: conserva el orden original dentro de cada partido
+    base_sorted = sorted(base_rows, key=lambda r: match_sort_key(r.get("match_id", "")))
+    match_ids: List[str] = []
+    seen = set()
+    for r in base_sorted:
+        mid = r.get("match_id", "")
+        if mid not in seen:
+            seen.add(mid)
+            match_ids.append(mid)
+
+    flat_header = base_header + [f"ov_{c}" for c in ov_header]
+
+    def flat_rows():
+        for base in base_sorted:
+            ov = ov_by_match.get(base.get("match_id", ""), [])
+            ov_first = ov[0] if ov else {}
+            yield [base.get(c, "") for c in base_header] + [ov_first.get(c, "") for c in ov_header]
+
+    def child_rows(by_match: Dict[str, List[Dict[str, Any]]], header: List[str]):
+        for mid in match_ids:
+            for r in by_match.get(mid, []):
+                yield [r.get(c, "") for c in header]
+
+    players_header = _header(player_rows)
+    maps_header = _header(map_rows)
+    counts = {
+        LONG_FLAT_PATH: _write_indexed(LONG_FLAT_PATH, flat_header, flat_rows()),
+        LONG_PLAYERS_PATH: _write_indexed(LONG_PLAYERS_PATH, players_header, child_rows(players_by_match, players_header)),
+        LONG_MAPS_PATH: _write_indexed(LONG_MAPS_PATH, maps_header, child_rows(maps_by_match, maps_header)),
+    }
+    if ARGS.parquet:
+        from masters_columnar import write_parquet
+
+        for path in counts:
+            write_parquet(path, os.path.splitext(path)[0] + ".parquet")
+    return counts
+
+
+def _as_dict(header: List[str], row: List[str]) -> Dict[Any, Any]:
+    """Same dict csv.DictReader would build (restkey/restval = None)."""
+    d: Dict[Any, Any] = dict(zip(header, row))
+    lf, lr = len(header), len(row)
+    if lf < lr:
+        d[None] = row[lf:]
+    elif lf > lr:
+        for key in header[lr:]:
+            d[key] = None
+    return d
+
+
+def _open_rows(path: str) -> Tuple[List[str], Iterator[List[str]]]:
+    fin = open(path, "r", newline="", encoding="utf-8-sig")
+    reader = csv.reader(fin)
+    header = next(reader, [])
+
+    def rows() -> Iterator[List[str]]:
+        with fin:
+            for row in reader:
+                if row:  # DictReader skips blank lines
+                    yield row
+
+    return header, rows()
+
+
+def _match_key(match_id: Any) -> tuple:
+    # Exact string kept as tie-breaker so ids like "07" and "7" stay apart
+    mid = "" if match_id is None else str(match_id)
+    return match_sort_key(mid) + (mid,)
+
+
+def _item_size(item: Any) -> int:
+    return row_size(item[2]) + 120
+
+
+def _sorted_groups(
+    path: str, budget_bytes: int, tmp_dir: str, counter: Dict[str, int], name: str
+) -> Tuple[List[str], Iterator[Tuple[tuple, List[Tuple[int, Dict[Any, Any]]]]]]:
+    """(header, iterator of (match_key, [(seq, row dict)] in file order)) sorted by match_id."""
+    header, rows = _open_rows(path)
+    try:
+        mid_idx: Optional[int] = header.index("match_id")
+    except ValueError:
+        mid_idx = None
+
+    def items():
+        for seq, row in enumerate(rows):
+            counter[name] = seq + 1
+            mid = row[mid_idx] if mid_idx is not None and mid_idx < len(row) else None
+            yield (_match_key(mid if mid_idx is not None else ""), seq, row)
+
+    ordered = external_sort(items(), key=lambda it: (it[0], it[1]), budget_bytes=budget_bytes, tmp_dir=tmp_dir, size=_item_size)
+    groups = (
+        (k, [(it[1], _as_dict(header, it[2])) for it in grp])
+        for k, grp in itertools.groupby(ordered, key=lambda it: it[0])
+    )
+    return header, groups
+
+
+class _GroupCursor:
+    """Forward-only cursor over sorted (key, rows) groups for the merge join."""
+
+    def __init__(self, groups: Iterator[Tuple[tuple, List[Tuple[int, Dict[Any, Any]]]]]):
+        self._groups = groups
+        self._cur = next(groups, None)
+
+    def take(self, key: tuple) -> List[Dict[Any, Any]]:
+        while self._cur is not None and self._cur[0] < key:
+            self._cur = next(self._groups, None)
+        if self._cur is not None and self._cur[0] == key:
+            rows = [d for _, d in self._cur[1]]
+            self._cur = next(self._groups, None)
+            return rows
+        return []
+
+
+def streaming_join(budget_bytes: int, tmp_root: Optional[str]) -> Dict[str, Any]:
+    """
+    Bounded-memory variant of the join. Every input is externally sorted by
+    match_id (stable, so per-match row order is kept) and merge-joined in a
+    single pass; JSON output rows are then externally sorted back into the
+    original matches.csv order. Produces the same files as the in-memory join.
+    """
+    counts: Dict[str, int] = {"matches": 0, "overview": 0, "player_stats": 0, "maps": 0}
+    # Up to five sorts hold a buffer at the same time (4 inputs + output)
+    per_sort = max(1 << 20, budget_bytes // 5)
+    os.makedirs(IN_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="join_", dir=tmp_root) as tmp_dir:
+        base_header_raw, base_groups = _sorted_groups(BASE_FILE, per_sort, tmp_dir, counts, "matches")
+        ov_header_raw, ov_groups = _sorted_groups(OV_FILE, per_sort, tmp_dir, counts, "overview")
+        players_header, players_groups = _sorted_groups(PLAYERS_FILE, per_sort, tmp_dir, counts, "player_stats")
+        maps_header, maps_groups = _sorted_groups(MAPS_FILE, per_sort, tmp_dir, counts, "maps")
+
+        # Same headers the in-memory join derives from the first row of each file
+        with open(BASE_FILE, "r", newline="", encoding="utf-8-sig") as f:
+            first = next(csv.DictReader(f), None)
+        base_header = list(first.keys()) if first else []
+        with open(OV_FILE, "r", newline="", encoding="utf-8-sig") as f:
+            first = next(csv.DictReader(f), None)
+        ov_header = [c for c in first.keys() if c != "match_id"] if first else []
+        players_header = [c for c in players_header if c is not None]
+        maps_header = [c for c in maps_header if c is not None]
+
+        ov_cur = _GroupCursor(ov_groups)
+        players_cur = _GroupCursor(players_groups)
+        maps_cur = _GroupCursor(maps_groups)
+
+        want_json = ARGS.format in ("json", "both")
+        want_long = ARGS.format in ("long", "both")
+        long_files = []
+        long_writers = {}
+        if want_long:
+            flat_header = base_header + [f"ov_{c}" for c in ov_header]
+            for path, header in (
+                (LONG_FLAT_PATH, flat_header),
+                (LONG_PLAYERS_PATH, players_header),
+                (LONG_MAPS_PATH, maps_header),
+            ):
+                tmp = os.path.join(IN_DIR, f".tmp_{os.path.basename(path)}")
+                fbin = open(tmp, "wb")
+                long_files.append((path, tmp, fbin))
+                long_writers[path] = IndexedCsvWriter(fbin, header, key_col="match_id")
+
+        def joined():
+            for key, bases in base_groups:
+                ov = ov_cur.take(key)
+                players = players_cur.take(key)
+                maps_ = maps_cur.take(key)
+                ov_first = ov[0] if ov else {}
+                ov_values = [ov_first.get(c, "") for c in ov_header]
+                if want_long:
+                    for p in players:
+                        long_writers[LONG_PLAYERS_PATH].writerow([p.get(c, "") for c in players_header])
+                    for m in maps_:
+                        long_writers[LONG_MAPS_PATH].writerow([m.get(c, "") for c in maps_header])
+                players_json = json.dumps(
+                    [{k: v for k, v in p.items() if k != "match_id"} for p in players], ensure_ascii=False
+                )
+                maps_json = json.dumps(
+                    [{k: v for k, v in m.items() if k != "match_id"} for m in maps_], ensure_ascii=False
+                )
+                # Rows of one match already come in original order (seq tie-break)
+                for seq, base in bases:
+                    if want_long:
+                        long_writers[LONG_FLAT_PATH].writerow([base.get(c, "") for c in base_header] + ov_values)
+                    yield seq, [base.get(c, "") for c in base_header] + ov_values + [players_json, maps_json]
+
+        try:
+            rows_out = joined()
+            if want_json:
+                with open(OUT_TMP, "w", newline="", encoding="utf-8") as fout:
+                    writer = csv.writer(fout)
+                    writer.writerow(base_header + [f"ov_{c}" for c in ov_header] + ["players_json", "maps_json"])
+                    ordered = external_sort(
+                        rows_out, key=lambda it: it[0], budget_bytes=per_sort, tmp_dir=tmp_dir,
+                        size=lambda it: row_size(it[1]) + 64,
+                    )
+                    for _, row in ordered:
+                        writer.writerow(row)
+                os.replace(OUT_TMP, OUT_PATH)
+            else:
+                for _ in rows_out:
+                    pass
+            for path, tmp, fbin in long_files:
+                fbin.close()
+                os.replace(tmp, path)
+                long_writers[path].save_index(path)
+        finally:
+            for path, tmp, fbin in long_files:
+                fbin.close()
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+    return counts
+
+
+def _print_peak_rss() -> None:
+    rss = peak_rss_mb()
+    print(f"Pico de memoria (RSS): {rss:.1f} MB" if rss is not None else "Pico de memoria (RSS): no disponible")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    configure(parse_args(argv))
+    if ARGS.streaming:
+        counts = streaming_join(int(ARGS.memory_budget_mb * 1024 * 1024), ARGS.tmp_dir)
+        print("Join completado (streaming):")
+        for name, n in counts.items():
+            print(f" - {name}: {n} filas")
+        if ARGS.format in ("json", "both"):
+            print(f"Salida: {OUT_PATH}")
+        if ARGS.format in ("long", "both"):
+            for path in (LONG_FLAT_PATH, LONG_PLAYERS_PATH, LONG_MAPS_PATH):
+                print(f"Salida: {path} (índice {os.path.basename(path)}.idx.json)")
+        _print_peak_rss()
+        return
+
+    # Leer bases
+    base_rows = read_csv(BASE_FILE)
+    ov_rows = read_csv(OV_FILE)
+    player_rows = read_csv(PLAYERS_FILE)
+    map_rows = read_csv(MAPS_FILE)
+
+    # Indexaciones por match_id
+    ov_by_match = group_by(ov_rows, "match_id")
+    players_by_match = group_by(player_rows, "match_id")
+    maps_by_match = group_by(map_rows, "match_id")
+
+    # Construir encabezados de salida
+    base_header = []
+    if base_rows:
+        base_header = list(base_rows[0].keys())
+
+    ov_header = []
+    if ov_rows:
+        ov_header = [c for c in ov_rows[0].keys() if c != "match_id"]
+
+    if ARGS.format in ("json", "both"):
+        write_json_joined(base_rows, base_header, ov_by_match, ov_header, players_by_match, maps_by_match)
+    long_counts: Dict[str, int] = {}
+    if ARGS.format in ("long", "both"):
+        long_counts = write_long_joined(
+            base_rows, base_header, ov_by_match, ov_header,
+            player_rows, players_by_match, map_rows, maps_by_match,
+        )
+
     # Resumen simple
     print("Join completado:")
     print(f" - matches: {len(base_rows)} filas")
     print(f" - overview: {len(ov_rows)} filas")
     print(f" - player_stats: {len(player_rows)} filas")
     print(f" - maps: {len(map_rows)} filas")
-    print(f"Salida: {OUT_PATH}")
+    if ARGS.format in ("json", "both"):
+        print(f"Salida: {OUT_PATH}")
+    for path, n in long_counts.items():
+        print(f"Salida: {path} ({n} filas, índice {os.path.basename(path)}.idx.json)")
+    _print_peak_rss()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Typed columnar (Parquet) copies of the masters CSVs.
+
+Written next to each `masters_csvs/{base}.csv` as `{base}.parquet` by
+`merge_tournaments_to_masters.py --parquet`. Numeric inference is exactly
+`pd.read_csv`'s, so consumers see the same values as from the CSV; on top of
+that, entity columns (teams, players, maps, agents, events...) are stored as
+categoricals and date columns as real datetimes (parsed like the model does,
+`mvp_model/utils/schema.parse_dates`: unparsed values become NaT and are
+reported through `warnings`).
+
+`write_typed_parquet` (`--typed`) goes further and writes
+`{base}.typed.parquet` normalized with the declared per-file schema of
+`mvp_model/utils/schema.py`: "78%" -> float32, "9/58" -> won/total, "1:05:24"
+-> seconds, "13 - 9" -> two int16, stringified agent lists -> categorical.
+
+Requires pandas + pyarrow (imported lazily; the CSV merge itself stays
+stdlib-only).
+"""
+import os
+import sys
+from typing import Any, Dict
+
+CATEGORICAL_COLUMNS = {
+    # teams
+    "team", "Team", "team1", "team2", "winner", "player_team", "picked_by", "map_winner",
+    # players
+    "player", "player_name", "Player",
+    # maps / agents
+    "map", "Map", "map_name", "agent", "Agent", "agent_name",
+    # event context
+    "status", "stage", "week", "event", "event_name", "event_stage", "stat_type", "format", "patch",
+    "tournament_name",
+}
+
+DATE_COLUMNS = {"date", "match_date"}
+
+
+def _schema() -> Any:
+    # The schema lives with the model code; make the repo root importable
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    from mvp_model.utils import schema
+
+    return schema
+
+
+def _atomic_parquet(df: Any, parquet_path: str) -> None:
+    tmp = os.path.join(os.path.dirname(parquet_path), f".tmp_{os.path.basename(parquet_path)}")
+    try:
+        df.to_parquet(tmp, engine="pyarrow", index=False)
+        os.replace(tmp, parquet_path)
+    finally:
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def write_parquet(csv_path: str, parquet_path: str) -> Dict[str, int]:
+    """Convert one master CSV to a typed Parquet file (atomic replace).
+
+    Returns {"rows": int, "csv_bytes": int, "parquet_bytes": int}.
+    """
+    import pandas as pd
+
+    schema = _schema()
+    df = pd.read_csv(csv_path, encoding="utf-8-sig", low_memory=False)
+    for col in df.columns:
+        if col in DATE_COLUMNS:
+            # Same parser as the model: unparsed dates become NaT with a warning
+            df[col] = schema.parse_dates(df[col], col)
+        elif col in CATEGORICAL_COLUMNS and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype("category")
+
+    _atomic_parquet(df, parquet_path)
+    return {
+        "rows": int(len(df)),
+        "csv_bytes": os.path.getsize(csv_path),
+        "parquet_bytes": os.path.getsize(parquet_path),
+    }
+
+
+def write_typed_parquet(csv_path: str, parquet_path: str) -> Dict[str, Any]:
+    """Normalize one master with its declared schema and write it as Parquet.
+
+    Returns the normalization report (rows, seconds, rows_per_s, raw_bytes,
+    typed_bytes, saved) plus "parquet_bytes".
+    """
+    import pandas as pd
+
+    schema = _schema()
+    raw = pd.read_csv(csv_path, encoding="utf-8-sig", low_memory=False)
+    typed, report = schema.normalize_report(raw, schema.base_name(csv_path))
+    _atomic_parquet(typed, parquet_path)
+    report["parquet_bytes"] = os.path.getsize(parquet_path)
+    return report
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Byte-offset index over CSVs sorted (grouped) by match_id.
+
+`IndexedCsvWriter` writes rows and records, for every match_id, the byte
+offset, byte length and row count of its contiguous block. The index is saved
+as `{csv}.idx.json`; `read_match_rows` then seeks straight to one match's rows
+without scanning the file.
+
+The masters are not sorted by match_id, so they get a different sidecar,
+`{base}.csv.mindex.json` (`write_master_index`, run by the merge): every
+match_id maps to one or more row ranges (byte offset, byte length, first row,
+row count), plus a date index sorted by match date. `load_master_index`,
+`master_ranges`, `matches_between` and `read_ranges` answer point and
+date-range queries with one seek per range instead of a full scan; the model
+side (mvp_model/utils/masters.py::iter_indexed) reads through them.
+"""
+import bisect
+import csv
+import io
+import json
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+MASTER_INDEX_VERSION = 1
+# Match id column of each master (default "match_id"); None = no per-match rows
+MASTER_KEY_COLUMNS = {"performance_data": "Match ID", "agents_stats": None, "event_info": None, "maps_stats": None}
+MASTER_DATE_COLUMNS = {"matches": "date", "detailed_matches_overview": "date", "detailed_matches_player_stats": "match_date"}
+# Suffix the site glues to recent match dates ("Sun, August 31, 2025Yesterday")
+RELATIVE_DAY = r"\s*(?:Yesterday|Today)\s*$"
+# Date formats of the masters (and of CSVs to predict), tried in this order.
+# The one definition for the merge, the index and the model
+# (mvp_model/utils/schema.parse_dates applies the same list with pandas)
+DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d", "%a, %B %d, %Y", "%B %d, %Y", "%d/%m/%Y",
+)
+_RELATIVE_DAY = re.compile(RELATIVE_DAY)
+
+
+def index_path(csv_path: str) -> str:
+    return csv_path + ".idx.json"
+
+
+def match_sort_key(match_id: str) -> tuple:
+    """Numeric order for numeric ids, then lexicographic for anything else."""
+    s = str(match_id).strip()
+    return (0, int(s), "") if s.isdigit() else (1, 0, s)
+
+
+class IndexedCsvWriter:
+    """csv.writer over a binary file that tracks byte offsets per key.
+
+    Rows must arrive grouped by key (all rows of a match_id contiguous).
+    """
+
+    def __init__(self, fbin: Any, header: List[str], key_col: str = "match_id"):
+        self._f = fbin
+        self._buf = io.StringIO()
+        self._writer = csv.writer(self._buf)
+        self._pos = 0
+        self._key_idx = header.index(key_col)
+        self.key_col = key_col
+        self.header = header
+        self.index: Dict[str, List[int]] = {}
+        self._emit(header)
+
+    def _emit(self, row: List[Any]) -> int:
+        self._writer.writerow(row)
+        data = self._buf.getvalue().encode("utf-8")
+        self._buf.seek(0)
+        self._buf.truncate()
+        self._f.write(data)
+        start = self._pos
+        self._pos += len(data)
+        return start
+
+    def writerow(self, row: List[Any]) -> None:
+        key = str(row[self._key_idx])
+        start = self._emit(row)
+        entry = self.index.get(key)
+        if entry is None:
+            self.index[key] = [start, self._pos - start, 1]
+        elif entry[0] + entry[1] == start:
+            entry[1] = self._pos - entry[0]
+            entry[2] += 1
+        else:
+            raise ValueError(f"Rows for {self.key_col}={key} are not contiguous")
+
+    def save_index(self, csv_path: str) -> None:
+        path = index_path(csv_path)
+        tmp = os.path.join(os.path.dirname(path), f".tmp_{os.path.basename(path)}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"key": self.key_col, "header": self.header, "index": self.index}, f)
+        os.replace(tmp, path)
+
+
+def load_index(csv_path: str) -> Dict[str, Any]:
+    with open(index_path(csv_path), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_match_rows(
+    csv_path: str, match_id: Any, index: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, str]]:
+    """All rows of one match as dicts, via a single seek + read."""
+    if index is None:
+        index = load_index(csv_path)
+    entry = index["index"].get(str(match_id))
+    if entry is None:
+        return []
+    offset, nbytes, _ = entry
+    with open(csv_path, "rb") as f:
+        f.seek(offset)
+        text = f.read(nbytes).decode("utf-8")
+    header = index["header"]
+    return [dict(zip(header, row)) for row in csv.reader(io.StringIO(text, newline=""))]
+
+
+def master_index_path(csv_path: str) -> str:
+    return csv_path + ".mindex.json"
+
+
+def parse_datetime(value: str) -> Optional[datetime]:
+    """First of DATE_FORMATS that reads `value` (relative-day suffix stripped), or None."""
+    value = _RELATIVE_DAY.sub("", value.strip())
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date(value: str) -> Optional[str]:
+    """ISO date (YYYY-MM-DD) of one master date, or None."""
+    parsed = parse_datetime(value)
+    return None if parsed is None else parsed.date().isoformat()
+
+
+def _records(f: Any) -> Iterator[Tuple[int, int, List[str]]]:
+    """(offset, end, row) of every CSV record of a binary file (quoted newlines included)."""
+    pos = 0
+    start = 0
+
+    def lines() -> Iterator[str]:
+        nonlocal pos
+        for line in iter(f.readline, b""):
+            pos += len(line)
+            yield line.decode("utf-8")
+
+    if f.read(3) != b"\xef\xbb\xbf":
+        f.seek(0)
+    else:
+        pos = start = 3
+    # csv.reader pulls one line at a time, so `pos` is the end of the record just read
+    for row in csv.reader(lines()):
+        yield start, pos, row
+        start = pos
+
+
+def write_master_index(csv_path: str, base: str, match_dates: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Scan one master once and save `{csv}.mindex.json`:
+    {"matches": {match_id: [[offset, nbytes, first_row, rows], ...]},
+     "dates": [[iso_date, match_id], ...] sorted, "header", "size", "mtime_ns"}.
+
+    Dates come from the master's own date column (MASTER_DATE_COLUMNS) or,
+    for masters without one, from `match_dates` (match_id -> ISO date, from
+    matches.csv). Returns the index.
+    """
+    key_col = MASTER_KEY_COLUMNS.get(base, "match_id")
+    date_col = MASTER_DATE_COLUMNS.get(base)
+    matches: Dict[str, List[List[int]]] = {}
+    dates: Dict[str, str] = {}
+    header: List[str] = []
+    n_rows = 0
+    with open(csv_path, "rb") as f:
+        records = _records(f)
+        _, _, header = next(records, (0, 0, []))
+        key_idx = header.index(key_col) if key_col in header else None
+        date_idx = header.index(date_col) if date_col in header else None
+        for offset, end, row in records:
+            if not row:
+                continue
+            if key_idx is not None and key_idx < len(row):
+                mid = row[key_idx].strip()
+                ranges = matches.setdefault(mid, [])
+                last = ranges[-1] if ranges else None
+                if last is not None and last[0] + last[1] == offset and last[2] + last[3] == n_rows:
+                    last[1] = end - last[0]
+                    last[3] += 1
+                else:
+                    ranges.append([offset, end - offset, n_rows, 1])
+                if mid not in dates:
+                    day = parse_date(row[date_idx]) if date_idx is not None and date_idx < len(row) else None
+                    if day is None and match_dates:
+                        day = match_dates.get(mid)
+                    if day is not None:
+                        dates[mid] = day
+            n_rows += 1
+    st = os.stat(csv_path)
+    index = {
+        "version": MASTER_INDEX_VERSION,
+        "key": key_col,
+        "header": header,
+        "rows": n_rows,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "matches": matches,
+        "dates": sorted([day, mid] for mid, day in dates.items()),
+    }
+    path = master_index_path(csv_path)
+    tmp = os.path.join(os.path.dirname(path), f".tmp_{os.path.basename(path)}")
+    with open(tmp, "w", encoding="utf-8") as out:
+        json.dump(index, out, separators=(",", ":"))
+    os.replace(tmp, path)
+    return index
+
+
+def load_master_index(csv_path: str) -> Optional[Dict[str, Any]]:
+    """The master's index, or None if missing or stale (the CSV changed since)."""
+    try:
+        with open(master_index_path(csv_path), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        st = os.stat(csv_path)
+    except (OSError, ValueError):
+        return None
+    if (index.get("version") != MASTER_INDEX_VERSION or index.get("size") != st.st_size
+            or index.get("mtime_ns") != st.st_mtime_ns):
+        return None
+    return index
+
+
+def master_ranges(index: Dict[str, Any], match_ids: Iterable[Any]) -> List[List[int]]:
+    """Row ranges of the given matches, in file order (unknown ids are ignored)."""
+    ranges = [r for mid in {str(m).strip() for m in match_ids} for r in index["matches"].get(mid, [])]
+    return sorted(ranges)
+
+
+def matches_between(index: Dict[str, Any], start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+    """Match ids whose date is within [start, end] (ISO dates, inclusive), by bisection."""
+    days = [d for d, _ in index["dates"]]
+    lo = 0 if start is None else bisect.bisect_left(days, start[:10])
+    hi = len(days) if end is None else bisect.bisect_right(days, end[:10])
+    return [mid for _, mid in index["dates"][lo:hi]]
+
+
+def read_ranges(csv_path: str, ranges: List[List[int]]) -> bytes:
+    """Raw bytes of the given ranges (one seek + read per range, adjacent ones merged)."""
+    out = []
+    with open(csv_path, "rb") as f:
+        cur_off = cur_len = None
+        for offset, nbytes, _, _ in ranges:
+            if cur_off is not None and cur_off + cur_len == offset:
+                cur_len += nbytes
+                continue
+            if cur_off is not None:
+                f.seek(cur_off)
+                out.append(f.read(cur_len))
+            cur_off, cur_len = offset, nbytes
+        if cur_off is not None:
+            f.seek(cur_off)
+            out.append(f.read(cur_len))
+    return b"".join(out)
@@ -1,9 +1,18 @@
 #!/usr/bin/env python3
 import os
 import csv
+import json
+import hashlib
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
+
+import entity_registry
+import match_index
+
+MANIFEST_NAME = ".merge_manifest.json"
+MANIFEST_VERSION = 1
 
 BASE_NAMES = [
     "agents_stats",
@@ -56,7 +65,7 @@ def _detect_data_root(root: str, override: Optional[str] = None) -> str:
     return root
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Merge tournament CSVs into masters_csvs")
     p.add_argument("--data-root", default=None, help="Folder containing *_csvs (default: ./datasets or ./)")
     p.add_argument(
@@ -64,13 +73,55 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Output folder for masters_csvs (default: <data-root>/masters_csvs)",
     )
-    return p.parse_args()
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes, one base name per worker (0 = all cores; default: 1, serial)",
+    )
+    p.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the merge manifest and rebuild every master from scratch",
+    )
+    p.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Also write a typed {base}.parquet next to each master CSV (requires pandas + pyarrow)",
+    )
+    p.add_argument(
+        "--typed",
+        action="store_true",
+        help="Also write {base}.typed.parquet normalized with the declared schema of each file "
+        "(percentages, fractions, durations, scores, agent lists; requires pandas + pyarrow)",
+    )
+    p.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Skip the {base}.csv.mindex.json match_id/date index sidecars",
+    )
+    p.add_argument(
+        "--no-registry",
+        action="store_true",
+        help="Skip the team/player ID registry (entity_registry.json) and the {base}.ids.csv sidecars",
+    )
+    return p.parse_args(argv)
+
 
+# Set by configure(); kept as module globals so the helpers below can stay
+# argument-free when the script runs standalone
+ARGS: argparse.Namespace = argparse.Namespace()
+DATA_ROOT = ROOT
+OUTPUT_DIR = os.path.join(ROOT, "masters_csvs")
 
-ARGS = parse_args()
-DATA_ROOT = _detect_data_root(ROOT, ARGS.data_root)
-# By default, keep masters_csvs at repo root as requested
-OUTPUT_DIR = ARGS.output_dir or os.path.join(ROOT, "masters_csvs")
+
+def configure(args: argparse.Namespace) -> None:
+    """Bind parsed arguments to the module globals (also used by run_pipeline.py)."""
+    global ARGS, DATA_ROOT, OUTPUT_DIR
+    ARGS = args
+    DATA_ROOT = _detect_data_root(ROOT, args.data_root)
+    # By default, keep masters_csvs at repo root as requested
+    OUTPUT_DIR = args.output_dir or os.path.join(ROOT, "masters_csvs")
 
 def list_tournament_dirs(root: str, out_dir_name: str) -> List[str]:
     items: List[str] = []
@@ -87,74 +138,309 @@ def list_tournament_dirs(root: str, out_dir_name: str) -> List[str]:
     return items
 
 
-def consolidate_one(base_name: str, tournaments: List[str]) -> Dict[str, int]:
+def _fingerprint(path: str, prev: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Size, mtime and sha256 of an input file.
+
+    The content hash is only recomputed when size or mtime differ from the
+    previous fingerprint, so unchanged archives cost one stat() per file.
+    """
+    st = os.stat(path)
+    fp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if prev and prev.get("size") == fp["size"] and prev.get("mtime_ns") == fp["mtime_ns"]:
+        fp["sha256"] = prev["sha256"]
+        return fp
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    fp["sha256"] = h.hexdigest()
+    return fp
+
+
+def _read_header(in_path: str) -> Optional[List[str]]:
+    with open(in_path, 'r', newline='', encoding='utf-8-sig') as fin:
+        try:
+            return next(csv.reader(fin))
+        except StopIteration:
+            return None  # empty file
+
+
+def _extend_union(union_header: List[str], file_header: List[str]) -> None:
+    seen_cols = set(union_header)
+    for col in file_header:
+        if col not in seen_cols and col != "tournament_name":
+            union_header.append(col)
+            seen_cols.add(col)
+
+
+def _write_rows(writer: Any, in_path: str, tname: str, union_header: List[str]) -> int:
+    rows = 0
+    with open(in_path, 'r', newline='', encoding='utf-8-sig') as fin:
+        reader = csv.reader(fin)
+        file_header = next(reader)
+        # Same semantics as DictReader: last duplicate column wins;
+        # an input tournament_name column is ignored
+        col_idx = {col: i for i, col in enumerate(file_header)}
+        picks = [col_idx.get(col) for col in union_header]
+        for row in reader:
+            if not row:
+                continue  # DictReader skips blank lines
+            n = len(row)
+            out_row = [row[i] if i is not None and i < n else '' for i in picks]
+            out_row.append(tname)
+            writer.writerow(out_row)
+            rows += 1
+    return rows
+
+
+def _plan(prev: Optional[Dict[str, Any]], files: Dict[str, Dict[str, Any]], out_path: str) -> str:
+    """Decide how to refresh one master: 'skip', 'append' or 'rebuild'."""
+    if not prev or not os.path.exists(out_path):
+        return "rebuild"
+    # Master edited/truncated outside the merge (or an append died midway)
+    if os.path.getsize(out_path) != prev.get("output_size"):
+        return "rebuild"
+    prev_files = prev.get("files", {})
+    for tname, fp in prev_files.items():
+        cur = files.get(tname)
+        if cur is None or cur["sha256"] != fp["sha256"]:
+            return "rebuild"
+    if not set(files) - set(prev_files):
+        return "skip"
+    # New tournaments are appended whatever their name ("VCT 2026 ..." sorts
+    # before "Valorant ..."): rebuilds keep the same ingestion order
+    return "append"
+
+
+def _ingest_order(tournaments: List[str], prev: Optional[Dict[str, Any]]) -> List[str]:
+    """Row order of a master: tournaments already in it (manifest order), then the rest by name.
+
+    Appends and rebuilds therefore lay out rows identically; without a
+    manifest (first run, --full) this is plain name order.
+    """
+    present = set(tournaments)
+    kept = [t for t in (prev or {}).get("tournaments", []) if t in present]
+    seen = set(kept)
+    return kept + [t for t in tournaments if t not in seen]
+
+
+def consolidate_one(
+    base_name: str,
+    tournaments: List[str],
+    data_root: str,
+    output_dir: str,
+    prev: Optional[Dict[str, Any]] = None,
+    parquet: bool = False,
+    typed: bool = False,
+) -> Dict[str, Any]:
     """
     Consolidate all `{base_name}.csv` files across tournaments, adding a
     `tournament_name` column. Uses a union of all headers found to avoid
     dropping files when columns differ (fills missing cells with '').
 
-    Returns summary dict: {"rows": int, "files": int, "skipped": int}
+    Rows are streamed with a plain `csv.reader` and a per-file column index
+    map (no dict per row). Self-contained so it can run in a worker process.
+
+    With `prev` (this base's entry from the merge manifest) only new
+    tournaments are appended when nothing else changed and the union header
+    is unaffected; otherwise the master is rebuilt, keeping the manifest's
+    tournament order (`_ingest_order`). Without it, always rebuilds. With `parquet`, the typed `{base}.parquet` copy is refreshed
+    whenever it is missing or older than the CSV; same for the normalized
+    `{base}.typed.parquet` with `typed`.
+
+    Returns summary dict: {"rows", "files", "skipped", "mode", "manifest",
+    "typed"} ("typed" is the normalization report, or None if not rewritten)
     """
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    out_path = os.path.join(OUTPUT_DIR, f"{base_name}.csv")
-    out_tmp = os.path.join(OUTPUT_DIR, f".tmp_{base_name}.csv")
-
-    # 1) First pass: build union header in appearance order
-    union_header: List[str] = []
-    seen_cols = set()
-    available_files: List[tuple[str, str, List[str]]] = []  # (tname, path, header)
-    skipped_files = 0
+    os.makedirs(output_dir, exist_ok=True)
+    out_path = os.path.join(output_dir, f"{base_name}.csv")
+    out_tmp = os.path.join(output_dir, f".tmp_{base_name}.csv")
 
+    prev_files = (prev or {}).get("files", {})
+    files: Dict[str, Dict[str, Any]] = {}
+    skipped_files = 0
     for tname in tournaments:
-        in_path = os.path.join(DATA_ROOT, tname, f"{base_name}.csv")
+        in_path = os.path.join(data_root, tname, f"{base_name}.csv")
         if not os.path.exists(in_path):
             skipped_files += 1
             continue
-        with open(in_path, 'r', newline='', encoding='utf-8-sig') as fin:
-            reader = csv.reader(fin)
-            try:
-                file_header = next(reader)
-            except StopIteration:
-                # empty file; skip
+        files[tname] = _fingerprint(in_path, prev_files.get(tname))
+
+    mode = _plan(prev, files, out_path)
+    tournaments = _ingest_order(tournaments, prev)
+    union_header: List[str] = list((prev or {}).get("header", []))
+    available: List[str] = list((prev or {}).get("tournaments", []))
+
+    if mode == "append":
+        new = [t for t in tournaments if t in files and t not in prev_files]
+        new_available = []
+        for tname in new:
+            file_header = _read_header(os.path.join(data_root, tname, f"{base_name}.csv"))
+            if file_header is None:
+                continue
+            if any(c not in union_header and c != "tournament_name" for c in file_header):
+                mode = "rebuild"  # header grows: older rows would need padding
+                break
+            new_available.append(tname)
+
+    if mode == "append":
+        total_rows = prev["rows"]
+        size_before = os.path.getsize(out_path)
+        try:
+            with open(out_path, 'a', newline='', encoding='utf-8') as fout:
+                writer = csv.writer(fout)
+                for tname in new_available:
+                    in_path = os.path.join(data_root, tname, f"{base_name}.csv")
+                    total_rows += _write_rows(writer, in_path, tname, union_header)
+        except BaseException:
+            # Leave the master exactly as it was before the append
+            with open(out_path, 'r+b') as f:
+                f.truncate(size_before)
+            raise
+        available += new_available
+
+    elif mode == "rebuild":
+        # 1) First pass (header line only): build union header in appearance order
+        union_header = []
+        available = []
+        for tname in tournaments:
+            if tname not in files:
+                continue
+            file_header = _read_header(os.path.join(data_root, tname, f"{base_name}.csv"))
+            if file_header is None:
                 continue
-        available_files.append((tname, in_path, file_header))
-        for col in file_header:
-            if col not in seen_cols and col != "tournament_name":
-                union_header.append(col)
-                seen_cols.add(col)
-
-    # 2) Write with union header
-    total_rows = 0
-    used_files = 0
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+            available.append(tname)
+            _extend_union(union_header, file_header)
+
+        # 2) Write with union header
+        total_rows = 0
+        try:
+            with open(out_tmp, 'w', newline='', encoding='utf-8') as fout:
+                writer = csv.writer(fout)
+                writer.writerow(union_header + ["tournament_name"])  # keep new column at end
+                for tname in available:
+                    in_path = os.path.join(data_root, tname, f"{base_name}.csv")
+                    total_rows += _write_rows(writer, in_path, tname, union_header)
+            # Reemplazo atómico del archivo final
+            os.replace(out_tmp, out_path)
+        finally:
+            # Limpieza si quedara temporal por error
+            if os.path.exists(out_tmp):
+                try:
+                    os.remove(out_tmp)
+                except OSError:
+                    pass
+    else:
+        total_rows = prev["rows"]
+
+    if parquet:
+        pq_path = os.path.join(output_dir, f"{base_name}.parquet")
+        if not os.path.exists(pq_path) or os.path.getmtime(pq_path) < os.path.getmtime(out_path):
+            from masters_columnar import write_parquet
+
+            write_parquet(out_path, pq_path)
+
+    typed_report = None
+    if typed:
+        typed_path = os.path.join(output_dir, f"{base_name}.typed.parquet")
+        if not os.path.exists(typed_path) or os.path.getmtime(typed_path) < os.path.getmtime(out_path):
+            from masters_columnar import write_typed_parquet
+
+            typed_report = write_typed_parquet(out_path, typed_path)
+
+    entry = {
+        "header": union_header,
+        "tournaments": available,
+        "rows": total_rows,
+        "files": files,
+        "output_size": os.path.getsize(out_path),
+    }
+    return {
+        "rows": total_rows,
+        "files": len(available),
+        "skipped": skipped_files,
+        "mode": mode,
+        "manifest": entry,
+        "typed": typed_report,
+    }
+
+
+def refresh_indexes(output_dir: str, force: bool = False) -> List[str]:
+    """(Re)write the match_id/date index of every master whose CSV changed since its index."""
+    written = []
+    match_dates: Dict[str, str] = {}
+    # matches.csv first: its dates fill the date index of masters without a date column
+    for bn in ["matches"] + [b for b in BASE_NAMES if b != "matches"]:
+        csv_path = os.path.join(output_dir, f"{bn}.csv")
+        if not os.path.exists(csv_path):
+            continue
+        index = None if force else match_index.load_master_index(csv_path)
+        if index is None:
+            index = match_index.write_master_index(csv_path, bn, match_dates)
+            written.append(bn)
+        if bn == "matches":
+            match_dates = {mid: day for day, mid in index["dates"]}
+    return written
+
+
+def load_manifest(output_dir: str) -> Dict[str, Any]:
+    path = os.path.join(output_dir, MANIFEST_NAME)
     try:
-        with open(out_tmp, 'w', newline='', encoding='utf-8') as fout:
-            writer = csv.writer(fout)
-            writer.writerow(union_header + ["tournament_name"])  # keep new column at end
-
-            for tname, in_path, file_header in available_files:
-                with open(in_path, 'r', newline='', encoding='utf-8-sig') as fin:
-                    dict_reader = csv.DictReader(fin)
-                    # Normalize: if the input has the tournament_name already, ignore
-                    for row in dict_reader:
-                        out_row = [row.get(col, '') for col in union_header]
-                        writer.writerow(out_row + [tname])
-                        total_rows += 1
-                used_files += 1
-        # Reemplazo atómico del archivo final
-        os.replace(out_tmp, out_path)
-    finally:
-        # Limpieza si quedara temporal por error
-        if os.path.exists(out_tmp):
-            try:
-                os.remove(out_tmp)
-            except OSError:
-                pass
-
-    return {"rows": total_rows, "files": used_files, "skipped": skipped_files}
-
-
-def main():
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("data_root") != os.path.abspath(DATA_ROOT):
+        return {}
+    return manifest.get("bases", {})
+
+
+def save_manifest(output_dir: str, bases: Dict[str, Any]) -> None:
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(
+            {"version": MANIFEST_VERSION, "data_root": os.path.abspath(DATA_ROOT), "bases": bases},
+            f,
+            indent=2,
+            ensure_ascii=False,
+        )
+    os.replace(tmp, path)
+
+
+def _input_bytes(base_name: str, tournaments: List[str]) -> int:
+    total = 0
+    for tname in tournaments:
+        in_path = os.path.join(DATA_ROOT, tname, f"{base_name}.csv")
+        if os.path.exists(in_path):
+            total += os.path.getsize(in_path)
+    return total
+
+
+def consolidate_all(
+    tournaments: List[str], jobs: int, manifest: Dict[str, Any], parquet: bool = False, typed: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """Run consolidate_one for every base name, serially or in a process pool."""
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(BASE_NAMES))
+    if jobs == 1:
+        return {
+            bn: consolidate_one(bn, tournaments, DATA_ROOT, OUTPUT_DIR, manifest.get(bn), parquet, typed)
+            for bn in BASE_NAMES
+        }
+
+    # Largest inputs first so the long tail does not end up on one worker
+    order = sorted(BASE_NAMES, key=lambda bn: _input_bytes(bn, tournaments), reverse=True)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            bn: pool.submit(consolidate_one, bn, tournaments, DATA_ROOT, OUTPUT_DIR, manifest.get(bn), parquet, typed)
+            for bn in order
+        }
+        return {bn: futures[bn].result() for bn in BASE_NAMES}
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    configure(parse_args(argv))
     out_dir_name = os.path.basename(OUTPUT_DIR)
     tournaments = list_tournament_dirs(DATA_ROOT, out_dir_name)
     # Mantener solo directorios que tienen al menos un CSV esperado
@@ -165,7 +451,7 @@ def main():
 
     if not tournaments:
         print("No se encontraron carpetas de torneos con CSVs esperados.")
-        return
+        return {}
 
     print(f"Torneos detectados ({len(tournaments)}):")
     for t in tournaments:
@@ -173,15 +459,43 @@ def main():
 
     print(f"\nGenerando maestros en: {OUTPUT_DIR}\n")
 
-    totals: Dict[str, Dict[str, int]] = {}
-    for bn in BASE_NAMES:
-        summary = consolidate_one(bn, tournaments)
-        totals[bn] = summary
-        print(f"[OK] {bn}.csv -> filas: {summary['rows']}, archivos usados: {summary['files']}, omitidos: {summary['skipped']}")
+    manifest = {} if ARGS.full else load_manifest(OUTPUT_DIR)
+    totals = consolidate_all(tournaments, ARGS.jobs, manifest, ARGS.parquet, ARGS.typed)
+    save_manifest(OUTPUT_DIR, {bn: s["manifest"] for bn, s in totals.items()})
+    for bn, summary in totals.items():
+        print(
+            f"[OK] {bn}.csv -> filas: {summary['rows']}, archivos usados: {summary['files']}, "
+            f"omitidos: {summary['skipped']}, modo: {summary['mode']}"
+        )
+
+    typed_reports = {bn: s["typed"] for bn, s in totals.items() if s["typed"]}
+    if typed_reports:
+        print("\nNormalización tipada ({base}.typed.parquet):")
+        for bn, r in typed_reports.items():
+            print(
+                f" - {bn}: {r['rows']} filas, {r['rows_per_s']:,.0f} filas/s, "
+                f"memoria {r['raw_bytes'] / 1e6:.2f} MB (object) -> {r['typed_bytes'] / 1e6:.2f} MB "
+                f"({-r['saved']:+.0%}), parquet {r['parquet_bytes'] / 1e6:.2f} MB"
+            )
+        raw = sum(r["raw_bytes"] for r in typed_reports.values())
+        typed_total = sum(r["typed_bytes"] for r in typed_reports.values())
+        print(f"   total: {raw / 1e6:.2f} MB -> {typed_total / 1e6:.2f} MB ({typed_total / raw - 1:+.0%})")
+
+    if not ARGS.no_index:
+        indexed = refresh_indexes(OUTPUT_DIR, force=ARGS.full)
+        print(f"[OK] índices .csv.mindex.json (match_id -> filas, fechas ordenadas) reescritos: {len(indexed)}")
+
+    if not ARGS.no_registry:
+        reg = entity_registry.refresh(OUTPUT_DIR, force=ARGS.full)
+        print(
+            f"[OK] {entity_registry.REGISTRY_NAME} -> equipos: {reg['teams']}, jugadores: {reg['players']}, "
+            f"alias: {reg['aliases']}, sidecars .ids.csv reescritos: {len(reg['sidecars'])}"
+        )
 
     print("\nResumen total:")
     for bn, s in totals.items():
         print(f" - {bn}.csv: {s['rows']} filas de {s['files']} archivos (omitidos {s['skipped']})")
+    return totals
 
 if __name__ == "__main__":
     main()
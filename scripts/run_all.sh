@@ -11,6 +11,7 @@ METRICS_PATH="mvp_model/artifacts/metrics.json"
 TRAIN_INFO_PATH="mvp_model/artifacts/train_info.json"
 PLOTS_DIR="mvp_model/artifacts/plots"
 TAIL_CSV="mvp_model/artifacts/test_tail_preds.csv"
+EXTRA_ARGS=()
 
 # Parse args
 while [[ $# -gt 0 ]]; do
@@ -22,6 +23,7 @@ while [[ $# -gt 0 ]]; do
     --model) MODEL_PATH="$2"; shift 2 ;;
     --out-dir) PLOTS_DIR="$2"; shift 2 ;;
     --tail-out) TAIL_CSV="$2"; shift 2 ;;
+    --force|--full-merge) EXTRA_ARGS+=("$1"); shift ;;
     *) echo "Unknown arg: $1"; exit 1 ;;
   esac
 done
@@ -39,32 +41,14 @@ if [[ -f .venv_cli/bin/activate ]]; then
   source .venv_cli/bin/activate
 fi
 
-echo "[1/5] Unificando maestros"
-python3 scripts/merge_tournaments_to_masters.py
-
-echo "[2/5] Generando join por match_id"
-python3 scripts/join_matches_by_match_id.py
-
-echo "[3/5] Entrenando modelo"
-python3 -m mvp_model.train_mvp --csv-path "$CSV_PATH" --model-out "$MODEL_PATH" --metrics-out "$METRICS_PATH" --train-info-out "$TRAIN_INFO_PATH"
-
-echo "[4/5] Exportando bloque de test a CSV"
-TAIL_ARGS=(--csv-path "$CSV_PATH" --model "$MODEL_PATH" --out "$TAIL_CSV" --threshold "$THRESH")
-if [[ "$ALL_TEST" == true ]]; then
-  TAIL_ARGS+=(--all-test)
-else
-  TAIL_ARGS+=(--last-n "$LAST_N")
-fi
-python3 -m mvp_model.print_test_tail "${TAIL_ARGS[@]}"
-
-echo "[5/5] Generando gráficas"
-PLOT_ARGS=(--csv-path "$CSV_PATH" --model "$MODEL_PATH" --out-dir "$PLOTS_DIR" --test-size 0.2)
-if [[ "$ALL_TEST" == true ]]; then
-  PLOT_ARGS+=(--all-test)
-else
-  PLOT_ARGS+=(--last-n "$LAST_N")
+# merge -> join / features -> train -> tail / plots en un solo proceso (DAG):
+# datos en memoria entre etapas, etapas sin cambios omitidas, tiempos por etapa
+PIPELINE_ARGS=(--csv-path "$CSV_PATH" --model "$MODEL_PATH" --metrics-out "$METRICS_PATH" --train-info-out "$TRAIN_INFO_PATH"
+  --out-dir "$PLOTS_DIR" --tail-out "$TAIL_CSV" --threshold "$THRESH" --test-size 0.2 --merge-jobs 0)
+if [[ "$ALL_TEST" != true ]]; then
+  PIPELINE_ARGS+=(--last-n "$LAST_N")
 fi
-python3 -m mvp_model.plot_test_predictions "${PLOT_ARGS[@]}"
+python3 scripts/run_pipeline.py "${PIPELINE_ARGS[@]}" ${EXTRA_ARGS[@]+"${EXTRA_ARGS[@]}"}
 
 echo
 echo "Listo. Salidas principales:"
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""In-process replacement for the five-step run_all.sh / run_all.ps1 chain.
+
+The stages (merge -> join, features -> train -> tail export, plots) form a
+DAG executed in one Python process:
+
+- DataFrames, features and the fitted model are handed between stages in
+  memory instead of every step re-reading matches.csv and model.pkl.
+- Independent stages run concurrently on a thread pool (join next to the
+  feature build + training, tail export next to the plots).
+- A stage is skipped when its key (parameters, content hashes of the files it
+  reads and the keys of the stages it consumes) matches the last successful
+  run and its outputs are untouched. State lives in
+  mvp_model/artifacts/.pipeline_state.json.
+- Wall time per stage is reported at the end; with --memory-report also the
+  peak memory of each stage (StageMemory, tracemalloc).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# mvp_model is imported as a package from the repo root; sibling scripts
+# (merge/join) resolve through this script's own directory on sys.path
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import join_matches_by_match_id as join_step  # noqa: E402
+import merge_tournaments_to_masters as merge_step  # noqa: E402
+from mvp_model.utils.cli import add_cache_args, add_feature_set_arg, add_memory_arg, add_rating_engine_arg  # noqa: E402
+
+STATE_VERSION = 1
+DEFAULT_STATE_PATH = "mvp_model/artifacts/.pipeline_state.json"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Run merge, join, training, tail export and plots as one in-process DAG")
+    p.add_argument("--csv-path", default="masters_csvs/matches.csv", help="Path to matches.csv")
+    p.add_argument("--model", default="mvp_model/artifacts/model.pkl", help="Output path for the trained model")
+    p.add_argument("--metrics-out", default="mvp_model/artifacts/metrics.json", help="Output path for metrics JSON")
+    p.add_argument("--train-info-out", default="mvp_model/artifacts/train_info.json", help="Output path for training info JSON")
+    p.add_argument("--out-dir", default="mvp_model/artifacts/plots", help="Output directory for plots")
+    p.add_argument("--tail-out", default="mvp_model/artifacts/test_tail_preds.csv", help="Output CSV for the test block export")
+    p.add_argument("--last-n", type=int, default=None, help="Only the last N test matches in the export/plots (default: whole test block)")
+    p.add_argument("--threshold", type=float, default=0.5, help="Threshold for discrete predictions")
+    p.add_argument("--test-size", type=float, default=0.2, help="Fraction of tail for test (time split)")
+    p.add_argument("--elo-k", type=float, default=32.0, help="Elo K-factor")
+    p.add_argument("--elo-base", type=float, default=1500.0, help="Elo base rating")
+    p.add_argument("--use-xgb", action="store_true", help="Force use XGBoost if available")
+    p.add_argument("--merge-jobs", type=int, default=0, help="Worker processes for the merge (0 = all cores)")
+    p.add_argument("--full-merge", action="store_true", help="Ignore the merge manifest and rebuild every master")
+    p.add_argument("--jobs", type=int, default=4, help="Stages allowed to run at the same time")
+    p.add_argument("--force", action="store_true", help="Run every stage even if its inputs are unchanged")
+    p.add_argument("--state", default=DEFAULT_STATE_PATH, help="Pipeline state file (stage keys and input fingerprints)")
+    p.add_argument("--memory-report", action="store_true",
+                   help="Report the peak memory of each stage (tracemalloc; stages run one at a time)")
+    add_feature_set_arg(p)
+    add_rating_engine_arg(p)
+    add_cache_args(p)
+    add_memory_arg(p)
+    return p.parse_args(argv)
+
+
+@dataclass
+class Stage:
+    """One node of the DAG.
+
+    `deps` are stages whose in-memory value this one consumes (their keys are
+    part of its key); `after` only orders execution. `inputs` are files read
+    from disk and fingerprinted by content. A `lazy` stage has no outputs: it
+    is computed on first use by a dependent and never when all of them are
+    skipped. An `always` stage runs every time (it is incremental on its own)
+    and its key is the fingerprint of its outputs.
+    """
+
+    name: str
+    run: Callable[["Pipeline"], Any]
+    deps: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    params: Dict[str, Any] = field(default_factory=dict)
+    load: Optional[Callable[["Pipeline"], Any]] = None
+    lazy: bool = False
+    always: bool = False
+
+
+class Pipeline:
+    def __init__(self, stages: List[Stage], state_path: str, force: bool = False, memory: Any = None):
+        self.order = [s.name for s in stages]
+        self.stages = {s.name: s for s in stages}
+        self.state_path = state_path
+        self.force = force
+        self.state = self._load_state()
+        self._files: Dict[str, Dict[str, Any]] = self.state.get("files", {})
+        self._keys: Dict[str, str] = {}
+        self._values: Dict[str, Any] = {}
+        self._locks = {name: threading.Lock() for name in self.order}
+        self._state_lock = threading.Lock()
+        self.report: Dict[str, Dict[str, Any]] = {}
+        # StageMemory (mvp_model/utils/chunks.py) or None
+        self.memory = memory
+        self._t0 = time.perf_counter()
+
+    # -- state -------------------------------------------------------------
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state if state.get("version") == STATE_VERSION else {}
+
+    def _save_state(self) -> None:
+        out_dir = os.path.dirname(self.state_path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({**self.state, "version": STATE_VERSION, "files": self._files}, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def _fingerprint(self, path: str) -> Optional[str]:
+        path = os.path.abspath(path)
+        if not os.path.exists(path):
+            return None
+        with self._state_lock:
+            prev = self._files.get(path)
+        # Same stat-then-hash scheme as the merge manifest
+        fp = merge_step._fingerprint(path, prev)
+        with self._state_lock:
+            self._files[path] = fp
+        return fp["sha256"]
+
+    @staticmethod
+    def _stat(path: str) -> Optional[List[int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return [st.st_size, st.st_mtime_ns]
+
+    # -- keys and values ---------------------------------------------------
+
+    def key(self, name: str) -> str:
+        if name in self._keys:
+            return self._keys[name]
+        st = self.stages[name]
+        if st.always:
+            payload = {p: self._fingerprint(p) for p in st.outputs}
+        else:
+            payload = {
+                "stage": name,
+                "params": st.params,
+                "inputs": {p: self._fingerprint(p) for p in st.inputs},
+                "deps": {d: self.key(d) for d in st.deps},
+            }
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:24]
+        self._keys[name] = key
+        return key
+
+    def value(self, name: str) -> Any:
+        """In-memory result of a stage: computed (lazy), produced, or reloaded from its outputs (skipped)."""
+        with self._locks[name]:
+            if name not in self._values:
+                st = self.stages[name]
+                if st.lazy:
+                    self._values[name] = self._timed(st, "ejecutada", lambda: st.run(self))
+                else:
+                    self._values[name] = st.load(self) if st.load else None
+            return self._values[name]
+
+    def _timed(self, st: Stage, status: str, fn: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        if self.memory is not None and status == "ejecutada":
+            with self.memory.stage(st.name):
+                result = fn()
+        else:
+            result = fn()
+        self.report[st.name] = {
+            "status": status,
+            "start": start - self._t0,
+            "seconds": time.perf_counter() - start,
+            "thread": threading.current_thread().name,
+        }
+        return result
+
+    def _fresh(self, st: Stage) -> bool:
+        if self.force or st.always:
+            return False
+        prev = self.state.get("stages", {}).get(st.name)
+        if not prev or prev.get("key") != self.key(st.name):
+            return False
+        # Outputs missing or touched since the last run -> rerun
+        return all(self._stat(p) == prev.get("outputs", {}).get(p) for p in st.outputs)
+
+    def _execute(self, name: str) -> None:
+        st = self.stages[name]
+        if self._fresh(st):
+            self._timed(st, "omitida", lambda: None)
+            return
+        value = self._timed(st, "ejecutada", lambda: st.run(self))
+        with self._locks[name]:
+            self._values[name] = value
+        key = self.key(name)
+        with self._state_lock:
+            self.state.setdefault("stages", {})[name] = {
+                "key": key,
+                "outputs": {p: self._stat(p) for p in st.outputs},
+            }
+            self._save_state()
+
+    # -- scheduling --------------------------------------------------------
+
+    def _waits(self, name: str) -> List[str]:
+        """Non-lazy stages that must finish first (lazy ones are looked through)."""
+        out: List[str] = []
+        for d in self.stages[name].deps + self.stages[name].after:
+            out.extend(self._waits(d) if self.stages[d].lazy else [d])
+        return out
+
+    def run(self, jobs: int = 4) -> Dict[str, Dict[str, Any]]:
+        pending = [n for n in self.order if not self.stages[n].lazy]
+        waits = {n: set(self._waits(n)) for n in pending}
+        done: set = set()
+        running: Dict[Any, str] = {}
+        with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="stage") as ex:
+            while pending or running:
+                for name in [n for n in pending if waits[n] <= done]:
+                    pending.remove(name)
+                    running[ex.submit(self._execute, name)] = name
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    name = running.pop(fut)
+                    fut.result()  # propagate the first failure
+                    done.add(name)
+        for name in self.order:
+            self.report.setdefault(name, {"status": "no necesaria", "start": None, "seconds": 0.0, "thread": ""})
+        with self._state_lock:
+            self.state["last_run"] = {n: self.report[n] for n in self.order}
+            self._save_state()
+        return self.state["last_run"]
+
+
+def build_stages(args: argparse.Namespace) -> List[Stage]:
+    """The run_all DAG. Heavy modules are imported here, after argument parsing."""
+    import joblib
+
+    from mvp_model import plot_test_predictions, print_test_tail, train_mvp
+    from mvp_model.utils.features import FEATURES_VERSION, feature_sources, load_features
+
+    cache = ["--no-cache"] if args.no_cache else ["--cache-dir", args.cache_dir]
+    test_block = ["--all-test"] if args.last_n is None else ["--last-n", str(args.last_n)]
+    elo = ["--elo-k", str(args.elo_k), "--elo-base", str(args.elo_base), "--feature-set", args.feature_set,
+           "--rating-engine", args.rating_engine]
+
+    merge_argv = ["--jobs", str(args.merge_jobs)] + (["--full"] if args.full_merge else [])
+    merge_step.configure(merge_step.parse_args(merge_argv))
+    join_step.configure(join_step.parse_args([]))
+
+    train_args = train_mvp.parse_args(
+        ["--csv-path", args.csv_path, "--model-out", args.model, "--metrics-out", args.metrics_out,
+         "--train-info-out", args.train_info_out, "--test-size", str(args.test_size), *elo, *cache]
+        + (["--use-xgb"] if args.use_xgb else [])
+    )
+    tail_args = print_test_tail.parse_args(
+        ["--csv-path", args.csv_path, "--model", args.model, "--out", args.tail_out, "--threshold", str(args.threshold),
+         "--test-size", str(args.test_size), *test_block, *elo, *cache]
+    )
+    plot_args = plot_test_predictions.parse_args(
+        ["--csv-path", args.csv_path, "--model", args.model, "--out-dir", args.out_dir, "--threshold", str(args.threshold),
+         "--test-size", str(args.test_size), *test_block, *elo, *cache]
+    )
+    use_xgb = args.use_xgb and train_mvp.HAS_XGB
+    train_outputs = [train_args.model_out, train_args.metrics_out, train_args.train_info_out]
+    if args.rating_engine == "elo":
+        train_outputs.append(train_args.elo_state_out)
+    if not use_xgb:
+        train_outputs.append(train_args.model_json_out)
+
+    def features(_: Pipeline):
+        return load_features(
+            args.csv_path, args.elo_k, args.elo_base, args.feature_set,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            engine=args.rating_engine,
+            memory_mb=args.memory_mb,
+        )
+
+    def train(p: Pipeline):
+        return train_mvp.train(train_args, *p.value("features"))
+
+    def tail(p: Pipeline):
+        df, X, _ = p.value("features")
+        print_test_tail.export_tail(tail_args, df, X, p.value("train"))
+
+    def plot(p: Pipeline):
+        df, X, _ = p.value("features")
+        return plot_test_predictions.plot_test(plot_args, df, X, p.value("train"))
+
+    return [
+        Stage(
+            "merge",
+            run=lambda p: merge_step.main(merge_argv),
+            outputs=[os.path.join(merge_step.OUTPUT_DIR, f"{bn}.csv") for bn in merge_step.BASE_NAMES],
+            always=True,
+        ),
+        Stage(
+            "join",
+            run=lambda p: join_step.main([]),
+            after=["merge"],
+            inputs=[join_step.BASE_FILE, join_step.OV_FILE, join_step.PLAYERS_FILE, join_step.MAPS_FILE],
+            outputs=[join_step.OUT_PATH],
+        ),
+        Stage(
+            "features",
+            run=features,
+            after=["merge"],
+            inputs=[args.csv_path] + feature_sources(args.feature_set, os.path.dirname(args.csv_path)),
+            params={"elo_k": args.elo_k, "elo_base": args.elo_base, "feature_set": args.feature_set,
+                    "rating_engine": args.rating_engine, "version": FEATURES_VERSION},
+            lazy=True,
+        ),
+        Stage(
+            "train",
+            run=train,
+            deps=["features"],
+            outputs=train_outputs,
+            params={"test_size": args.test_size, "use_xgb": use_xgb},
+            load=lambda p: joblib.load(args.model),
+        ),
+        Stage(
+            "tail",
+            run=tail,
+            deps=["train", "features"],
+            outputs=[args.tail_out],
+            params={"threshold": args.threshold, "last_n": args.last_n, "test_size": args.test_size},
+        ),
+        Stage(
+            "plot",
+            run=plot,
+            deps=["train", "features"],
+            outputs=[os.path.join(args.out_dir, name) for name in (
+                "test_predictions_timeseries.png", "test_calibration_curve.png", "test_metrics.json",
+            )],
+            params={"threshold": args.threshold, "last_n": args.last_n, "test_size": args.test_size},
+        ),
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    os.chdir(ROOT)
+    t0 = time.perf_counter()
+    memory = None
+    if args.memory_report:
+        from mvp_model.utils.chunks import StageMemory
+
+        memory = StageMemory()
+    pipeline = Pipeline(build_stages(args), args.state, force=args.force, memory=memory)
+    # tracemalloc is process-wide: concurrent stages would share one peak
+    report = pipeline.run(jobs=1 if memory is not None else args.jobs)
+
+    print("\nResumen del pipeline:")
+    print(f"{'etapa':<10}{'estado':<14}{'inicio':>9}{'duración':>10}  hilo")
+    for name, r in report.items():
+        start = f"{r['start']:.3f}s" if r["start"] is not None else "-"
+        print(f"{name:<10}{r['status']:<14}{start:>9}{r['seconds']:>9.3f}s  {r['thread']}")
+    print(f"Total: {time.perf_counter() - t0:.3f}s")
+    if memory is not None:
+        print("\nMemoria por etapa:")
+        print(memory.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from mvp_model.backtest import _init_worker, _run_chunk, plan_folds
+from mvp_model.train_mvp import build_model
+from mvp_model.utils.features import ELO_FEATURES, build_features, load_matches
+
+MASTERS = os.path.join(os.path.dirname(__file__), "..", "masters_csvs")
+
+
+def _dated():
+    df = load_matches(os.path.join(MASTERS, "matches.csv"))
+    X = build_features(df, 32.0, 1500.0, masters_dir=MASTERS)[ELO_FEATURES]
+    dated = df["parsed_date"].notna().to_numpy()
+    return df[dated].reset_index(drop=True), X[dated].reset_index(drop=True)
+
+
+def test_folds_train_only_on_matches_before_the_event():
+    df, _ = _dated()
+    folds = plan_folds(df, "tournament_name", min_train=50)
+    assert len(folds) > 3
+    starts = [f["start"] for f in folds]
+    assert starts == sorted(starts)
+    for fold in folds:
+        train = df.iloc[: fold["n_train"]]
+        test = df.iloc[fold["test_idx"]]
+        assert (train["parsed_date"] < pd.Timestamp(fold["start"])).all()
+        assert (test["tournament_name"] == fold["event"]).all()
+        assert not train["tournament_name"].eq(fold["event"]).any()
+        # Todo el evento, no solo lo que cae tras el prefijo
+        assert len(test) == int((df["tournament_name"] == fold["event"]).sum())
+
+
+def test_cold_folds_match_an_independent_fit():
+    df, X = _dated()
+    y = df["team1_win"].astype(int).to_numpy()
+    folds = plan_folds(df, "tournament_name", min_train=50)[:3]
+    _init_worker(X.to_numpy(dtype=np.float64), y, ELO_FEATURES)
+    results = _run_chunk(folds, use_xgb=False, warm_start=False)
+    for fold, res in zip(folds, results):
+        model = build_model(use_xgb=False).fit(X.iloc[: fold["n_train"]], y[: fold["n_train"]])
+        assert np.array_equal(res["proba"], model.predict_proba(X.iloc[fold["test_idx"]])[:, 1])
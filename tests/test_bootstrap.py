@@ -0,0 +1,52 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from mvp_model.utils.bootstrap import _per_match, _rank_auc, bootstrap_report
+
+RNG = np.random.default_rng(7)
+Y = np.array([1, 0, 1, 1, 0, 0, 1, 0, 1, 1], dtype=np.float64)
+A = np.clip(0.5 + 0.3 * (Y - 0.5) + RNG.normal(0, 0.2, len(Y)), 0.05, 0.95)
+B = np.clip(0.5 + RNG.normal(0, 0.2, len(Y)), 0.05, 0.95)
+
+
+def _exact_p(metric: str) -> float:
+    # Las 2^n formas de intercambiar A y B partido a partido
+    P = np.stack([A, B])
+    obs = _stat(metric, P[0], P[1])
+    null = []
+    for swap in itertools.product([False, True], repeat=len(Y)):
+        swap = np.array(swap)
+        null.append(_stat(metric, np.where(swap, B, A), np.where(swap, A, B)))
+    return float(np.mean(np.abs(null) >= abs(obs) - 1e-12))
+
+
+def _stat(metric: str, a: np.ndarray, b: np.ndarray) -> float:
+    if metric == "roc_auc":
+        return float(_rank_auc(Y, np.stack([a]))[0] - _rank_auc(Y, np.stack([b]))[0])
+    losses = _per_match(Y, np.stack([a, b]))[metric]
+    return float(losses[0].mean() - losses[1].mean())
+
+
+@pytest.mark.parametrize("metric", ["log_loss", "brier", "roc_auc"])
+def test_permutation_p_value_matches_exact_enumeration(metric):
+    report = bootstrap_report(Y, {"a": A, "b": B}, baseline="b", n_boot=20_000, seed=3)
+    assert report["paired"]["a"][metric]["p_permutation"] == pytest.approx(_exact_p(metric), abs=0.005)
+
+
+def test_permutation_p_value_edge_cases():
+    # Mismas predicciones: ninguna diferencia es significativa
+    same = bootstrap_report(Y, {"a": A, "b": A.copy()}, baseline="b", n_boot=500)
+    assert all(same["paired"]["a"][m]["p_permutation"] == 1.0 for m in ("log_loss", "brier", "roc_auc"))
+    # Un modelo casi perfecto frente a una moneda en 60 partidos
+    y = np.tile(Y, 6)
+    sharp = bootstrap_report(y, {"a": np.where(y == 1, 0.9, 0.1), "b": np.full(len(y), 0.5)},
+                             baseline="b", n_boot=2000)
+    assert sharp["paired"]["a"]["log_loss"]["p_permutation"] < 0.01
+
+
+def test_report_is_identical_with_any_number_of_jobs():
+    one = bootstrap_report(Y, {"a": A, "b": B}, baseline="b", n_boot=1000, seed=5, jobs=1)
+    two = bootstrap_report(Y, {"a": A, "b": B}, baseline="b", n_boot=1000, seed=5, jobs=2)
+    assert one == two
@@ -0,0 +1,65 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from mvp_model.utils.chunks import iter_master
+from mvp_model.utils.masters import read_master, read_typed
+from mvp_model.utils.schema import parse_dates
+
+MASTERS = os.path.join(os.path.dirname(__file__), "..", "masters_csvs")
+BASE = "detailed_matches_player_stats"
+COLUMNS = ["match_id", "player_name", "player_team_id", "acs", "kast", "match_date"]
+
+
+@pytest.fixture
+def master(tmp_path):
+    # Copia de los maestros (el registro se reconstruye con todos) con la copia
+    # tipada y el índice del merge
+    pytest.importorskip("pyarrow")
+    from scripts.masters_columnar import write_typed_parquet
+    from scripts.match_index import write_master_index
+
+    masters = tmp_path / "masters_csvs"
+    shutil.copytree(MASTERS, masters)
+    for name in os.listdir(masters):
+        if name.endswith(".ids.csv"):
+            os.utime(masters / name)
+    csv_path = str(masters / f"{BASE}.csv")
+    write_typed_parquet(csv_path, str(masters / f"{BASE}.typed.parquet"))
+    write_master_index(csv_path, BASE)
+    return csv_path
+
+
+def _concat(chunks) -> pd.DataFrame:
+    return pd.concat(list(chunks), ignore_index=True)
+
+
+def _same(got: pd.DataFrame, ref: pd.DataFrame) -> None:
+    # Las categóricas de cada bloque tienen sus propias categorías: se comparan valores
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), ref.reset_index(drop=True),
+                                  check_dtype=False, check_categorical=False)
+
+
+def test_chunked_read_matches_full_read(master):
+    _same(_concat(iter_master(master, typed=False, chunk_rows=700)), read_master(master))
+    _same(_concat(iter_master(master, chunk_rows=700)), read_typed(master))
+    # Columnas de ID del registro: del sidecar, alineadas por fila entre bloques
+    # (read_master las devuelve en el orden del CSV)
+    _same(_concat(iter_master(master, COLUMNS, typed=False, chunk_rows=700)), read_master(master, COLUMNS)[COLUMNS])
+
+
+def test_filtered_chunks_match_filtered_full_read(master):
+    full = read_master(master, COLUMNS)[COLUMNS]
+    dates = parse_dates(full["match_date"])
+    lo, hi = pd.Timestamp("2025-03-01"), pd.Timestamp("2025-06-30")
+    in_range = full[(dates >= lo) & (dates <= hi)]
+    assert 0 < len(in_range) < len(full)
+    # Rangos de bytes del índice, por bloques
+    got = _concat(iter_master(master, COLUMNS, start=lo, end=hi, typed=False, chunk_rows=300))
+    _same(got, in_range)
+
+    picked = set(full["match_id"].drop_duplicates().iloc[::7])
+    got = _concat(iter_master(master, COLUMNS, match_ids=picked, typed=False, chunk_rows=300))
+    _same(got, full[full["match_id"].isin(picked)])
@@ -0,0 +1,58 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mvp_model.utils.economy import BUY_COLUMNS, ECONOMY_COLUMNS, load_economy, parse_economy
+from mvp_model.utils.features import load_matches
+from mvp_model.utils.masters import read_master
+
+MASTERS = os.path.join(os.path.dirname(__file__), "..", "masters_csvs")
+RAW = pd.DataFrame({
+    "match_id": [1, 1, 2],
+    "map": ["Ascent ", "All Maps", "Bind"],
+    "Team": [" BBL", "TL", "BBL"],
+    "Pistol Won": ["1", "2", ""],
+    "Eco (won)": ["3 (1)", "14 (10)", "x"],
+    "Semi-eco (won)": [" 2 ( 0 ) ", "0 (0)", None],
+    "Semi-buy (won)": ["5 (2)", "7 (3)", "1 (1)"],
+    "Full buy(won)": ["12 (6)", "20 (11)", "9 (9)"],
+})
+
+
+@pytest.mark.parametrize("use_arrow", [False, True])
+def test_parse_economy_splits_played_won(use_arrow):
+    if use_arrow:
+        pytest.importorskip("pyarrow")
+    out = parse_economy(RAW, use_arrow=use_arrow)
+    assert out["eco_played"].tolist()[:2] == [3, 14] and out["eco_won"].tolist()[:2] == [1, 10]
+    assert out["semi_eco_played"].tolist()[:2] == [2, 0]
+    # Celdas que no encajan o vacías: <NA>, no 0
+    assert out["eco_played"].isna().tolist() == [False, False, True]
+    assert out["semi_eco_won"].isna().tolist() == [False, False, True]
+    assert out["pistol_won"].isna().tolist() == [False, False, True]
+    assert out["team"].tolist() == ["BBL", "TL", "BBL"] and out["map"].tolist()[0] == "Ascent"
+
+
+def test_parse_economy_on_master_matches_per_cell_parse():
+    raw = read_master(os.path.join(MASTERS, "economy_data.csv"), ECONOMY_COLUMNS)
+    out = parse_economy(raw)
+    for col, prefix in BUY_COLUMNS.items():
+        cells = [re.fullmatch(r"\s*(\d+)\s*\(\s*(\d+)\s*\)\s*", str(v)) for v in raw[col]]
+        played = [float(m.group(1)) if m else np.nan for m in cells]
+        won = [float(m.group(2)) if m else np.nan for m in cells]
+        np.testing.assert_array_equal(out[f"{prefix}_played"].to_numpy(dtype=float, na_value=np.nan), played)
+        np.testing.assert_array_equal(out[f"{prefix}_won"].to_numpy(dtype=float, na_value=np.nan), won)
+        assert (out[f"{prefix}_won"] <= out[f"{prefix}_played"]).all()
+
+
+def test_load_economy_keeps_both_teams_of_each_match_by_id():
+    matches = load_matches(os.path.join(MASTERS, "matches.csv"))
+    eco = load_economy(os.path.join(MASTERS, "economy_data.csv"), matches)
+    sides = eco.merge(matches[["match_id", "team1_id", "team2_id"]], on="match_id")
+    assert ((sides["team_id"] == sides["team1_id"]) | (sides["team_id"] == sides["team2_id"])).all()
+    assert (eco.groupby("match_id").size() == 2).all()
+    rates = eco[["eco_rate", "full_buy_rate", "round_rate"]]
+    assert ((rates >= 0) & (rates <= 1) | rates.isna()).all().all()
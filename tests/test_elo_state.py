@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mvp_model.utils.elo_core import EloState
+
+# Historial como el de los maestros: partidos completados sin fecha parseable
+# (NaT) quedan al final del orden (parsed_date, match_id)
+HISTORY = pd.DataFrame({
+    "team1": ["A", "B", "A", "C"],
+    "team2": ["B", "C", "C", "A"],
+    "team1_win": [1.0, 0.0, 1.0, 0.0],
+    "parsed_date": pd.to_datetime(["2025-08-30", "2025-08-31", None, None]),
+    "match_id": [10, 11, 13, 12],
+})
+NEW = pd.DataFrame({
+    "team1": ["B"],
+    "team2": ["A"],
+    "team1_win": [np.nan],
+    "parsed_date": pd.to_datetime(["2025-11-01"]),
+    "match_id": [20],
+})
+
+
+def _records(df: pd.DataFrame):
+    dates = [None if pd.isna(d) else d.to_pydatetime() for d in df["parsed_date"]]
+    return list(df["team1"]), list(df["team2"]), list(df["team1_win"]), dates, list(df["match_id"])
+
+
+def test_undated_rows_do_not_set_watermark():
+    state = EloState()
+    state.update(HISTORY)
+    assert state.last_date == "2025-08-31T00:00:00"
+    assert state.last_match_id == 11
+    assert sorted(state.undated_ids) == [12, 13]
+    assert state.n_matches == 4
+
+
+def test_new_dated_fixture_after_undated_history():
+    state = EloState()
+    state.update(HISTORY)
+    state = EloState.from_dict(state.to_dict())
+    feats = state.update(pd.concat([HISTORY, NEW], ignore_index=True))
+    # Solo el partido nuevo: ni se pierde ni se reprocesan los sin fecha
+    assert list(feats.index) == [4]
+    assert state.n_matches == 4
+
+
+def test_records_path_matches_dataframe_path():
+    frame, light = EloState(), EloState()
+    frame.update(HISTORY)
+    light.update_records(*_records(HISTORY))
+    assert light.to_dict() == frame.to_dict()
+    keep, elo1, elo2 = light.update_records(*_records(pd.concat([HISTORY, NEW], ignore_index=True)))
+    assert keep == [4]
+    assert elo1 == [frame.rating("B")] and elo2 == [frame.rating("A")]
+
+
+def test_scalar_check():
+    state = EloState()
+    state.update(HISTORY)
+    assert state.is_after_watermark(datetime(2025, 11, 1), 20)
+    assert not state.is_after_watermark(datetime(2025, 8, 31), 11)
+    assert not state.is_after_watermark(None, 13)
+    assert state.is_after_watermark(None, 14)
+
+
+def test_old_undated_watermark_is_rejected():
+    old = {"config": {"k": 32.0, "base": 1500.0}, "watermark": {"date": None, "match_id": 542279},
+           "n_matches": 504, "ratings": {}}
+    with pytest.raises(ValueError):
+        EloState.from_dict(old)
+
+
+def test_apply_result_ignores_stale_and_duplicate_results():
+    state = EloState()
+    state.update(HISTORY)
+    ratings = dict(state.ratings)
+    # Mismo partido que la marca de agua, uno anterior y un sin fecha ya procesado
+    assert state.apply_result("A", "B", 1.0, date="2025-08-31", match_id=11) is None
+    assert state.apply_result("A", "B", 1.0, date="2025-08-01", match_id=30) is None
+    assert state.apply_result("A", "C", 1.0, match_id=13) is None
+    assert state.ratings == ratings and state.n_matches == 4
+
+    assert state.apply_result("B", "A", 0.0, date="2025-11-01", match_id=20) is not None
+    assert (state.last_date, state.last_match_id) == ("2025-11-01T00:00:00", 20)
+    # Repetido tras aplicarlo: se ignora
+    assert state.apply_result("B", "A", 0.0, date="2025-11-01", match_id=20) is None
+    # Misma fecha sin match_id: la marca queda sin match_id, no con el anterior
+    assert state.apply_result("C", "A", 1.0, date="2025-11-02") is not None
+    assert (state.last_date, state.last_match_id) == ("2025-11-02T00:00:00", None)
+    assert state.n_matches == 6
@@ -0,0 +1,41 @@
+import csv
+import os
+import shutil
+
+import pandas as pd
+
+from mvp_model.utils.features import load_matches
+from mvp_model.utils.form import PERFORMANCE_FILE, PLAYER_STATS_FILE, build_form_features
+
+MASTERS = os.path.join(os.path.dirname(__file__), "..", "masters_csvs")
+
+
+def _set_acs(csv_path: str, match_id: str, value: str) -> None:
+    # Solo cambian las filas del partido; el resto del archivo queda igual
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    col, mid = rows[0].index("acs"), rows[0].index("match_id")
+    for row in rows[1:]:
+        if row[mid] == match_id:
+            row[col] = value
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f, lineterminator="\n").writerows(rows)
+
+
+def test_form_features_only_read_previous_matches(tmp_path):
+    masters = tmp_path / "masters_csvs"
+    shutil.copytree(MASTERS, masters)
+    ps_csv, perf_csv = str(masters / PLAYER_STATS_FILE), str(masters / PERFORMANCE_FILE)
+    df = load_matches(str(masters / "matches.csv"))
+    before = build_form_features(df, ps_csv, perf_csv)
+
+    # Estadísticas absurdas en el partido j: ni su fila ni las anteriores cambian,
+    # los partidos posteriores de esos equipos sí
+    j = len(df) // 2
+    _set_acs(ps_csv, str(df["match_id"].iloc[j]), "9999")
+    for name in os.listdir(masters):
+        if name.endswith(".ids.csv"):
+            os.utime(masters / name)
+    after = build_form_features(df, ps_csv, perf_csv)
+    pd.testing.assert_frame_equal(after.iloc[: j + 1], before.iloc[: j + 1])
+    assert not after.iloc[j + 1:].equals(before.iloc[j + 1:])
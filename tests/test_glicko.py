@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from mvp_model.utils.glicko import GlickoConfig, glicko_pass
+
+
+def test_glickman_reference_example():
+    # "Example of the Glicko-2 system" (Glickman): 1500/RD 200 contra
+    # 1400/30, 1550/100 y 1700/300 con resultados 1, 0, 0 en un periodo,
+    # tau = 0.5 -> 1464.06 / RD 151.52 / volatilidad 0.05999.
+    # El partido del periodo siguiente lee el estado tras el periodo (sin
+    # periodos inactivos, la RD no se infla); rd=350 para que el techo no recorte
+    codes1 = np.array([0, 0, 0, 0])
+    codes2 = np.array([1, 2, 3, 1])
+    y = np.array([1.0, 0.0, 0.0, np.nan])
+    periods = np.array([0, 0, 0, 1])
+    init = (np.array([1500.0, 1400.0, 1550.0, 1700.0]), np.array([200.0, 30.0, 100.0, 300.0]), np.full(4, 0.06))
+    r1, r2, rd1, rd2 = glicko_pass(codes1, codes2, y, periods, 4, GlickoConfig(rd=350.0, tau=0.5), init)
+    assert r1[:3].tolist() == [1500.0] * 3 and rd1[:3] == pytest.approx([200.0] * 3)
+    assert r2[:3] == pytest.approx([1400.0, 1550.0, 1700.0])
+    assert r1[3] == pytest.approx(1464.06, abs=0.01)
+    assert rd1[3] == pytest.approx(151.52, abs=0.01)
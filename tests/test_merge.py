@@ -0,0 +1,42 @@
+import os
+import shutil
+import subprocess
+import sys
+
+REPO = os.path.join(os.path.dirname(__file__), "..")
+MERGE = os.path.join(REPO, "scripts", "merge_tournaments_to_masters.py")
+TOURNAMENTS = ["VCT 2025 Americas Kickoff_csvs", "VCT 2025 China Kickoff_csvs", "VCT 2025 EMEA Kickoff_csvs"]
+
+
+def _merge(data_root, out_dir, *extra) -> str:
+    # Como script (importa sus módulos hermanos desde scripts/)
+    cmd = [sys.executable, MERGE, "--data-root", str(data_root), "--output-dir", str(out_dir),
+           "--no-index", "--no-registry", *extra]
+    return subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+
+
+def _masters(out_dir) -> dict:
+    out = {}
+    for name in sorted(os.listdir(out_dir)):
+        if name.endswith(".csv"):
+            with open(os.path.join(out_dir, name), "rb") as f:
+                out[name] = f.read()
+    return out
+
+
+def test_incremental_append_matches_parallel_full_rebuild(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    for t in TOURNAMENTS[:2]:
+        shutil.copytree(os.path.join(REPO, "tournaments", t), data / t)
+    incremental = tmp_path / "incremental"
+    _merge(data, incremental)
+    # Torneo nuevo: cada maestro se anexa, sin reconstruir
+    shutil.copytree(os.path.join(REPO, "tournaments", TOURNAMENTS[2]), data / TOURNAMENTS[2])
+    stdout = _merge(data, incremental)
+    assert "modo: append" in stdout and "modo: rebuild" not in stdout
+
+    full = tmp_path / "full"
+    _merge(data, full, "--full", "--jobs", "2")
+    assert _masters(incremental) == _masters(full)
+    assert len(_masters(full)) == 10
@@ -0,0 +1,30 @@
+import os
+
+import pandas as pd
+
+from mvp_model.predict_mvp import read_matches_light
+from mvp_model.utils.elo_core import EloState
+from mvp_model.utils.features import load_matches
+
+MATCHES_CSV = os.path.join(os.path.dirname(__file__), "..", "masters_csvs", "matches.csv")
+
+
+def test_read_matches_light_matches_load_matches():
+    # Misma lectura que la ruta pandas sobre el maestro real: orden, IDs,
+    # etiqueta y fechas
+    df = load_matches(MATCHES_CSV, completed_only=False)
+    m = read_matches_light(MATCHES_CSV)
+    assert m["match_id"] == df["match_id"].tolist()
+    for col in ["team1", "team2", "team1_id", "team2_id", "team1_win"]:
+        assert m[col] == df[col].tolist(), col
+    assert m["date"] == [None if pd.isna(d) else d.to_pydatetime() for d in df["parsed_date"]]
+
+
+def test_light_elo_state_matches_dataframe_state():
+    df = load_matches(MATCHES_CSV, completed_only=False)
+    m = read_matches_light(MATCHES_CSV)
+    frame, light = EloState(), EloState()
+    frame.update(df)
+    ys = [float(y) for y in m["team1_win"]]
+    light.update_records(m["team1"], m["team2"], ys, m["date"], m["match_id"], m["team1_id"], m["team2_id"])
+    assert light.to_dict() == frame.to_dict()
@@ -0,0 +1,50 @@
+import warnings
+
+import pandas as pd
+import pytest
+
+from mvp_model.utils.schema import normalize, parse_dates
+from scripts.match_index import parse_date, parse_datetime
+
+RAW = [
+    "Fri, January 17, 2025",
+    "Sun, August 31, 2025Yesterday",
+    "Mon, September 1, 2025 Today",
+    "2025-01-16 17:00:00",
+    "2025-02-03",
+    None,
+]
+
+
+def test_parse_dates_strips_relative_day_suffix():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        parsed = parse_dates(pd.Series(RAW))
+    assert parsed.tolist()[:5] == [
+        pd.Timestamp("2025-01-17"),
+        pd.Timestamp("2025-08-31"),
+        pd.Timestamp("2025-09-01"),
+        pd.Timestamp("2025-01-16 17:00:00"),
+        pd.Timestamp("2025-02-03"),
+    ]
+    assert pd.isna(parsed.iloc[5])
+    # Misma lectura que la versión stdlib de los scripts (merge, índices, ruta ligera)
+    assert [parse_datetime(v) for v in RAW[:5]] == [d.to_pydatetime() for d in parsed.iloc[:5]]
+    assert parse_date(RAW[1]) == "2025-08-31"
+
+
+def test_unparsed_dates_warn_and_become_nat():
+    with pytest.warns(UserWarning, match="1 fechas sin interpretar"):
+        parsed = parse_dates(pd.Series(["2025-02-03", "next week"]), "date")
+    assert parsed.iloc[0] == pd.Timestamp("2025-02-03") and pd.isna(parsed.iloc[1])
+    assert parse_datetime("next week") is None
+
+
+def test_normalize_splits_economy_and_score_columns():
+    df = pd.DataFrame({"Eco (won)": ["3 (1)", "14 (10)", ""], "Full buy(won)": ["10 (6)", "0 (0)", "5 (2)"]})
+    out = normalize(df, "economy_data")
+    assert out["eco_played"].tolist()[:2] == [3, 14] and out["eco_won"].tolist()[:2] == [1, 10]
+    assert pd.isna(out["eco_played"].iloc[2])
+    assert out["full_buy_won"].tolist() == [6, 0, 2]
+    score = normalize(pd.DataFrame({"score": ["0-2", "2-1"]}), "matches")
+    assert score["score_team1"].tolist() == [0, 2] and score["score_team2"].tolist() == [2, 1]
@@ -0,0 +1,31 @@
+import os
+
+import numpy as np
+import pytest
+
+from mvp_model.train_mvp import build_model
+from mvp_model.utils.features import ELO_FEATURES, build_features, load_matches
+from mvp_model.utils.scoring import LogisticScorer, export_logistic, predict_proba_batch
+
+MASTERS = os.path.join(os.path.dirname(__file__), "..", "masters_csvs")
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    df = load_matches(os.path.join(MASTERS, "matches.csv"))
+    X = build_features(df, 32.0, 1500.0, masters_dir=MASTERS)[ELO_FEATURES]
+    pipeline = build_model(use_xgb=False)
+    pipeline.fit(X.iloc[:400], df["team1_win"].iloc[:400])
+    return pipeline, X.iloc[400:]
+
+
+def test_json_scorer_matches_sklearn_predict_proba(fitted, tmp_path):
+    pipeline, X = fitted
+    path = str(tmp_path / "model.json")
+    export_logistic(pipeline, ELO_FEATURES, path, "elo", 32.0, 1500.0)
+    scorer = LogisticScorer.load(path)
+    # Bit a bit, no solo aproximado
+    expected = pipeline.predict_proba(X)
+    assert np.array_equal(scorer.predict_proba(X.to_numpy()), expected)
+    assert np.array_equal(predict_proba_batch([scorer, scorer], X.to_numpy()), np.stack([expected[:, 1]] * 2))
+    assert scorer.training == {"rating_engine": "elo", "k": 32.0, "base": 1500.0}